@@ -11,5 +11,7 @@ def generate_comfyui_prompt(prompt: str) -> dict:
             "message": "ComfyUI 프롬프트 생성 성공",
             "prompts": formatted_prompts
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
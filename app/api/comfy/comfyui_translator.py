@@ -1,6 +1,8 @@
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from app.models.models import comfy_llm
+from app.utils.single_flight import single_flight
+from app.utils.semantic_cache import semantic_cached
 
 # ✅ 프롬프트 템플릿 설정
 translate_prompt = PromptTemplate.from_template(
@@ -30,9 +32,13 @@ translate_prompt = PromptTemplate.from_template(
 translate_chain = translate_prompt | comfy_llm | StrOutputParser()
 
 # ✅ 체인 실행 함수
+@semantic_cached("format_comfyui_prompt")
+@single_flight("format_comfyui_prompt")
 def format_comfyui_prompt(prompt: str) -> dict:
     """
     한글 프롬프트를 영어로 번역하고 ComfyUI 형식에 맞게 변환합니다.
+    의미가 거의 같은 이전 입력의 변환 결과가 있으면 재사용하고,
+    같은 프롬프트로 동시에 들어온 요청은 한 번만 변환하고 결과를 공유합니다.
     """
 
     # 🔄 LLM 체인 실행
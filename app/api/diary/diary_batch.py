@@ -0,0 +1,290 @@
+"""
+로그는 있지만 MongoDB에 일지가 없는 (session_id, user_id, 인게임 날짜)의 감성일지를 일괄 생성하는 배치 도구
+
+    python -m app.api.diary.diary_batch
+    python -m app.api.diary.diary_batch --concurrency 4 --limit 200 --session-id <세션>
+
+처리 순서:
+    1. daily_activity_summary + users 한 번의 쿼리로 후보 날짜와 MBTI를 조회하고,
+       Mongo diary 컬렉션 한 번의 조회로 이미 일지가 있는 날짜를 제외
+    2. chunk 단위로 해당 날짜들의 로그를 한 번에 조회해 날짜별로 묶음
+    3. 일지 / 감정 태그 체인을 batch API(max_concurrency)로 실행
+       (그동안 별도 스레드에서 스크린샷 캡션 임베딩을 미리 준비)
+    4. 대표 이미지를 고른 뒤 insert_many로 한 번에 저장
+
+chunk마다 바로 저장하고, 다음 실행 시에는 Mongo에 일지가 없는 날짜만 다시 찾으므로
+중간에 멈춰도 이어서 실행할 수 있습니다.
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select, asc, tuple_
+from app.core.config import DIARY_BATCH_CONCURRENCY, DIARY_BATCH_CHUNK_SIZE
+from app.core.database import get_pg_session, get_mongo_collection
+from app.models.models import UserLog, UserMBTI, DailyActivitySummary
+from app.utils.log_helper import logs_to_dataframe
+from app.api.diary.graph import diary_chain, prepare_log_node, assign_emotion_node, build_diary_prompt_inputs, strip_think_tags
+from app.api.diary.emotion_classifier import emotion_tag_chain
+from app.utils.llm_governor import llm_priority, PRIORITY_BATCH
+from app.api.diary.screenshot_selector import get_screenshot_paths, prepare_screenshot_embeddings, score_screenshots
+
+MAX_REPORTED_FAILURES = 100
+
+_batch_lock = threading.Lock()
+
+# ✅ 관리자 API에서 조회하는 진행 상황 / 마지막 실행 결과
+batch_status = {
+    "running": False,
+    "progress": None,
+    "last_report": None
+}
+
+def to_diary_date(ingame_date) -> str:
+    """
+    date를 Mongo diary의 날짜 형식(YYYY.MM.DD)으로 변환합니다. (0001년도 4자리 유지)
+    """
+    return f"{ingame_date.year:04d}.{ingame_date.month:02d}.{ingame_date.day:02d}"
+
+def find_missing_diary_days(session_id: Optional[str] = None, limit: Optional[int] = None) -> list[dict]:
+    """
+    로그가 있고 MBTI가 정해진 유저 중 Mongo에 일지가 없는 날짜 목록을 반환합니다.
+    """
+    stmt = (
+        select(
+            DailyActivitySummary.session_id,
+            DailyActivitySummary.user_id,
+            DailyActivitySummary.ingame_date,
+            UserMBTI.mbti_type
+        )
+        .join(UserMBTI, UserMBTI.user_id == DailyActivitySummary.user_id)
+        .where(DailyActivitySummary.log_count > 0, UserMBTI.mbti_type.isnot(None))
+        .order_by(asc(DailyActivitySummary.ingame_date), asc(DailyActivitySummary.session_id), asc(DailyActivitySummary.user_id))
+    )
+    if session_id:
+        stmt = stmt.where(DailyActivitySummary.session_id == session_id)
+
+    db = get_pg_session()
+    try:
+        candidates = db.execute(stmt).all()
+    finally:
+        db.close()
+    if not candidates:
+        return []
+
+    # ✅ 후보 세션의 기존 일지 키만 한 번에 조회
+    sessions = list({row.session_id for row in candidates})
+    existing = {
+        (doc.get("session_id"), doc.get("user_id"), doc.get("date"))
+        for doc in get_mongo_collection("diary").find(
+            {"session_id": {"$in": sessions}},
+            {"_id": 0, "session_id": 1, "user_id": 1, "date": 1}
+        )
+    }
+
+    missing = []
+    for row in candidates:
+        date = to_diary_date(row.ingame_date)
+        if (row.session_id, row.user_id, date) in existing:
+            continue
+        missing.append({
+            "session_id": row.session_id,
+            "user_id": row.user_id,
+            "ingame_date": row.ingame_date,
+            "date": date,
+            "mbti": row.mbti_type
+        })
+        if limit and len(missing) >= limit:
+            break
+    return missing
+
+def load_logs_for_days(days: list[dict]) -> dict:
+    """
+    여러 날짜의 로그를 한 번의 쿼리로 조회해 (session_id, user_id, ingame_date)별 DataFrame으로 묶습니다.
+    """
+    keys = [(day["session_id"], day["user_id"], day["ingame_date"]) for day in days]
+    stmt = (
+        select(UserLog)
+        .where(tuple_(UserLog.session_id, UserLog.user_id, UserLog.ingame_date).in_(keys))
+        .order_by(asc(UserLog.session_id), asc(UserLog.user_id), asc(UserLog.ingame_date), asc(UserLog.ingame_datetime))
+    )
+    db = get_pg_session()
+    try:
+        logs = db.scalars(stmt).all()
+    finally:
+        db.close()
+
+    grouped = {}
+    for log in logs:
+        grouped.setdefault((log.session_id, log.user_id, log.ingame_date), []).append(log)
+    return {key: logs_to_dataframe(group) for key, group in grouped.items()}
+
+def generate_chunk(days: list[dict], concurrency: int) -> tuple[list[dict], list[dict]]:
+    """
+    chunk 하나의 일지를 생성합니다.
+
+    Returns:
+        tuple[list[dict], list[dict]]: (Mongo에 저장할 문서 목록, 실패 목록)
+    """
+    failures = []
+    logs_by_key = load_logs_for_days(days)
+
+    # 1️⃣ 날짜별 프롬프트 준비
+    prepared = []
+    for day in days:
+        group = logs_by_key.get((day["session_id"], day["user_id"], day["ingame_date"]))
+        if group is None or group.empty:
+            failures.append({**day, "stage": "load_logs", "error": "로그가 없습니다."})
+            continue
+        try:
+            state = {"user_id": day["user_id"], "date": day["date"], "group": group, "mbti": day["mbti"]}
+            state = assign_emotion_node(prepare_log_node(state))
+            prepared.append((day, group, build_diary_prompt_inputs(state)))
+        except Exception as e:
+            failures.append({**day, "stage": "prepare", "error": str(e)})
+
+    if not prepared:
+        return [], failures
+
+    config = {"max_concurrency": concurrency}
+
+    # ✅ 캡셔닝은 GPU를 쓰므로 스레드 하나에서 순차 실행하되, LLM batch와는 동시에 진행
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="diary-batch-caption") as executor:
+        caption_futures = [executor.submit(prepare_screenshot_embeddings, get_screenshot_paths(group)) for _, group, _ in prepared]
+
+        # 2️⃣ 일지 생성 (batch API)
+        diaries = diary_chain.batch([inputs for _, _, inputs in prepared], config=config, return_exceptions=True)
+        generated = []
+        for (day, _, _), diary, caption_future in zip(prepared, diaries, caption_futures):
+            if isinstance(diary, Exception):
+                failures.append({**day, "stage": "generate_diary", "error": str(diary)})
+                continue
+            generated.append((day, caption_future, strip_think_tags(diary)))
+
+        # 3️⃣ 감정 키워드/태그 (batch API)
+        emotions = emotion_tag_chain.batch([{"diary": diary} for _, _, diary in generated], config=config, return_exceptions=True)
+
+    # 4️⃣ 대표 이미지 선택 (준비된 캡션 임베딩과 본문 유사도만 계산) 후 문서 구성
+    documents = []
+    for (day, caption_future, diary), emotion in zip(generated, emotions):
+        if isinstance(emotion, Exception):
+            failures.append({**day, "stage": "emotion_tagging", "error": str(emotion)})
+            continue
+        try:
+            best_screenshot_path = score_screenshots(diary, caption_future.result())
+        except Exception as e:
+            failures.append({**day, "stage": "select_screenshot", "error": str(e)})
+            continue
+
+        documents.append({
+            "session_id": day["session_id"],
+            "user_id": day["user_id"],
+            "date": day["date"],
+            "content": diary,
+            "emotion_tags": emotion.get("emotion_tags", []),
+            "emotion_keywords": emotion.get("keywords", []),
+            "screenshot_path": best_screenshot_path
+        })
+    return documents, failures
+
+def save_documents(documents: list[dict]) -> int:
+    """
+    생성된 일지를 insert_many로 한 번에 저장합니다. (일부가 실패해도 나머지는 저장)
+    """
+    if not documents:
+        return 0
+    result = get_mongo_collection("diary").insert_many(documents, ordered=False)
+    return len(result.inserted_ids)
+
+def claim_batch() -> bool:
+    """
+    배치 실행 권한을 기다리지 않고 잡습니다. 이미 실행 중이면 False
+    (API에서 요청 시점에 잡고 run_diary_batch(lock_claimed=True)로 넘겨 동시 요청이 둘 다 시작되지 않게 함)
+    """
+    if not _batch_lock.acquire(blocking=False):
+        return False
+    batch_status["running"] = True
+    return True
+
+def run_diary_batch(
+    concurrency: int = DIARY_BATCH_CONCURRENCY,
+    chunk_size: int = DIARY_BATCH_CHUNK_SIZE,
+    session_id: Optional[str] = None,
+    limit: Optional[int] = None,
+    lock_claimed: bool = False
+) -> dict:
+    """
+    일지가 없는 날짜를 찾아 일괄 생성합니다.
+    lock_claimed=True이면 호출한 쪽이 claim_batch()로 이미 실행 권한을 잡은 상태입니다.
+
+    Returns:
+        dict: 후보 수, 생성 수, 실패 목록, 처리량(diaries/min) 등 요약 정보
+    """
+    if not lock_claimed and not claim_batch():
+        raise RuntimeError("이미 일지 배치 작업이 실행 중입니다.")
+
+    started = time.perf_counter()
+    generated = 0
+    failures = []
+    try:
+        days = find_missing_diary_days(session_id=session_id, limit=limit)
+        batch_status.update({
+            "running": True,
+            "progress": {"total": len(days), "done": 0, "generated": 0, "failed": 0, "started_at": datetime.now().isoformat()}
+        })
+        print(f"🛠️ [DIARY BATCH] 일지가 없는 날짜 {len(days)}건 (concurrency={concurrency}, chunk={chunk_size})")
+
+        for start in range(0, len(days), chunk_size):
+            chunk = days[start:start + chunk_size]
+            try:
+                # 배치 LLM 호출은 대화형 / 요청 경로 호출보다 뒤에 실행 (batch()의 스레드로도 전달됨)
+                with llm_priority(PRIORITY_BATCH):
+                    documents, chunk_failures = generate_chunk(chunk, concurrency)
+                generated += save_documents(documents)
+            except Exception as e:
+                # chunk 전체 실패 (DB 연결 오류 등) → 다음 실행에서 다시 시도됨
+                chunk_failures = [{**day, "stage": "chunk", "error": str(e)} for day in chunk]
+            failures.extend(chunk_failures)
+
+            elapsed_min = (time.perf_counter() - started) / 60
+            batch_status["progress"].update({
+                "done": start + len(chunk),
+                "generated": generated,
+                "failed": len(failures),
+                "diaries_per_min": round(generated / elapsed_min, 2) if elapsed_min else 0.0
+            })
+            print(f"🛠️ [DIARY BATCH] {start + len(chunk)}/{len(days)} 처리 (생성 {generated}, 실패 {len(failures)})")
+
+        elapsed = time.perf_counter() - started
+        report = {
+            "candidates": len(days),
+            "generated": generated,
+            "failed": len(failures),
+            "failures": [
+                {**failure, "ingame_date": str(failure["ingame_date"])}
+                for failure in failures[:MAX_REPORTED_FAILURES]
+            ],
+            "elapsed_sec": round(elapsed, 2),
+            "diaries_per_min": round(generated / (elapsed / 60), 2) if elapsed else 0.0,
+            "finished_at": datetime.now().isoformat()
+        }
+        batch_status["last_report"] = report
+        print(f"✅ [DIARY BATCH] 생성 {generated}건, 실패 {len(failures)}건, {report['diaries_per_min']} diaries/min")
+        return report
+    finally:
+        batch_status["running"] = False
+        _batch_lock.release()
+
+def is_batch_running() -> bool:
+    return _batch_lock.locked()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="일지가 없는 날짜의 감성일지 일괄 생성")
+    parser.add_argument("--concurrency", type=int, default=DIARY_BATCH_CONCURRENCY, help="LLM 동시 호출 수")
+    parser.add_argument("--chunk-size", type=int, default=DIARY_BATCH_CHUNK_SIZE, help="한 번에 처리/저장할 날짜 수")
+    parser.add_argument("--session-id", default=None, help="특정 세션만 처리")
+    parser.add_argument("--limit", type=int, default=None, help="최대 처리 날짜 수")
+    args = parser.parse_args()
+    run_diary_batch(concurrency=args.concurrency, chunk_size=args.chunk_size, session_id=args.session_id, limit=args.limit)
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import pandas as pd
+from pymongo import ASCENDING
+from app.core.config import (
+    DIARY_CACHE_ENABLED, DIARY_CACHE_TTL_SEC, DIARY_CACHE_MAX_ENTRIES,
+    DIARY_PROMPT_VERSION, LOG_COMPACTION_ENABLED
+)
+from app.core.database import get_mongo_collection, get_async_mongo_collection
+from app.models.models import diary_llm
+from app.api.diary.prompt_diary import prompt_template
+from app.utils.log_helper import parse_log_date
+
+# ✅ 일지 결과에 영향을 주는 로그 컬럼 (timestamp는 실제 시각이라 제외)
+FINGERPRINT_COLUMNS = ["ingame_datetime", "action_type", "action_name", "location", "detail", "with", "screenshot"]
+
+def _prompt_signature() -> dict:
+    """
+    프롬프트 문구 / 모델 / temperature 등 로그 외에 결과를 바꾸는 설정을 모읍니다.
+    """
+    return {
+        "prompt_version": DIARY_PROMPT_VERSION,
+        "prompt_hash": hashlib.sha256(prompt_template.pretty_repr().encode("utf-8")).hexdigest(),
+        "model": getattr(diary_llm, "model", None) or getattr(diary_llm, "model_name", None),
+        "temperature": getattr(diary_llm, "temperature", None),
+        "log_compaction": LOG_COMPACTION_ENABLED
+    }
+
+PROMPT_SIGNATURE = _prompt_signature()
+
+def normalize_logs(group: pd.DataFrame) -> list[list[str]]:
+    """
+    로그 DataFrame을 인게임 시각 순으로 정렬하고 결과에 영향을 주는 컬럼만 문자열로 남깁니다.
+    (조회 순서나 id, 업로드 시각이 달라도 같은 로그면 같은 값)
+    """
+    if group.empty:
+        return []
+    columns = [column for column in FINGERPRINT_COLUMNS if column in group.columns]
+    rows = group[columns].astype(object).where(group[columns].notna(), "").astype(str).values.tolist()
+    return sorted(rows)
+
+def build_diary_fingerprint(group: pd.DataFrame, mbti: str) -> str:
+    """
+    (정규화된 하루 로그, MBTI, 프롬프트 버전, 모델, temperature)의 fingerprint를 만듭니다.
+    """
+    payload = {"logs": normalize_logs(group), "mbti": mbti, **PROMPT_SIGNATURE}
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+def to_cache_date(ingame_date) -> str:
+    # 'YYYY.MM.DD(-HH.MM.SS)' 문자열과 date 모두 'YYYY-MM-DD'로 통일 (0001년도 4자리 유지)
+    if isinstance(ingame_date, str):
+        ingame_date = parse_log_date(ingame_date)
+    return ingame_date.isoformat()
+
+class DiaryResultCache:
+    """
+    run_diary_generation 결과를 MongoDB에 보관하는 캐시입니다.
+    - 키: (session_id, user_id, 날짜) + 로그/MBTI/프롬프트/모델 fingerprint
+    - TTL: expires_at TTL 인덱스 (조회 시에도 만료 여부 확인)
+    - LRU: max_entries를 넘으면 last_accessed가 오래된 것부터 삭제
+    - 해당 날짜 로그가 수정/삭제되면 invalidate로 제거
+    """
+
+    def __init__(
+        self,
+        collection_name: str = "diary_cache",
+        ttl_sec: int = DIARY_CACHE_TTL_SEC,
+        max_entries: int = DIARY_CACHE_MAX_ENTRIES,
+        enabled: bool = DIARY_CACHE_ENABLED
+    ):
+        self.collection_name = collection_name
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._indexes_ready = False
+
+        # ✅ 모니터링용 지표
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.forced = 0
+        self.evicted = 0
+        self.invalidated = 0
+        self.errors = 0
+
+    def _collection(self):
+        collection = get_mongo_collection(self.collection_name)
+        if not self._indexes_ready:
+            with self._lock:
+                if not self._indexes_ready:
+                    collection.create_index("expires_at", expireAfterSeconds=0)
+                    collection.create_index([("last_accessed", ASCENDING)])
+                    collection.create_index([("session_id", ASCENDING), ("user_id", ASCENDING), ("ingame_date", ASCENDING)])
+                    self._indexes_ready = True
+        return collection
+
+    def make_key(self, session_id: str, user_id: str, ingame_date, group: pd.DataFrame, mbti: str) -> str:
+        scope = f"{session_id}:{user_id}:{to_cache_date(ingame_date)}"
+        return hashlib.sha256(f"{scope}:{build_diary_fingerprint(group, mbti)}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        now = datetime.now(timezone.utc)
+        try:
+            doc = self._collection().find_one_and_update(
+                {"_id": key, "expires_at": {"$gt": now}},
+                {"$set": {"last_accessed": now}, "$inc": {"hits": 1}},
+                projection={"result": 1}
+            )
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ 일지 캐시 조회 실패: {e}")
+            return None
+
+        if doc is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return doc["result"]
+
+    def put(self, key: str, session_id: str, user_id: str, ingame_date, result: dict):
+        now = datetime.now(timezone.utc)
+        try:
+            collection = self._collection()
+            collection.replace_one(
+                {"_id": key},
+                {
+                    "session_id": session_id,
+                    "user_id": user_id,
+                    "ingame_date": to_cache_date(ingame_date),
+                    "result": result,
+                    "created_at": now,
+                    "last_accessed": now,
+                    "expires_at": now + timedelta(seconds=self.ttl_sec),
+                    "hits": 0
+                },
+                upsert=True
+            )
+            self.stores += 1
+            self._evict_overflow(collection)
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ 일지 캐시 저장 실패: {e}")
+
+    def _evict_overflow(self, collection):
+        # 최대 개수를 넘은 만큼 가장 오래 사용하지 않은 항목부터 삭제
+        overflow = collection.estimated_document_count() - self.max_entries
+        if overflow <= 0:
+            return
+        stale_ids = [
+            doc["_id"] for doc in
+            collection.find({}, {"_id": 1}).sort("last_accessed", ASCENDING).limit(overflow)
+        ]
+        if stale_ids:
+            self.evicted += collection.delete_many({"_id": {"$in": stale_ids}}).deleted_count
+
+    async def invalidate_async(self, session_id: str, user_id: str, ingame_date) -> int:
+        """
+        해당 (세션, 유저, 날짜)의 캐시를 모두 삭제합니다. (로그 수정/삭제 라우트에서 호출)
+        """
+        if not self.enabled:
+            return 0
+        try:
+            result = await get_async_mongo_collection(self.collection_name).delete_many({
+                "session_id": session_id,
+                "user_id": user_id,
+                "ingame_date": to_cache_date(ingame_date)
+            })
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ 일지 캐시 무효화 실패: {e}")
+            return 0
+        self.invalidated += result.deleted_count
+        return result.deleted_count
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "ttl_sec": self.ttl_sec,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "forced": self.forced,
+            "evicted": self.evicted,
+            "invalidated": self.invalidated,
+            "errors": self.errors,
+            "prompt_signature": PROMPT_SIGNATURE
+        }
+
+diary_cache = DiaryResultCache()
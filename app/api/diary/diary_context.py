@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable
+
+class StageStats:
+    """
+    일지 파이프라인 단계별 실행 횟수 / 재사용 횟수 / 소요 시간 (프로세스 전체 누적)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"runs": 0, "reused": 0, "failed": 0, "total_ms": 0.0, "max_ms": 0.0})
+
+    def record_run(self, stage: str, elapsed_ms: float, failed: bool = False):
+        with self._lock:
+            stat = self._stats[stage]
+            stat["runs"] += 1
+            stat["failed"] += int(failed)
+            stat["total_ms"] += elapsed_ms
+            stat["max_ms"] = max(stat["max_ms"], elapsed_ms)
+
+    def record_reuse(self, stage: str):
+        with self._lock:
+            self._stats[stage]["reused"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                stage: {
+                    **stat,
+                    "total_ms": round(stat["total_ms"], 2),
+                    "max_ms": round(stat["max_ms"], 2),
+                    "avg_ms": round(stat["total_ms"] / stat["runs"], 2) if stat["runs"] else 0.0
+                }
+                for stage, stat in self._stats.items()
+            }
+
+stage_stats = StageStats()
+
+class DiaryRunContext:
+    """
+    요청 하나 동안 단계별 결과(artifact)를 보관해서 같은 단계가 두 번 실행되지 않게 합니다.
+    그래프 노드, run_diary_generation, 라우트가 같은 context를 공유합니다.
+    """
+
+    def __init__(self):
+        self.artifacts: dict[str, Any] = {}
+        self.runs: dict[str, int] = defaultdict(int)
+        self.reused: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._stage_locks: dict[str, threading.Lock] = defaultdict(threading.Lock)
+
+    def has(self, stage: str) -> bool:
+        return stage in self.artifacts
+
+    def get(self, stage: str, default=None):
+        return self.artifacts.get(stage, default)
+
+    def get_or_run(self, stage: str, fn: Callable, *args, **kwargs):
+        """
+        stage 결과가 있으면 재사용하고, 없으면 fn을 실행해 결과를 저장합니다.
+        같은 stage를 여러 스레드에서 동시에 요청해도 한 번만 실행됩니다.
+        """
+        with self._lock:
+            stage_lock = self._stage_locks[stage]
+
+        with stage_lock:
+            if stage in self.artifacts:
+                self.reused[stage] += 1
+                stage_stats.record_reuse(stage)
+                return self.artifacts[stage]
+
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                stage_stats.record_run(stage, (time.perf_counter() - started) * 1000, failed=True)
+                raise
+            stage_stats.record_run(stage, (time.perf_counter() - started) * 1000)
+            self.runs[stage] += 1
+            self.artifacts[stage] = result
+            return result
+
+    def summary(self) -> dict:
+        return {stage: {"runs": self.runs[stage], "reused": self.reused[stage]} for stage in self.artifacts}
+
+def get_context(state: dict) -> DiaryRunContext:
+    """
+    state에 담긴 context를 반환합니다. 없으면 새로 만들어 state에 넣습니다.
+    """
+    context = state.get("context")
+    if context is None:
+        context = DiaryRunContext()
+        state["context"] = context
+    return context
@@ -1,10 +1,36 @@
-from app.api.diary.graph import build_diary_graph, DiaryState
-from app.api.diary.prompt_diary import emotion_tag_chain
-from app.api.diary.screenshot_selector import select_best_screenshot
-from app.utils.log_helper import to_relative_screenshot_path
+from app.api.diary.graph import (
+    get_diary_graph,
+    DiaryState,
+    diary_chain,
+    prepare_log_node,
+    assign_emotion_node,
+    build_diary_prompt_inputs,
+    resolve_style_mbti,
+    ThinkTagFilter,
+    DIARY_FALLBACK_CONTENT
+)
+from app.api.diary.rag import get_mbti_style_cached
+from app.api.diary.diary_context import DiaryRunContext
+from app.api.diary.diary_cache import diary_cache
+from app.api.diary.emotion_classifier import emotion_tag_chain
+from app.api.diary.screenshot_selector import get_screenshot_paths, prepare_screenshot_embeddings, score_screenshots
+from app.core.config import DIARY_PREFETCH_WORKERS
 from app.utils.db_helper import save_diary_to_mongo, get_diary_from_mongo
+from app.utils.llm_cache import bypass_llm_cache
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import AsyncIterator, Callable, Optional
+import asyncio
+import contextvars
 import pandas as pd
 
+# ✅ 일지 본문과 무관한 단계(어투 조회, 스크린샷 캡션 임베딩)를 LLM 생성과 동시에 돌리는 스레드 풀
+_prefetch_executor = ThreadPoolExecutor(max_workers=DIARY_PREFETCH_WORKERS, thread_name_prefix="diary-prefetch")
+
+def _submit_prefetch(fn: Callable, *args):
+    # 호출한 쪽의 contextvars(LLM 우선순위, 캐시 우회)를 그대로 가지고 실행
+    return _prefetch_executor.submit(contextvars.copy_context().run, fn, *args)
+
 def save_diary_to_mongo_db(
     session_id: str,
     user_id: str,
@@ -37,29 +63,80 @@ def run_diary_generation(
     date: str,
     group: pd.DataFrame,
     mbti: str,
-    save_to_db: bool = True
+    save_to_db: bool = True,
+    on_stage: Optional[Callable[[str], None]] = None,
+    context: Optional[DiaryRunContext] = None,
+    force_regenerate: bool = False
 ):
-    graph = build_diary_graph()
+    """
+    일지를 생성합니다. on_stage가 주어지면 각 단계가 끝날 때마다 단계 이름으로 호출합니다.
+    (그래프 노드 이름 → emotion_tagging → select_screenshot → save_to_db 순서, 캐시 적중 시 diary_cache → save_to_db)
+    context를 넘기면 단계 결과(감정 태그, 대표 이미지 등)를 호출한 쪽에서 그대로 재사용할 수 있습니다.
+    같은 로그/MBTI/프롬프트/모델의 결과가 캐시에 있으면 재사용하고, force_regenerate=True이면 새로 생성합니다.
+    """
+    report_stage = on_stage or (lambda stage: None)
+    context = context or DiaryRunContext()
+
+    # ✅ 결과 캐시 조회
+    cache_key = None
+    if diary_cache.enabled:
+        try:
+            cache_key = diary_cache.make_key(session_id, user_id, date, group, mbti)
+        except Exception as e:
+            print(f"⚠️ 일지 캐시 키 생성 실패 (캐시 사용 안 함): {e}")
+    if cache_key and force_regenerate:
+        diary_cache.forced += 1
+    elif cache_key:
+        cached = diary_cache.get(cache_key)
+        if cached:
+            print(f"♻️ [DIARY CACHE] 캐시된 일지 재사용 (user_id={user_id}, date={cached['date']})")
+            report_stage("diary_cache")
+            if save_to_db:
+                save_diary_to_mongo_db(
+                    session_id=session_id,
+                    user_id=user_id,
+                    date=cached["date"],
+                    content=cached["diary"],
+                    best_screenshot_path=cached["best_screenshot_path"],
+                    emotion_tags=cached["emotion_tags"],
+                    emotion_keywords=cached["emotion_keywords"]
+                )
+                report_stage("save_to_db")
+            return {**cached, "cache_hit": True}
+
+    graph = get_diary_graph()
+
+    # ✅ 일지 본문이 필요 없는 단계는 미리 시작 (그래프의 retrieve_mbti 노드는 같은 context의 결과를 기다렸다가 재사용)
+    _submit_prefetch(
+        context.get_or_run, "mbti_style", get_mbti_style_cached, resolve_style_mbti(mbti)
+    )
+    screenshot_future = _submit_prefetch(
+        context.get_or_run, "screenshot_embeddings", prepare_screenshot_embeddings, get_screenshot_paths(group)
+    )
 
     input_data = {
         "user_id": user_id,
         "date": date,
         "group": group,
         "mbti": mbti,
+        "context": context
     }
 
-    state = graph.invoke(input_data)
+    # ✅ 노드 단위로 실행하면서 진행 상황 보고 (노드가 전체 state를 반환하므로 그대로 병합)
+    state = dict(input_data)
+    # 강제 재생성이면 LLM 응답 캐시(감정 태그 fallback 등)도 조회하지 않음
+    with (bypass_llm_cache() if force_regenerate else nullcontext()):
+        for update in graph.stream(input_data, stream_mode="updates"):
+            for node_name, node_state in update.items():
+                if node_state:
+                    state.update(node_state)
+                report_stage(node_name)
+    # ("qwen3" 모델의 <think> 구간은 generate_diary 노드에서 이미 제거됨)
     diary_content = state["diary"]
 
-    # "qwen3" 모델을 LLM으로 사용시 처리 필요한 부분
-    if "<think>" in diary_content and "</think>" in diary_content:
-        start_idx = diary_content.index("<think>")
-        end_idx = diary_content.index("</think>") + len("</think>")
-        print(f"🛠️ <think> 태그 발견: {diary_content[start_idx:end_idx]} → 삭제 처리합니다.")
-        diary_content = diary_content[:start_idx] + diary_content[end_idx:]
-
-    # 감정 키워드/태그 별도 체인 호출
-    emotion_result = emotion_tag_chain.invoke({"diary": diary_content})
+    # 감정 키워드/태그 (그래프의 generate_emotion_info 결과 재사용)
+    emotion_result = context.get_or_run("emotion_tagging", emotion_tag_chain.invoke, {"diary": diary_content})
+    report_stage("emotion_tagging")
     
     # 💡 여기서 None 처리 추가
     emotion_keywords = emotion_result.get("keywords", [])
@@ -76,12 +153,9 @@ def run_diary_generation(
         print(emotion_tags)
 
 
-    # 스크린샷 경로 추출
-    screenshot_paths = group['screenshot'].dropna().unique().tolist()
-    screenshot_paths = [to_relative_screenshot_path(path) for path in screenshot_paths if path]
-
-    # 대표 이미지 선택
-    best_screenshot_path = select_best_screenshot(diary_content, screenshot_paths)
+    # 대표 이미지 선택 (캡션 임베딩은 미리 준비됨 → 일지 본문과의 유사도 계산만 남음)
+    best_screenshot_path = context.get_or_run("select_screenshot", score_screenshots, diary_content, screenshot_future.result())
+    report_stage("select_screenshot")
 
     # ✅ 날짜 포맷 수정 (시간 제거)
     formatted_date = date.split('-')[0] if '-' in date else date
@@ -97,8 +171,10 @@ def run_diary_generation(
             emotion_tags=emotion_tags,
             emotion_keywords=emotion_keywords
         )
+        report_stage("save_to_db")
 
-    return {
+    print(f"📊 [STAGES] {context.summary()}")
+    result = {
         "user_id": user_id,
         "date": formatted_date,
         "mbti": mbti,
@@ -106,9 +182,15 @@ def run_diary_generation(
         "emotion_tags": emotion_tags,
         "emotion_keywords": emotion_keywords,
         "session_id": session_id,
-        "best_screenshot_path": best_screenshot_path
+        "best_screenshot_path": best_screenshot_path,
+        "compaction_report": state.get("compaction_report")
     }
 
+    # ✅ LLM 호출이 실패한 기본 본문은 캐시하지 않음
+    if cache_key and diary_content != DIARY_FALLBACK_CONTENT:
+        diary_cache.put(cache_key, session_id, user_id, date, result)
+    return {**result, "cache_hit": False}
+
 def format_diary_output(state: DiaryState) -> dict:
     return {
         "user_id": state["user_id"],
@@ -121,12 +203,64 @@ def format_diary_output(state: DiaryState) -> dict:
         "formatted_date": state.get("date") 
     }
 
-def regenerate_emotion_info(diary_text: str) -> dict:
+async def regenerate_emotion_info(diary_text: str) -> dict:
     """
     일지 내용을 바탕으로 감정 키워드와 태그를 재생성합니다.
+    (async 라우트에서 호출되므로 ainvoke 사용 → 모델 슬롯 대기 중에도 이벤트 루프를 막지 않음)
     """
-    result = emotion_tag_chain.invoke({"diary": diary_text})
+    result = await emotion_tag_chain.ainvoke({"diary": diary_text})
     return {
         "keywords": result["keywords"],
         "emotion_tags": result["emotion_tags"]
     }
+
+
+async def stream_diary_generation(
+    session_id: str,
+    user_id: str,
+    date: str,
+    group: pd.DataFrame,
+    mbti: str
+) -> AsyncIterator[tuple[str, dict]]:
+    """
+    일지 본문을 토큰 단위로 스트리밍합니다. (DB에 저장하지 않음)
+    (이벤트 이름, 데이터) 순서: token* → diary → emotion → screenshot
+    """
+    # ✅ 스크린샷 캡션 임베딩은 본문 스트리밍과 동시에 준비
+    screenshot_future = asyncio.wrap_future(_submit_prefetch(prepare_screenshot_embeddings, get_screenshot_paths(group)))
+
+    # ✅ 로그 정리와 어투 조회를 동시에 실행
+    state = {"user_id": user_id, "date": date, "group": group, "mbti": mbti}
+    state, style_context = await asyncio.gather(
+        asyncio.to_thread(prepare_log_node, state),
+        asyncio.wrap_future(_submit_prefetch(get_mbti_style_cached, resolve_style_mbti(mbti)))
+    )
+    state = assign_emotion_node(state)
+    state["style_context"] = style_context
+    prompt_inputs = build_diary_prompt_inputs(state)
+
+    # ✅ 일지 본문 토큰 스트리밍 (<think> 구간은 실시간으로 제거)
+    think_filter = ThinkTagFilter()
+    parts = []
+    async for chunk in diary_chain.astream(prompt_inputs):
+        text = think_filter.feed(chunk)
+        if text:
+            parts.append(text)
+            yield "token", {"text": text}
+    tail = think_filter.flush()
+    if tail:
+        parts.append(tail)
+        yield "token", {"text": tail}
+
+    diary_content = "".join(parts)
+    yield "diary", {"diary": diary_content}
+
+    # ✅ 본문이 끝난 뒤 감정 키워드/태그, 대표 이미지를 후속 이벤트로 전송
+    emotion_result = await emotion_tag_chain.ainvoke({"diary": diary_content})
+    yield "emotion", {
+        "emotion_keywords": emotion_result.get("keywords", []),
+        "emotion_tags": emotion_result.get("emotion_tags", [])
+    }
+
+    best_screenshot_path = await asyncio.to_thread(score_screenshots, diary_content, await screenshot_future)
+    yield "screenshot", {"best_screenshot_path": best_screenshot_path}
@@ -0,0 +1,207 @@
+import asyncio
+import time
+import uuid
+from functools import partial
+from typing import AsyncIterator, Callable, Optional
+from app.core.config import DIARY_JOB_WORKERS, DIARY_JOB_MAX_QUEUE, DIARY_JOB_TTL_SEC
+from app.utils.llm_governor import llm_priority, PRIORITY_BATCH
+
+# ✅ 작업 상태
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED)
+
+class DiaryJobManager:
+    """
+    일지 생성을 백그라운드 작업으로 실행하는 프로세스 내 작업 관리자입니다.
+    max_workers개의 워커만 동시에 실행하므로 GPU/LLM 동시 작업 수가 제한됩니다.
+    작업 상태는 메모리에만 보관하므로 uvicorn 워커 하나 기준으로 동작합니다.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DIARY_JOB_WORKERS,
+        max_queue_size: int = DIARY_JOB_MAX_QUEUE,
+        ttl_sec: int = DIARY_JOB_TTL_SEC
+    ):
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.ttl_sec = ttl_sec
+
+        self.queue: asyncio.Queue | None = None
+        self._workers: list[asyncio.Task] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._jobs: dict[str, dict] = {}
+        self._events: dict[str, asyncio.Event] = {}
+
+        # ✅ 모니터링용 지표
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.rejected = 0
+        self.running_jobs = 0
+        self._total_wait_ms = 0.0
+        self._total_run_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return any(not worker.done() for worker in self._workers)
+
+    async def start(self):
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_workers)]
+        print(f"✅ [INFO] 일지 작업 워커 시작 (workers={self.max_workers}, max_queue={self.max_queue_size})")
+
+    async def stop(self):
+        """
+        워커를 종료합니다. 실행 중인 작업은 중단되고 대기 중인 작업은 버려집니다.
+        """
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        print(f"✅ [INFO] 일지 작업 워커 종료 (succeeded={self.succeeded}, failed={self.failed})")
+
+    def submit(self, fn: Callable, **kwargs) -> dict:
+        """
+        작업을 큐에 넣고 작업 정보를 반환합니다.
+        fn은 워커 스레드에서 fn(on_stage=..., **kwargs)로 호출되며 반환값이 작업 결과가 됩니다.
+        큐가 가득 차면 asyncio.QueueFull을 발생시킵니다.
+        """
+        if not self.running:
+            raise RuntimeError("일지 작업 워커가 실행 중이 아닙니다.")
+        self._purge_expired()
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": JOB_QUEUED,
+            "stage": None,
+            "stages": [],
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None
+        }
+        try:
+            self.queue.put_nowait((job_id, fn, kwargs))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise
+        self._jobs[job_id] = job
+        self._events[job_id] = asyncio.Event()
+        self.submitted += 1
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        snapshot = {**job, "stages": list(job["stages"])}
+        if job["status"] == JOB_QUEUED:
+            snapshot["queue_size"] = self.queue.qsize()
+        return snapshot
+
+    async def watch(self, job_id: str, keepalive_sec: float = 15.0) -> AsyncIterator[Optional[dict]]:
+        """
+        작업 상태가 바뀔 때마다 스냅샷을 반환합니다. 작업이 끝나면 종료합니다.
+        keepalive_sec 동안 변화가 없으면 None을 반환합니다. (SSE keep-alive용)
+        """
+        while True:
+            # 스냅샷보다 먼저 이벤트를 잡아야 그 사이의 변경을 놓치지 않음
+            event = self._events.get(job_id)
+            snapshot = self.get(job_id)
+            if event is None or snapshot is None:
+                return
+            yield snapshot
+            if snapshot["status"] in FINISHED_STATUSES:
+                return
+
+            try:
+                await asyncio.wait_for(event.wait(), timeout=keepalive_sec)
+            except asyncio.TimeoutError:
+                yield None
+
+    def stats(self) -> dict:
+        finished = self.succeeded + self.failed
+        return {
+            "workers": self.max_workers,
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "running": self.running_jobs,
+            "submitted": self.submitted,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self._total_wait_ms / finished, 2) if finished else 0.0,
+            "avg_run_ms": round(self._total_run_ms / finished, 2) if finished else 0.0
+        }
+
+    def _notify(self, job_id: str):
+        # 기다리던 watcher를 모두 깨우고 다음 변경용 이벤트로 교체
+        event = self._events.get(job_id)
+        if event:
+            self._events[job_id] = asyncio.Event()
+            event.set()
+
+    def _set_stage(self, job_id: str, stage: str):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        job["stage"] = stage
+        job["stages"].append({"stage": stage, "at": time.time()})
+        self._notify(job_id)
+
+    def _report_stage(self, job_id: str, stage: str):
+        # 워커 스레드에서 호출되므로 이벤트 루프로 넘겨서 갱신
+        self._loop.call_soon_threadsafe(self._set_stage, job_id, stage)
+
+    async def _worker(self):
+        while True:
+            job_id, fn, kwargs = await self.queue.get()
+            job = self._jobs.get(job_id)
+            if job is None:
+                self.queue.task_done()
+                continue
+
+            job["status"] = JOB_RUNNING
+            job["started_at"] = time.time()
+            self.running_jobs += 1
+            self._notify(job_id)
+            try:
+                # 백그라운드 작업의 LLM 호출은 MBTI / SFX 같은 대화형 요청보다 뒤에 실행
+                with llm_priority(PRIORITY_BATCH):
+                    job["result"] = await asyncio.to_thread(fn, on_stage=partial(self._report_stage, job_id), **kwargs)
+                job["status"] = JOB_SUCCEEDED
+                self.succeeded += 1
+            except Exception as e:
+                print(f"❌ [ERROR] 일지 작업 실패 (job_id={job_id}): {e}")
+                job["status"] = JOB_FAILED
+                job["error"] = str(e)
+                self.failed += 1
+            finally:
+                job["finished_at"] = time.time()
+                self.running_jobs -= 1
+                self._total_wait_ms += (job["started_at"] - job["created_at"]) * 1000
+                self._total_run_ms += (job["finished_at"] - job["started_at"]) * 1000
+                self.queue.task_done()
+                # 스레드에서 보낸 마지막 stage 갱신이 먼저 반영되도록 다음 루프에서 알림
+                self._loop.call_soon(self._notify, job_id)
+
+    def _purge_expired(self):
+        # 끝난 지 ttl_sec가 지난 작업은 메모리에서 제거
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] and now - job["finished_at"] > self.ttl_sec
+        ]
+        for job_id in expired:
+            self._jobs.pop(job_id, None)
+            self._events.pop(job_id, None)
+
+diary_job_manager = DiaryJobManager()
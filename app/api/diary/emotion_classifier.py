@@ -0,0 +1,176 @@
+import asyncio
+import threading
+from typing import Optional
+import numpy as np
+from langchain_core.runnables import RunnableLambda
+from app.core.config import EMOTION_CLASSIFIER_ENABLED, EMOTION_MIN_SIMILARITY, EMOTION_MIN_MARGIN
+from app.models.models import c_embedding_model
+from app.api.diary.prompt_diary import emotion_llm_chain
+
+# ✅ 감정 키워드 (일지 감정 분류 대상)
+emotion_list = ["고요함", "성취감", "그리움", "연결감", "불안정", "몰입"]
+
+# ✅ 감정 키워드에 따른 연관 해시태그
+emotion_tag_mapping = {
+    "고요함": ["#평온", "#명상", "#안정", "#조용한시간"],
+    "성취감": ["#성장", "#목표달성", "#보람", "#자부심"],
+    "그리움": ["#추억", "#회상", "#기억", "#감정"],
+    "연결감": ["#연대", "#따뜻함", "#교감", "#소속감"],
+    "불안정": ["#불안", "#혼란", "#불확실", "#고민"],
+    "몰입": ["#집중", "#몰두", "#시간가속", "#경험"]
+}
+
+# ✅ 감정별 prototype 문장 (임베딩 평균을 해당 감정의 기준 벡터로 사용)
+EMOTION_PROTOTYPES = {
+    "고요함": [
+        "오늘은 조용하고 평온한 하루였다. 서두르지 않고 천천히 시간을 보냈다.",
+        "바람 소리를 들으며 차분하게 밭을 돌봤다. 마음이 편안하고 고요했다.",
+        "아무 일도 일어나지 않은 잔잔한 하루, 그 고요함이 오히려 좋았다."
+    ],
+    "성취감": [
+        "드디어 목표했던 일을 해냈다. 노력한 만큼 결과가 나와서 뿌듯했다.",
+        "처음으로 큰 수확을 거두고 요리를 완성했다. 스스로가 자랑스러웠다.",
+        "하나씩 해낸 일들이 쌓여 성장한 느낌이 들었다. 보람찬 하루였다."
+    ],
+    "그리움": [
+        "익숙한 풍경을 보니 예전 기억이 떠올라 마음 한구석이 아련했다.",
+        "함께했던 시간이 그리워졌다. 지나간 날들을 자꾸 회상하게 된다.",
+        "오래전의 추억이 생각나 잠시 멈춰 서서 그때를 떠올렸다."
+    ],
+    "연결감": [
+        "친구와 함께 일하며 웃고 이야기를 나눴다. 함께라서 따뜻했다.",
+        "이웃에게 도움을 받고 나도 작은 선물을 건넸다. 마음이 통하는 느낌이었다.",
+        "누군가와 함께 보낸 하루 덕분에 이곳에 속해 있다는 기분이 들었다."
+    ],
+    "불안정": [
+        "계획대로 되지 않아 마음이 복잡하고 불안했다. 내일이 걱정된다.",
+        "무엇을 먼저 해야 할지 몰라 혼란스러웠다. 이대로 괜찮을지 고민이 많다.",
+        "실패가 이어져 자신감이 흔들렸다. 불확실한 마음으로 하루를 마쳤다."
+    ],
+    "몰입": [
+        "시간 가는 줄 모르고 일에 푹 빠져 있었다. 정신을 차려 보니 저녁이었다.",
+        "낚시에 집중하다 보니 주변 소리가 들리지 않았다. 온전히 그 순간에 몰두했다.",
+        "같은 작업을 반복하면서도 지루하지 않았다. 하루가 순식간에 지나갔다."
+    ]
+}
+
+TAGS_PER_DIARY = 2
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+class EmotionClassifier:
+    """
+    일지 임베딩을 감정별 prototype 벡터와 비교해 감정 키워드 1개와 태그 2개를 고릅니다.
+    - 키워드: prototype 평균 벡터와 코사인 유사도가 가장 높은 감정
+    - 태그: 해당 감정의 emotion_tag_mapping 중 일지와 가장 가까운 2개
+    최고 유사도가 min_similarity보다 낮거나 1·2위 차이가 min_margin보다 작으면
+    확신이 낮다고 보고 기존 LLM 체인(emotion_llm_chain)으로 fallback 합니다.
+    """
+
+    def __init__(
+        self,
+        embeddings=c_embedding_model,
+        min_similarity: float = EMOTION_MIN_SIMILARITY,
+        min_margin: float = EMOTION_MIN_MARGIN,
+        enabled: bool = EMOTION_CLASSIFIER_ENABLED
+    ):
+        self.embeddings = embeddings
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._prototypes: Optional[np.ndarray] = None
+        self._tag_vectors: dict[str, np.ndarray] = {}
+
+        # ✅ 모니터링용 지표 (임계값 조정용으로 평균 유사도 / 차이도 기록)
+        self.classified = 0
+        self.fallback = 0
+        self.failed = 0
+        self._total_top = 0.0
+        self._total_margin = 0.0
+
+    def _ensure_prototypes(self):
+        # prototype / 태그 벡터는 첫 호출 때 한 번만 계산
+        if self._prototypes is not None:
+            return
+        with self._lock:
+            if self._prototypes is not None:
+                return
+            prototypes = []
+            for emotion in emotion_list:
+                vectors = _normalize(np.array(self.embeddings.embed_documents(EMOTION_PROTOTYPES[emotion])))
+                prototypes.append(vectors.mean(axis=0))
+            tags = [tag for emotion in emotion_list for tag in emotion_tag_mapping[emotion]]
+            tag_vectors = _normalize(np.array(self.embeddings.embed_documents([tag.lstrip("#") for tag in tags])))
+            self._tag_vectors = dict(zip(tags, tag_vectors))
+            self._prototypes = _normalize(np.array(prototypes))
+
+    def score(self, diary: str) -> tuple[list[tuple[str, float]], np.ndarray]:
+        """
+        감정별 유사도를 높은 순으로 정렬해 반환합니다. (일지 벡터도 함께 반환)
+        """
+        self._ensure_prototypes()
+        diary_vector = _normalize(np.array(self.embeddings.embed_query(diary)))
+        similarities = self._prototypes @ diary_vector
+        ranked = sorted(zip(emotion_list, similarities.tolist()), key=lambda item: item[1], reverse=True)
+        return ranked, diary_vector
+
+    def classify(self, diary: str) -> Optional[dict]:
+        """
+        임베딩으로 감정을 분류합니다. 확신이 낮거나 실패하면 None을 반환합니다.
+        """
+        if not self.enabled or not diary:
+            return None
+        try:
+            ranked, diary_vector = self.score(diary)
+        except Exception as e:
+            self.failed += 1
+            print(f"⚠️ 임베딩 감정 분류 실패 (LLM으로 대체): {e}")
+            return None
+
+        (emotion, top), (_, second) = ranked[0], ranked[1]
+        margin = top - second
+        self._total_top += top
+        self._total_margin += margin
+        if top < self.min_similarity or margin < self.min_margin:
+            self.fallback += 1
+            print(f"🤔 [EMOTION] 분류 확신 낮음 ({emotion} {top:.3f}, 차이 {margin:.3f}) → LLM 사용")
+            return None
+
+        self.classified += 1
+        tags = sorted(
+            emotion_tag_mapping[emotion],
+            key=lambda tag: float(self._tag_vectors[tag] @ diary_vector),
+            reverse=True
+        )[:TAGS_PER_DIARY]
+        return {"keywords": [emotion], "emotion_tags": tags}
+
+    def invoke(self, inputs: dict) -> dict:
+        return self.classify(inputs["diary"]) or emotion_llm_chain.invoke(inputs)
+
+    async def ainvoke(self, inputs: dict) -> dict:
+        # 임베딩 계산은 GPU/CPU 작업이므로 스레드에서 실행
+        result = await asyncio.to_thread(self.classify, inputs["diary"])
+        return result or await emotion_llm_chain.ainvoke(inputs)
+
+    def stats(self) -> dict:
+        scored = self.classified + self.fallback
+        return {
+            "enabled": self.enabled,
+            "min_similarity": self.min_similarity,
+            "min_margin": self.min_margin,
+            "classified": self.classified,
+            "llm_fallback": self.fallback,
+            "failed": self.failed,
+            "fallback_ratio": round(self.fallback / scored, 4) if scored else 0.0,
+            "avg_top_similarity": round(self._total_top / scored, 4) if scored else 0.0,
+            "avg_margin": round(self._total_margin / scored, 4) if scored else 0.0
+        }
+
+emotion_classifier = EmotionClassifier()
+
+# ✅ 기존 emotion_tag_chain과 같은 입출력({"diary"} → {"keywords", "emotion_tags"})으로 invoke / ainvoke / batch 지원
+emotion_tag_chain = RunnableLambda(emotion_classifier.invoke, afunc=emotion_classifier.ainvoke)
@@ -1,4 +1,5 @@
 from typing import TypedDict
+from functools import lru_cache
 import pandas as pd
 import random
 from concurrent.futures import ThreadPoolExecutor
@@ -8,7 +9,12 @@ from langchain_core.output_parsers import StrOutputParser
 from app.models.models import diary_llm as llm
 from app.api.diary.rag import rag_chain, get_mbti_style, get_mbti_style_cached
 from app.utils.agent_tools import retrieve_mbti_style_from_web
-from app.api.diary.prompt_diary import prompt_template, emotion_tag_chain
+from app.api.diary.prompt_diary import prompt_template
+from app.utils.llm_governor import ModelOverloadedError
+from app.api.diary.emotion_classifier import emotion_tag_chain, emotion_list, emotion_tag_mapping
+from app.api.diary.log_compaction import compact_logs, build_compaction_report, format_log_lines, order_by_ingame_time
+from app.api.diary.diary_context import DiaryRunContext, get_context
+from app.core.config import LOG_COMPACTION_ENABLED
 
 class DiaryState(TypedDict, total=False):
     user_id: str
@@ -20,20 +26,15 @@ class DiaryState(TypedDict, total=False):
     style_context: str
     emotion_tags: list[str]
     emotion_keywords: list[str]
+    compaction_report: dict
+    context: DiaryRunContext
 
-emotion_list = ["고요함", "성취감", "그리움", "연결감", "불안정", "몰입"]
+MBTI_LIST = ["INTP", "ENTP", "INFJ", "ESFJ", "INFP", "ISFP", "ISTJ", "ENFP", "ESTJ", "ISTP", "ESTP", "ISFJ", "ENTJ", "ENFJ", "INTJ", "ESFP"]
+DEFAULT_MBTI = "INTP"
 
-# ✅ 감정 키워드에 따른 연관 해시태그
-emotion_tag_mapping = {
-    "고요함": ["#평온", "#명상", "#안정", "#조용한시간"],
-    "성취감": ["#성장", "#목표달성", "#보람", "#자부심"],
-    "그리움": ["#추억", "#회상", "#기억", "#감정"],
-    "연결감": ["#연대", "#따뜻함", "#교감", "#소속감"],
-    "불안정": ["#불안", "#혼란", "#불확실", "#고민"],
-    "몰입": ["#집중", "#몰두", "#시간가속", "#경험"]
-}
-
-mbti_style_cache = {}
+def resolve_style_mbti(mbti: str) -> str:
+    # 목록에 없는 MBTI는 INTP 어투 사용
+    return mbti if mbti in MBTI_LIST else DEFAULT_MBTI
 
 def prepare_log_node(state: DiaryState) -> DiaryState:
     group = state['group']
@@ -43,27 +44,28 @@ def prepare_log_node(state: DiaryState) -> DiaryState:
         # ✅ 전달받은 date를 그대로 유지
         return state
 
-    sorted_group = group.sort_values(by="timestamp")
-    log_text = "\n".join([
-        f"[{row['ingame_datetime'].strftime('%Y-%m-%d')}] {row['action_type']} - {row['action_name']} @ {row['location']} | detail: {row['detail']}"
-        + (f" (with: {row['with']})" if pd.notna(row['with']) and row['with'] else "")
-        for _, row in sorted_group.iterrows()
-    ])
+    # ✅ 조회 쿼리가 이미 ingame_datetime 순이므로 정렬은 순서가 어긋난 경우에만 수행
+    sorted_group = order_by_ingame_time(group)
+    log_text = "\n".join(format_log_lines(sorted_group))
+
+    # ✅ 연속으로 반복된 행동을 한 줄로 압축해서 프롬프트 길이 절감
+    if LOG_COMPACTION_ENABLED:
+        compacted_text = "\n".join(compact_logs(sorted_group))
+        report = build_compaction_report(log_text, compacted_text)
+        print(f"🗜️ [LOG COMPACTION] {report['raw_lines']}줄 → {report['compacted_lines']}줄, "
+              f"토큰 {report['raw_tokens']} → {report['compacted_tokens']} ({report['saved_tokens']} 절감)")
+        state['compaction_report'] = report
+        log_text = compacted_text
+
     state['log_text'] = log_text
     state['date'] = sorted_group.iloc[0]['ingame_datetime'].strftime('%Y-%m-%d')
     return state
 
 def retrieve_mbti_style_node(state: DiaryState) -> DiaryState:
-    mbti = state.get("mbti", "INFP")
-
-    if mbti in mbti_style_cache:
-        state['style_context'] = mbti_style_cache[mbti]
-    else:
-        rag_result = get_mbti_style(mbti)
-        print(rag_result)
-        mbti_style_cache[mbti] = rag_result
-        state['style_context'] = rag_result
-
+    # ✅ 프롬프트에 실제로 쓰는 어투를 요청당 한 번만 조회 (MBTI별 결과는 get_mbti_style_cached에서 프로세스 캐시)
+    state['style_context'] = get_context(state).get_or_run(
+        "mbti_style", get_mbti_style_cached, resolve_style_mbti(state.get("mbti", DEFAULT_MBTI))
+    )
     return state
 
 # def retrieve_mbti_style_node(state: DiaryState) -> DiaryState:
@@ -95,98 +97,130 @@ def assign_emotion_node(state: DiaryState) -> DiaryState:
     state['emotion_tags'] = emotion_tag_mapping.get(selected_emotion, ["#감정", "#일상"])
     return state
 
-def generate_diary_node_factory(mbti: str):
-    chain = prompt_template | llm | StrOutputParser()
-
-    # 🔄 캐시된 프롬프트 생성
-    prompt_cache = {}
-
-    def node(state: DiaryState) -> DiaryState:
-        try:
-            # 🔄 캐시된 스타일 검색
-            if mbti in prompt_cache:
-                style_context = prompt_cache[mbti]
-            else:
-                style_context = get_mbti_style_cached(mbti)
-                prompt_cache[mbti] = style_context
-
-            # ✅ 프롬프트 생성 최적화 (캐시된 경우 사용)
-            if mbti not in prompt_cache:
-                prompt = f"""
-                너는 감성 일지 생성자야. 유저의 MBTI는 {mbti}이고, 어투는 다음과 같아:
-                {style_context}
-                
-                활동 로그:
-                {state["log_text"]}
-
-                [생성 규칙]
-                1. {mbti} 성향에 맞춰 어투를 유지해.
-                2. 감정 상태에 맞춰 자연스러운 표현을 사용해.
-                3. 감성적이거나 논리적인 표현을 강화해.
-                4. 단순한 문장이 아닌, 깊이 있는 서술로 작성해.
-                """
-                prompt_cache[mbti] = prompt
-            else:
-                prompt = prompt_cache[mbti]
-
-            # 🔄 LLM 호출
-            diary = chain.invoke({
-                "user_id": state["user_id"],
-                "date": state["date"],
-                "log_text": state["log_text"],
-                "mbti": state["mbti"],
-                "style_context": style_context,
-                "emotion_tags": ", ".join(state.get("emotion_tags", [])),
-                "emotion_keywords": ", ".join(state.get("emotion_keywords", []))
-            })
-        except Exception as e:
-            print(f"❌ [ERROR] LLM 호출 중 오류 발생: {e}")
-            diary = "Diary Content"
-        
-        state['diary'] = diary
-        return state
-
-    return node
+# ✅ 체인은 요청마다 만들지 않고 모듈 로드 시 한 번만 구성
+diary_chain = prompt_template | llm | StrOutputParser()
+
+# LLM 호출 실패 시 넣는 기본 본문 (결과 캐시에는 저장하지 않음)
+DIARY_FALLBACK_CONTENT = "Diary Content"
+
+class ThinkTagFilter:
+    """
+    스트리밍 중인 LLM 출력에서 <think>...</think> 구간을 실시간으로 제거합니다.
+    태그가 청크 경계에서 잘려 들어와도 처리할 수 있도록 태그가 될 수 있는 끝부분은 다음 청크까지 보류합니다.
+    """
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+
+    def __init__(self):
+        self.buffer = ""
+        self.in_think = False
+
+    @staticmethod
+    def _partial_tag_length(text: str, tag: str) -> int:
+        # text 끝부분이 tag의 앞부분과 겹치는 최대 길이
+        for length in range(min(len(text), len(tag) - 1), 0, -1):
+            if text.endswith(tag[:length]):
+                return length
+        return 0
+
+    def feed(self, chunk: str) -> str:
+        self.buffer += chunk
+        output = []
+        while True:
+            tag = self.CLOSE_TAG if self.in_think else self.OPEN_TAG
+            idx = self.buffer.find(tag)
+            if idx >= 0:
+                if not self.in_think:
+                    output.append(self.buffer[:idx])
+                else:
+                    print(f"🛠️ <think> 태그 발견: {self.buffer[:idx][:50]}... → 삭제 처리합니다.")
+                self.buffer = self.buffer[idx + len(tag):]
+                self.in_think = not self.in_think
+                continue
+
+            keep = self._partial_tag_length(self.buffer, tag)
+            emit, self.buffer = self.buffer[:len(self.buffer) - keep], self.buffer[len(self.buffer) - keep:]
+            if not self.in_think:
+                output.append(emit)
+            return "".join(output)
+
+    def flush(self) -> str:
+        # 닫히지 않은 <think> 구간은 버림
+        rest = "" if self.in_think else self.buffer
+        self.buffer = ""
+        return rest
+
+def strip_think_tags(text: str) -> str:
+    """
+    완성된 LLM 출력에서 모든 <think>...</think> 구간을 제거합니다.
+    """
+    think_filter = ThinkTagFilter()
+    return think_filter.feed(text) + think_filter.flush()
+
+def build_diary_prompt_inputs(state: DiaryState) -> dict:
+    """
+    state로 일지 프롬프트 변수를 만듭니다. (목록에 없는 MBTI는 INTP 어투 사용)
+    """
+    mbti = state.get("mbti", DEFAULT_MBTI)
+    return {
+        "user_id": state["user_id"],
+        "date": state["date"],
+        "log_text": state["log_text"],
+        "mbti": mbti,
+        "style_context": state.get("style_context") or get_mbti_style_cached(resolve_style_mbti(mbti)),
+        "emotion_tags": ", ".join(state.get("emotion_tags", [])),
+        "emotion_keywords": ", ".join(state.get("emotion_keywords", []))
+    }
+
+def generate_diary_node(state: DiaryState) -> DiaryState:
+    """
+    state의 MBTI로 어투를 골라 일지를 생성합니다.
+    (MBTI별 노드 16개 대신 하나의 노드가 state["mbti"]를 보고 처리)
+    """
+    try:
+        # 🔄 LLM 호출 ("qwen3" 모델 사용 시 출력되는 <think> 구간은 바로 제거)
+        diary = get_context(state).get_or_run(
+            "diary", lambda: strip_think_tags(diary_chain.invoke(build_diary_prompt_inputs(state)))
+        )
+    except ModelOverloadedError:
+        # 과부하 거절은 fallback 일지로 덮지 않고 호출한 쪽(429/503 응답)으로 전달
+        raise
+    except Exception as e:
+        print(f"❌ [ERROR] LLM 호출 중 오류 발생: {e}")
+        diary = DIARY_FALLBACK_CONTENT
+
+    state['diary'] = diary
+    return state
 
 def generate_emotion_info(state: DiaryState) -> DiaryState:
-    result = emotion_tag_chain.invoke({"diary": state["diary"]})
+    result = get_context(state).get_or_run("emotion_tagging", emotion_tag_chain.invoke, {"diary": state["diary"]})
     state["emotion_keywords"] = result.get("keywords", [])
     state["emotion_tags"] = result.get("emotion_tags", [])
     return state
 
-default_diary_node = generate_diary_node_factory("INTP")
-
 def build_diary_graph() -> StateGraph:
-    mbti_list = ["INTP", "ENTP", "INFJ", "ESFJ", "INFP", "ISFP", "ISTJ", "ENFP", "ESTJ", "ISTP", "ESTP", "ISFJ", "ENTJ", "ENFJ", "INTJ", "ESFP"]
-
     builder = StateGraph(DiaryState)
     builder.add_node("prepare_log", RunnableLambda(prepare_log_node))
     builder.add_node("retrieve_mbti", RunnableLambda(retrieve_mbti_style_node))
     builder.add_node("assign_emotion", RunnableLambda(assign_emotion_node))
-
-    for mbti in mbti_list:
-        builder.add_node(f"generate_diary_{mbti}", RunnableLambda(generate_diary_node_factory(mbti)))
-    builder.add_node("generate_diary_default", RunnableLambda(default_diary_node))
-
+    builder.add_node("generate_diary", RunnableLambda(generate_diary_node))
     builder.add_node("generate_emotion_info", RunnableLambda(generate_emotion_info))
     builder.add_node("output", lambda state: state)
 
     builder.set_entry_point("prepare_log")
     builder.add_edge("prepare_log", "retrieve_mbti")
     builder.add_edge("retrieve_mbti", "assign_emotion")
-
-    def route_by_mbti(state: DiaryState) -> str:
-        node_key = f"generate_diary_{state.get('mbti', 'INTP')}"
-        return node_key if node_key in builder.nodes else "generate_diary_default"
-
-    route_map = {f"generate_diary_{mbti}": f"generate_diary_{mbti}" for mbti in mbti_list}
-    route_map["generate_diary_default"] = "generate_diary_default"
-
-    builder.add_conditional_edges("assign_emotion", route_by_mbti, route_map)
-
-    for node in route_map.values():
-        builder.add_edge(node, "generate_emotion_info")
+    builder.add_edge("assign_emotion", "generate_diary")
+    builder.add_edge("generate_diary", "generate_emotion_info")
     builder.add_edge("generate_emotion_info", "output")
 
     builder.set_finish_point("output")
-    return builder.compile()
\ No newline at end of file
+    return builder.compile()
+
+@lru_cache(maxsize=1)
+def get_diary_graph():
+    """
+    컴파일된 일지 그래프를 반환합니다. 처음 호출될 때 한 번만 컴파일하고 이후 요청에서 공유합니다.
+    (그래프는 상태를 갖지 않으므로 동시 요청에서 같은 객체를 invoke해도 안전)
+    """
+    return build_diary_graph()
@@ -0,0 +1,164 @@
+import re
+import pandas as pd
+from app.utils.action_enum import ActionName
+
+# ✅ ActionName별 압축 규칙
+# - collapse: 연속으로 반복된 같은 행동을 한 줄로 합칠지 여부
+# - group_by_detail: True이면 detail이 같은 경우에만 합침 (False면 detail이 달라도 합치고 목록으로 표시)
+# - max_details: 합친 줄에 표시할 detail 최대 개수
+DEFAULT_RULE = {"collapse": True, "group_by_detail": False, "max_details": 3}
+
+COMPACTION_RULES = {
+    # 하루의 시작/끝, 시간 이벤트는 일지의 흐름을 잡는 기준점이므로 그대로 유지
+    ActionName.START_DAY: {"collapse": False},
+    ActionName.SLEEP: {"collapse": False},
+    ActionName.MORNING: {"collapse": False},
+    ActionName.NOON: {"collapse": False},
+    ActionName.EVENING: {"collapse": False},
+
+    # 반복 작업은 횟수와 시간 범위로 압축
+    ActionName.WATER_CROP: {"collapse": True, "group_by_detail": False, "max_details": 3},
+    ActionName.GROW_CROP: {"collapse": True, "group_by_detail": False, "max_details": 3},
+    ActionName.PROGRESS_COOKING: {"collapse": True, "group_by_detail": False, "max_details": 1},
+    ActionName.CAST_BAIT: {"collapse": True, "group_by_detail": False, "max_details": 1},
+    ActionName.HOOK_BITE: {"collapse": True, "group_by_detail": False, "max_details": 1},
+
+    # 결과물이 중요한 행동은 detail(아이템/요리 이름)이 같을 때만 압축
+    ActionName.HARVEST_CROP: {"collapse": True, "group_by_detail": True},
+    ActionName.FINISH_COOKING: {"collapse": True, "group_by_detail": True},
+    ActionName.FINISH_FISHING: {"collapse": True, "group_by_detail": True},
+    ActionName.CRAFT_ITEM: {"collapse": True, "group_by_detail": True},
+    ActionName.BUY_ITEM: {"collapse": True, "group_by_detail": True},
+    ActionName.SELL_ITEM: {"collapse": True, "group_by_detail": True},
+}
+
+def get_rule(action_name: str) -> dict:
+    rule = COMPACTION_RULES.get(action_name)
+    if rule is None:
+        try:
+            rule = COMPACTION_RULES.get(ActionName(action_name), {})
+        except ValueError:
+            rule = {}
+    return {**DEFAULT_RULE, **rule}
+
+def estimate_tokens(text: str) -> int:
+    """
+    프롬프트 토큰 수 추정치 (한글 1글자, 영단어/숫자 1묶음, 기호 1개를 각각 1토큰으로 계산)
+    모델별 토크나이저와 정확히 같지는 않지만 압축 전후 비교용으로 사용합니다.
+    """
+    return len(re.findall(r"[가-힣]|[A-Za-z0-9_]+|[^\s\w]", text))
+
+def _clean(value) -> str:
+    return "" if value is None or (isinstance(value, float) and pd.isna(value)) else str(value)
+
+def _format_line(run: list, rule: dict) -> str:
+    first, last = run[0], run[-1]
+    line = f"[{first.ingame_datetime.strftime('%Y-%m-%d')}] {first.action_type} - {first.action_name}"
+
+    if len(run) == 1:
+        line += f" @ {first.location} | detail: {first.detail}"
+    else:
+        time_range = f"{first.ingame_datetime.strftime('%H:%M')}–{last.ingame_datetime.strftime('%H:%M')}"
+        line += f" ×{len(run)} @ {first.location} {time_range}"
+
+        details = list(dict.fromkeys(d for d in (_clean(r.detail) for r in run) if d))
+        if details:
+            shown = details[:rule["max_details"]]
+            rest = len(details) - len(shown)
+            line += " | detail: " + ", ".join(shown) + (f" 외 {rest}건" if rest > 0 else "")
+
+    with_ = _clean(first.with_)
+    if with_:
+        line += f" (with: {with_})"
+    return line
+
+# ✅ 압축하지 않은 로그 한 줄 형식 (행마다 f-string을 새로 만들지 않도록 미리 만들어 둔 템플릿)
+LOG_LINE_TEMPLATE = "[{}] {} - {} @ {} | detail: {}".format
+
+def order_by_ingame_time(logs: pd.DataFrame) -> pd.DataFrame:
+    """
+    로그를 인게임 시각 순으로 정렬합니다.
+    조회 쿼리가 이미 ingame_datetime 순으로 가져오므로 정렬되어 있으면 그대로 반환합니다.
+    """
+    if logs.empty or logs["ingame_datetime"].is_monotonic_increasing:
+        return logs
+    return logs.sort_values(by="ingame_datetime", kind="stable")
+
+def format_dates(values) -> list[str]:
+    """
+    datetime 배열을 'YYYY-MM-DD' 문자열 목록으로 변환합니다.
+    strftime은 느리므로 같은 날짜는 한 번만 변환합니다. (하루치 로그는 대부분 같은 날짜)
+    """
+    cache = {}
+    def to_date_text(value) -> str:
+        day = value.date()
+        text = cache.get(day)
+        if text is None:
+            text = cache[day] = value.strftime('%Y-%m-%d')
+        return text
+    return list(map(to_date_text, values))
+
+def format_log_lines(logs: pd.DataFrame) -> list[str]:
+    """
+    로그를 압축 없이 한 줄씩 프롬프트 형식으로 변환합니다. (iterrows 대신 컬럼 배열 단위로 처리)
+    예: "[0001-01-01] FARMING - water_crop @ farm | detail: 당근 (with: npc)"
+    """
+    if logs.empty:
+        return []
+    lines = list(map(
+        LOG_LINE_TEMPLATE,
+        format_dates(logs["ingame_datetime"].tolist()),
+        logs["action_type"].to_numpy(),
+        logs["action_name"].to_numpy(),
+        logs["location"].to_numpy(),
+        logs["detail"].to_numpy()
+    ))
+
+    # 동행(with)이 있는 행에만 덧붙임 (None / NaN / 빈 문자열 제외)
+    with_ = logs["with"]
+    with_values = with_.to_numpy()
+    for i in (with_.notna() & with_.astype(bool)).to_numpy().nonzero()[0]:
+        lines[i] += f" (with: {with_values[i]})"
+    return lines
+
+def compact_logs(logs: pd.DataFrame) -> list[str]:
+    """
+    시간순으로 정렬된 로그에서 연속으로 반복된 같은 행동을 한 줄로 합칩니다.
+    같은 행동 / 장소 / 동행이면 같은 묶음으로 보고, 규칙에 따라 detail 일치 여부도 확인합니다.
+    예: "[0001-01-01] FARMING - water_crop ×37 @ farm 06:00–09:30 | detail: 당근, 감자"
+    """
+    lines = []
+    run = []
+    run_key = None
+    run_rule = None
+
+    for row in logs.rename(columns={"with": "with_"}).itertuples(index=False):
+        rule = get_rule(row.action_name)
+        key = (row.action_type, row.action_name, row.location, _clean(row.with_))
+        if rule["group_by_detail"]:
+            key += (_clean(row.detail),)
+
+        if run and rule["collapse"] and key == run_key:
+            run.append(row)
+            continue
+
+        if run:
+            lines.append(_format_line(run, run_rule))
+        run, run_key, run_rule = [row], (key if rule["collapse"] else None), rule
+
+    if run:
+        lines.append(_format_line(run, run_rule))
+    return lines
+
+def build_compaction_report(raw_text: str, compacted_text: str) -> dict:
+    raw_tokens = estimate_tokens(raw_text)
+    compacted_tokens = estimate_tokens(compacted_text)
+    saved = raw_tokens - compacted_tokens
+    return {
+        "raw_lines": raw_text.count("\n") + 1 if raw_text else 0,
+        "compacted_lines": compacted_text.count("\n") + 1 if compacted_text else 0,
+        "raw_tokens": raw_tokens,
+        "compacted_tokens": compacted_tokens,
+        "saved_tokens": saved,
+        "saved_ratio": round(saved / raw_tokens, 3) if raw_tokens else 0.0
+    }
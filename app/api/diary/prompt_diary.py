@@ -31,7 +31,8 @@ prompt_template = ChatPromptTemplate.from_template("""
 7. 일지 분량은 200 토큰 이내로만 작성해.
 """)
 
-emotion_tag_chain = (
+# ✅ 감정 키워드/태그 LLM 체인 (emotion_classifier에서 임베딩 분류의 확신이 낮을 때만 사용)
+emotion_llm_chain = (
     ChatPromptTemplate.from_template(
         """
         아래는 사용자가 작성한 감성 일지입니다:
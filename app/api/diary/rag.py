@@ -1,10 +1,8 @@
 import os
-from langchain.chains import RetrievalQA
-from langchain_community.vectorstores import FAISS
-from langchain_chroma import Chroma
-from langchain_community.document_loaders import TextLoader
 from app.models.models import diary_llm, embedding_model, c_embedding_model
+from app.models.registry import model_registry
 from functools import lru_cache
+from app.utils.single_flight import single_flight
 
 CURRENT_FILE_DIR = os.path.dirname(os.path.abspath(__file__))
 MBTI_STYLE_PATH = os.path.abspath(os.path.join(CURRENT_FILE_DIR, "../../../static/mbti_styles.txt"))
@@ -23,11 +21,19 @@ os.makedirs(CHROMA_DB_DIR, exist_ok=True)
 index_file = os.path.join(FAISS_DB_DIR, "index.faiss")
 store_file = os.path.join(FAISS_DB_DIR, "index.pkl")
 
-# 🔄 문서 로딩 & 분리
-if os.path.exists(index_file) and os.path.exists(store_file):
-    vectorstore = FAISS.load_local(FAISS_DB_DIR, embedding_model, allow_dangerous_deserialization=True)
-    chroma_store = Chroma(persist_directory=CHROMA_DB_DIR, embedding_function=c_embedding_model)
-else:
+def _load_vector_stores() -> dict:
+    """
+    FAISS / Chroma 벡터스토어를 로드하거나 MBTI 스타일 문서로 새로 만듭니다. (첫 어투 조회 때 한 번 실행)
+    """
+    from langchain_community.vectorstores import FAISS
+    from langchain_chroma import Chroma
+
+    # 🔄 문서 로딩 & 분리
+    if os.path.exists(index_file) and os.path.exists(store_file):
+        vectorstore = FAISS.load_local(FAISS_DB_DIR, embedding_model, allow_dangerous_deserialization=True)
+        chroma_store = Chroma(persist_directory=CHROMA_DB_DIR, embedding_function=c_embedding_model)
+        return {"vectorstore": vectorstore, "chroma_store": chroma_store}
+
     # 🔄 텍스트 파일 읽기
     with open(MBTI_STYLE_PATH, 'r', encoding='utf-8') as f:
         raw_text = f.read()
@@ -60,22 +66,32 @@ else:
     vectorstore = FAISS.from_documents(documents, embedding_model)
     vectorstore.save_local(FAISS_DB_DIR)
 
-        # 🔄 Chroma 저장 (✅ 추가됨)
+    # 🔄 Chroma 저장 (✅ 추가됨)
     chroma_store = Chroma.from_documents(documents, c_embedding_model, persist_directory=CHROMA_DB_DIR)
     chroma_store.persist()
+    return {"vectorstore": vectorstore, "chroma_store": chroma_store}
+
+_vector_stores = model_registry.register("mbti_vector_stores", _load_vector_stores)
+
+def get_vectorstore():
+    return _vector_stores.get()["vectorstore"]
+
+def get_chroma_store():
+    return _vector_stores.get()["chroma_store"]
 
-# 🔎 retriever 생성
-retriever = vectorstore.as_retriever()
-c_retriever = chroma_store.as_retriever()
+def _build_rag_chain():
+    # 🧠 RAG 체인 구성 (🔎 FAISS retriever 사용)
+    from langchain.chains import RetrievalQA
+    return RetrievalQA.from_chain_type(
+        llm=diary_llm,
+        retriever=get_vectorstore().as_retriever(),
+        return_source_documents=False
+    )
 
-# 🧠 RAG 체인 구성
-rag_chain = RetrievalQA.from_chain_type(
-    llm=diary_llm,
-    retriever=retriever,
-    return_source_documents=False
-)
+rag_chain = model_registry.lazy("mbti_rag_chain", _build_rag_chain)
 
-# ✅ RAG 체인 호출 함수 생성
+# ✅ RAG 체인 호출 함수 생성 (같은 MBTI로 동시에 들어온 조회는 한 번만 실행)
+@single_flight("get_mbti_style")
 def get_mbti_style(mbti: str) -> str:
     # 🔄 정확한 키워드로 검색
     query = f"{mbti} 스타일의 어투와 표현 방식"
@@ -3,7 +3,6 @@ import json
 import os
 from app.utils.image_helper import run_captioning
 from app.utils.log_helper import convert_path_to_url, to_relative_screenshot_path
-from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 from app.models.models import embedding_model
 
@@ -36,19 +35,21 @@ def save_embedding_to_cache(path: str, caption: str, embedding: list):
     except Exception as e:
         print(f"⚠️ 캐시 저장 실패: {e}")
 
-def select_best_screenshot(diary_text: str, screenshot_paths: list[str]) -> str:
-    if not screenshot_paths:
-        return to_relative_screenshot_path("static/screenshot/default.png")
+def get_screenshot_paths(group) -> list[str]:
+    """
+    로그 DataFrame에서 중복 없는 스크린샷 상대 경로 목록을 추출합니다.
+    """
+    screenshot_paths = group['screenshot'].dropna().unique().tolist()
+    return [to_relative_screenshot_path(path) for path in screenshot_paths if path]
 
+def prepare_screenshot_embeddings(screenshot_paths: list[str]) -> list[tuple[str, list]]:
+    """
+    후보 스크린샷의 캡션 임베딩을 준비합니다. (캐시가 없으면 캡셔닝 후 임베딩)
+    일지 본문과 무관하므로 일지 생성과 동시에 미리 실행할 수 있습니다.
+    """
     valid_paths = [p for p in screenshot_paths if os.path.exists(p)]
-    if not valid_paths:
-        return to_relative_screenshot_path("static/screenshot/default.png")
-
-    diary_embedding = model.embed_query(diary_text)
-
-    best_score = -1
-    best_path = None
 
+    candidates = []
     for path in valid_paths:
         caption, cached_embedding = get_cached_embedding(path)
 
@@ -63,6 +64,22 @@ def select_best_screenshot(diary_text: str, screenshot_paths: list[str]) -> str:
         else:
             caption_embedding = cached_embedding
 
+        candidates.append((path, caption_embedding))
+    return candidates
+
+def score_screenshots(diary_text: str, candidates: list[tuple[str, list]]) -> str:
+    """
+    일지 본문 임베딩과 가장 유사한 캡션의 스크린샷 URL을 반환합니다. (후보가 없으면 기본 이미지)
+    """
+    if not candidates:
+        return to_relative_screenshot_path("static/screenshot/default.png")
+
+    diary_embedding = model.embed_query(diary_text)
+
+    best_score = -1
+    best_path = None
+
+    for path, caption_embedding in candidates:
         try:
             score = cosine_similarity([diary_embedding], [caption_embedding])[0][0]
         except Exception as e:
@@ -77,3 +94,8 @@ def select_best_screenshot(diary_text: str, screenshot_paths: list[str]) -> str:
         return convert_path_to_url(best_path)
     else:
         return to_relative_screenshot_path("static/screenshot/default.png")
+
+def select_best_screenshot(diary_text: str, screenshot_paths: list[str]) -> str:
+    if not screenshot_paths:
+        return to_relative_screenshot_path("static/screenshot/default.png")
+    return score_screenshots(diary_text, prepare_screenshot_embeddings(screenshot_paths))
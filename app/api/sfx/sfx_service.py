@@ -70,5 +70,7 @@ def generate_sfx_with_translation(prompt: str, duration: float = None, prompt_in
             "filename": os.path.basename(unique_file_path)  
         }
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
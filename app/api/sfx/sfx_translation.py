@@ -1,6 +1,8 @@
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from app.models.models import sfx_llm
+from app.utils.single_flight import single_flight
+from app.utils.semantic_cache import semantic_cached
 import re
 
 # ✅ 프롬프트 템플릿 정의
@@ -18,9 +20,13 @@ Rule:
 # ✅ LangChain을 이용한 번역 체인 생성
 translate_chain = translate_prompt | sfx_llm | StrOutputParser()
 
+@semantic_cached("translate_to_english")
+@single_flight("translate_to_english")
 def translate_to_english(korean_text: str) -> str:
     """
     한글 텍스트를 영어로 번역합니다.
+    의미가 거의 같은 이전 입력의 번역이 있으면 재사용하고,
+    같은 문장으로 동시에 들어온 요청은 한 번만 번역하고 결과를 공유합니다.
     """
     # ✅ 1️⃣ 번역 실행
     result = translate_chain.invoke({
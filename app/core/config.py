@@ -13,6 +13,13 @@ POSTGRES_PORT = os.getenv("POSTGRES_PORT")
 
 # ✅ PostgreSQL URI 생성
 POSTGRESQL_URI = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+POSTGRESQL_ASYNC_URI = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+
+# ✅ DB 커넥션 풀 설정
+PG_POOL_SIZE = int(os.getenv("PG_POOL_SIZE", "10"))
+PG_MAX_OVERFLOW = int(os.getenv("PG_MAX_OVERFLOW", "20"))
+PG_POOL_TIMEOUT = int(os.getenv("PG_POOL_TIMEOUT", "30"))
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
 
 # ✅ MongoDB DB 설정
 MONGO_URI = os.getenv("MONGO_URI")
@@ -34,4 +41,91 @@ OUTPUT_DIR = os.getenv("OUTPUT_DIR")
 OUTPUT_3D_DIR = os.path.join(OUTPUT_DIR, "3D")
 MVADAPTER_SERVER = os.getenv("MVADAPTER_SERVER")
 HY3D_SERVER = os.getenv("HY3D_SERVER")
-PROMPT_CONVERT_API = os.getenv("PROMPT_CONVERT_API")
\ No newline at end of file
+PROMPT_CONVERT_API = os.getenv("PROMPT_CONVERT_API")
+# ✅ 로그 write-behind 버퍼 설정
+LOG_BUFFER_ENABLED = os.getenv("LOG_BUFFER_ENABLED", "false").lower() == "true"
+LOG_BUFFER_MAX_ROWS = int(os.getenv("LOG_BUFFER_MAX_ROWS", "500"))
+LOG_BUFFER_FLUSH_MS = int(os.getenv("LOG_BUFFER_FLUSH_MS", "200"))
+LOG_BUFFER_MAX_QUEUE = int(os.getenv("LOG_BUFFER_MAX_QUEUE", "10000"))
+# flush 실패 시 재시도 횟수 / 첫 재시도 대기(ms, 매번 2배), 끝까지 실패한 행은 dead-letter 파일(JSONL)에 기록
+LOG_BUFFER_MAX_RETRIES = int(os.getenv("LOG_BUFFER_MAX_RETRIES", "3"))
+LOG_BUFFER_RETRY_BACKOFF_MS = int(os.getenv("LOG_BUFFER_RETRY_BACKOFF_MS", "200"))
+LOG_BUFFER_DEAD_LETTER_PATH = os.getenv("LOG_BUFFER_DEAD_LETTER_PATH", "cache/log_dead_letter.jsonl")
+
+# ✅ 로그 Parquet export 설정
+EXPORT_DIR = os.getenv("EXPORT_DIR", "exports/game_logs")
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))
+# id는 INSERT 때 정해지고 commit 때 보이므로, 마지막 id 아래로 이 범위 안의 빈 id는 다음 export에서 다시 확인
+EXPORT_RESCAN_WINDOW = int(os.getenv("EXPORT_RESCAN_WINDOW", "10000"))
+
+# ✅ 일지 프롬프트용 로그 압축 설정
+LOG_COMPACTION_ENABLED = os.getenv("LOG_COMPACTION_ENABLED", "true").lower() == "true"
+
+# ✅ 스크린샷 변형 이미지(썸네일/WebP) 설정
+# 업로드 시 미리 만들어 둘 변형 목록 ("크기:포맷" 콤마 구분, 비우면 요청 시에만 생성)
+SCREENSHOT_PREGENERATE_VARIANTS = os.getenv("SCREENSHOT_PREGENERATE_VARIANTS", "thumb:webp")
+SCREENSHOT_VARIANT_QUALITY = int(os.getenv("SCREENSHOT_VARIANT_QUALITY", "80"))
+
+# ✅ 일지 생성 비동기 작업 설정 (워커 수 = 동시에 실행되는 GPU/LLM 일지 작업 수)
+DIARY_JOB_WORKERS = int(os.getenv("DIARY_JOB_WORKERS", "2"))
+DIARY_JOB_MAX_QUEUE = int(os.getenv("DIARY_JOB_MAX_QUEUE", "100"))
+DIARY_JOB_TTL_SEC = int(os.getenv("DIARY_JOB_TTL_SEC", "3600"))
+
+# ✅ 감성일지 일괄 생성(배치) 설정
+DIARY_BATCH_CONCURRENCY = int(os.getenv("DIARY_BATCH_CONCURRENCY", "2"))
+DIARY_BATCH_CHUNK_SIZE = int(os.getenv("DIARY_BATCH_CHUNK_SIZE", "20"))
+
+# ✅ 일지 생성 중 독립 단계(어투 조회, 스크린샷 캡션 임베딩) 선행 실행 스레드 수
+DIARY_PREFETCH_WORKERS = int(os.getenv("DIARY_PREFETCH_WORKERS", "4"))
+
+# ✅ 일지 생성 결과 캐시 (로그/MBTI/프롬프트/모델이 같으면 재사용, MongoDB diary_cache 컬렉션)
+DIARY_CACHE_ENABLED = os.getenv("DIARY_CACHE_ENABLED", "true").lower() == "true"
+DIARY_CACHE_TTL_SEC = int(os.getenv("DIARY_CACHE_TTL_SEC", str(7 * 24 * 3600)))
+DIARY_CACHE_MAX_ENTRIES = int(os.getenv("DIARY_CACHE_MAX_ENTRIES", "10000"))
+# 프롬프트 문구 외에 결과가 바뀌는 변경(RAG 문서 교체 등)이 있으면 올려서 기존 캐시 무효화
+DIARY_PROMPT_VERSION = os.getenv("DIARY_PROMPT_VERSION", "1")
+
+# ✅ 임베딩 기반 감정 분류 (유사도/1·2위 차이가 기준보다 낮으면 LLM으로 fallback)
+EMOTION_CLASSIFIER_ENABLED = os.getenv("EMOTION_CLASSIFIER_ENABLED", "true").lower() == "true"
+EMOTION_MIN_SIMILARITY = float(os.getenv("EMOTION_MIN_SIMILARITY", "0.35"))
+EMOTION_MIN_MARGIN = float(os.getenv("EMOTION_MIN_MARGIN", "0.02"))
+
+# ✅ LLM 응답 영구 캐시 (SQLite, temperature가 기준 이하이거나 이름을 지정한 LLM에만 설치)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "cache/llm_cache.sqlite3")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_MAX_TEMPERATURE = float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0.2"))
+LLM_CACHE_MODELS = [name.strip() for name in os.getenv("LLM_CACHE_MODELS", "sfx_llm,comfy_llm,emo_llm").split(",") if name.strip()]
+
+# ✅ 번역 / ComfyUI 변환 의미 기반(근사 중복) 캐시
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+# 근사 적중 중 일부를 백그라운드에서 실제로 다시 실행해 결과가 달라졌는지(false hit) 확인하는 비율
+SEMANTIC_CACHE_AUDIT_RATE = float(os.getenv("SEMANTIC_CACHE_AUDIT_RATE", "0.05"))
+SEMANTIC_CACHE_AUDIT_MIN_SIMILARITY = float(os.getenv("SEMANTIC_CACHE_AUDIT_MIN_SIMILARITY", "0.85"))
+
+# ✅ 시작 시 모델 warm-up / keep-alive (warm-up이 끝나야 /ready가 200)
+MODEL_WARMUP_ENABLED = os.getenv("MODEL_WARMUP_ENABLED", "true").lower() == "true"
+# warm-up 대상: "all"(기본), "ollama"(Ollama 모델만, BLIP / BGE-m3-ko / FAISS는 프로세스에 올리지 않음), 또는 대상 이름 쉼표 구분
+MODEL_WARMUP_TARGETS = [name.strip() for name in os.getenv("MODEL_WARMUP_TARGETS", "all").split(",") if name.strip()]
+# Ollama가 마지막 요청 후 모델을 메모리에 유지하는 시간 (warm-up / keep-alive 호출에 전달)
+MODEL_KEEP_ALIVE = os.getenv("MODEL_KEEP_ALIVE", "30m")
+# 일반 요청은 Ollama 기본값(5분)으로 유지 시간을 덮어쓰므로 주기는 5분보다 짧게
+MODEL_KEEP_ALIVE_INTERVAL_SEC = int(os.getenv("MODEL_KEEP_ALIVE_INTERVAL_SEC", "240"))
+
+# ✅ 무거운 모델(BLIP, BGE-m3-ko)을 이 시간(초) 동안 사용하지 않으면 메모리에서 내림 (0이면 유지)
+MODEL_IDLE_UNLOAD_SEC = int(os.getenv("MODEL_IDLE_UNLOAD_SEC", "0"))
+
+# ✅ Ollama 모델별 동시 실행 제한 / 대기열 (interactive > standard > batch 우선순위)
+LLM_GOVERNOR_ENABLED = os.getenv("LLM_GOVERNOR_ENABLED", "true").lower() == "true"
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "2"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "16"))
+LLM_QUEUE_TIMEOUT_SEC = float(os.getenv("LLM_QUEUE_TIMEOUT_SEC", "60"))
+# 모델별 override, "모델=동시 실행 수/대기열 크기" 쉼표 구분 (예: "gemma3:12b=2/8,qwen3:8b=4/32")
+LLM_MODEL_LIMITS = {
+    model.strip(): tuple(int(value) for value in limits.split("/"))
+    for model, limits in (
+        item.rsplit("=", 1) for item in os.getenv("LLM_MODEL_LIMITS", "").split(",") if item.strip()
+    )
+}
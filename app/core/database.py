@@ -1,27 +1,61 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from pymongo import MongoClient
-from app.core.config import POSTGRESQL_URI, MONGO_URI
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.core.config import (
+    POSTGRESQL_URI, POSTGRESQL_ASYNC_URI, MONGO_URI,
+    PG_POOL_SIZE, PG_MAX_OVERFLOW, PG_POOL_TIMEOUT, MONGO_MAX_POOL_SIZE
+)
 
-# PostgreSQL 엔진 설정
+# PostgreSQL 엔진 설정 (동기: 스레드에서 실행되는 작업용)
 pg_engine = create_engine(
     POSTGRESQL_URI,
-    pool_pre_ping=True
+    pool_pre_ping=True,
+    pool_size=PG_POOL_SIZE,
+    max_overflow=PG_MAX_OVERFLOW,
+    pool_timeout=PG_POOL_TIMEOUT
 )
 PGSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=pg_engine)
 
+# PostgreSQL 비동기 엔진 설정 (async 라우트용)
+pg_async_engine = create_async_engine(
+    POSTGRESQL_ASYNC_URI,
+    pool_pre_ping=True,
+    pool_size=PG_POOL_SIZE,
+    max_overflow=PG_MAX_OVERFLOW,
+    pool_timeout=PG_POOL_TIMEOUT
+)
+AsyncPGSessionLocal = async_sessionmaker(pg_async_engine, autoflush=False, expire_on_commit=False)
+
 # MongoDB 클라이언트 설정
-mongo_client = MongoClient(MONGO_URI)
+mongo_client = MongoClient(MONGO_URI, maxPoolSize=MONGO_MAX_POOL_SIZE)
 mongo_db = mongo_client['isg']
 
+# MongoDB 비동기 클라이언트 설정
+async_mongo_client = AsyncIOMotorClient(MONGO_URI, maxPoolSize=MONGO_MAX_POOL_SIZE)
+async_mongo_db = async_mongo_client['isg']
+
 def get_pg_session():
     """
     PostgreSQL 세션을 생성하여 반환합니다.
     """
     return PGSessionLocal()
 
+def get_async_pg_session():
+    """
+    PostgreSQL 비동기 세션을 생성하여 반환합니다.
+    """
+    return AsyncPGSessionLocal()
+
 def get_mongo_collection(collection_name):
     """
     MongoDB 컬렉션을 반환합니다.
     """
     return mongo_db[collection_name]
+
+def get_async_mongo_collection(collection_name):
+    """
+    MongoDB 비동기(motor) 컬렉션을 반환합니다.
+    """
+    return async_mongo_db[collection_name]
@@ -0,0 +1,146 @@
+"""
+game_logs 테이블 스키마 마이그레이션 도구
+
+사용법:
+    python -m app.core.migrate            # 마이그레이션 실행
+    python -m app.core.migrate --dry-run  # 실행할 SQL만 출력
+
+수행 내용:
+    1. timestamp / ingame_datetime 컬럼이 문자열이면 timestamp 타입으로 변환
+       ('YYYY.MM.DD-HH.MM.SS' 형식과 'YYYY-MM-DD HH:MM:SS' 형식 모두 지원)
+    2. ingame_datetime에서 계산되는 ingame_date 컬럼 추가 (기존 행 자동 backfill)
+    3. (session_id, user_id, ingame_date) 복합 인덱스를 CONCURRENTLY로 생성
+    4. daily_activity_summary 테이블이 없으면 생성하고 기존 로그로 backfill
+"""
+import argparse
+from sqlalchemy import text, select, asc, inspect
+from sqlalchemy.orm import Session
+from app.core.database import pg_engine
+from app.models.models import UserLog, DailyActivitySummary
+from app.utils.summary_helper import summarize_rows, merge_delta, new_summary_row
+
+TABLE_NAME = "game_logs"
+INDEX_NAME = "ix_game_logs_session_user_date"
+TIMESTAMP_COLUMNS = ["timestamp", "ingame_datetime"]
+TEXT_TYPES = ("text", "character varying")
+SUMMARY_BACKFILL_CHUNK = 5000
+
+def get_column_types(conn) -> dict:
+    rows = conn.execute(text("""
+        SELECT column_name, data_type
+        FROM information_schema.columns
+        WHERE table_name = :table
+    """), {"table": TABLE_NAME}).all()
+    return {name: data_type for name, data_type in rows}
+
+def convert_to_timestamp_sql(column: str) -> str:
+    return f"""
+        ALTER TABLE {TABLE_NAME}
+        ALTER COLUMN "{column}" TYPE timestamp
+        USING (
+            CASE
+                WHEN "{column}" IS NULL OR "{column}" = '' THEN NULL
+                WHEN "{column}" ~ '^\\d{{4}}\\.\\d{{2}}\\.\\d{{2}}-'
+                    THEN to_timestamp("{column}", 'YYYY.MM.DD-HH24.MI.SS')::timestamp
+                ELSE "{column}"::timestamp
+            END
+        )
+    """
+
+ADD_INGAME_DATE_SQL = f"""
+    ALTER TABLE {TABLE_NAME}
+    ADD COLUMN ingame_date date GENERATED ALWAYS AS (CAST(ingame_datetime AS date)) STORED
+"""
+
+CREATE_INDEX_SQL = f"""
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME}
+    ON {TABLE_NAME} (session_id, user_id, ingame_date)
+"""
+
+def plan_migration(column_types: dict) -> list[str]:
+    """
+    현재 컬럼 상태를 보고 실행할 SQL 목록을 만듭니다. (이미 적용된 단계는 건너뜀)
+    """
+    statements = []
+    for column in TIMESTAMP_COLUMNS:
+        if column_types.get(column) in TEXT_TYPES:
+            statements.append(convert_to_timestamp_sql(column))
+    if "ingame_date" not in column_types:
+        statements.append(ADD_INGAME_DATE_SQL)
+    return statements
+
+def backfill_daily_summary(chunk_size: int = SUMMARY_BACKFILL_CHUNK):
+    """
+    기존 game_logs를 (session_id, user_id, ingame_date) 순서로 읽으면서
+    daily_activity_summary를 채웁니다. 키가 바뀔 때마다 한 행씩 저장합니다.
+    """
+    stmt = (
+        select(UserLog)
+        .order_by(asc(UserLog.session_id), asc(UserLog.user_id), asc(UserLog.ingame_date), asc(UserLog.ingame_datetime))
+        .execution_options(yield_per=chunk_size)
+    )
+    written = 0
+    with Session(pg_engine) as read_db, Session(pg_engine) as write_db:
+        current_key = None
+        pending = []
+
+        def flush():
+            nonlocal written
+            for key, delta in summarize_rows(pending).items():
+                summary = new_summary_row(key)
+                merge_delta(summary, delta, replace=True)
+                write_db.add(summary)
+                written += 1
+            if written and written % 1000 == 0:
+                write_db.commit()
+                print(f"🛠️ [MIGRATE] daily_activity_summary {written}행 backfill")
+
+        for log in read_db.scalars(stmt):
+            key = (log.session_id, log.user_id, log.ingame_date)
+            if key != current_key and pending:
+                flush()
+                pending = []
+            current_key = key
+            pending.append(log)
+            read_db.expunge(log)
+        if pending:
+            flush()
+        write_db.commit()
+    print(f"✅ [MIGRATE] daily_activity_summary backfill 완료 ({written}행)")
+
+def migrate(dry_run: bool = False):
+    with pg_engine.begin() as conn:
+        column_types = get_column_types(conn)
+        if not column_types:
+            raise RuntimeError(f"{TABLE_NAME} 테이블을 찾을 수 없습니다.")
+
+        statements = plan_migration(column_types)
+        for sql in statements:
+            print(f"🛠️ [MIGRATE] {' '.join(sql.split())}")
+            if not dry_run:
+                conn.execute(text(sql))
+
+    # ✅ CREATE INDEX CONCURRENTLY는 트랜잭션 밖에서 실행해야 함
+    print(f"🛠️ [MIGRATE] {' '.join(CREATE_INDEX_SQL.split())}")
+    if not dry_run:
+        with pg_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(CREATE_INDEX_SQL))
+            conn.execute(text(f"ANALYZE {TABLE_NAME}"))
+
+    # ✅ 일일 활동 요약 테이블 생성 + backfill
+    if not inspect(pg_engine).has_table(DailyActivitySummary.__tablename__):
+        print(f"🛠️ [MIGRATE] CREATE TABLE {DailyActivitySummary.__tablename__} + backfill")
+        if not dry_run:
+            DailyActivitySummary.__table__.create(pg_engine)
+            backfill_daily_summary()
+
+    if dry_run:
+        print("ℹ️ [MIGRATE] dry-run 모드: 실제로 실행하지 않았습니다.")
+    else:
+        print("✅ [MIGRATE] game_logs 마이그레이션 완료")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="game_logs 스키마 마이그레이션")
+    parser.add_argument("--dry-run", action="store_true", help="실행할 SQL만 출력")
+    args = parser.parse_args()
+    migrate(dry_run=args.dry_run)
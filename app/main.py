@@ -1,8 +1,52 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from app.routes import diary_router, mbti_router, log_router, etc_router
+from app.core.config import LOG_BUFFER_ENABLED
+from app.utils.log_buffer import log_buffer
+from app.core.database import pg_async_engine, async_mongo_client
+from app.api.diary.graph import get_diary_graph
+from app.api.diary.diary_jobs import diary_job_manager
+from app.utils.model_warmup import model_warmup
+from app.models.registry import model_registry
 from fastapi.staticfiles import StaticFiles
 
-app = FastAPI(root_path = "/service2")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # ✅ 일지 그래프는 시작 시 한 번만 컴파일하고 모든 요청에서 공유
+    get_diary_graph()
+
+    # ✅ 모델 warm-up / keep-alive 시작 (백그라운드, 끝나기 전까지 /ready는 503)
+    await model_warmup.start()
+
+    # ✅ 유휴 모델 언로드 (MODEL_IDLE_UNLOAD_SEC > 0일 때만)
+    await model_registry.start()
+
+    # ✅ 일지 생성 작업 워커 시작
+    await diary_job_manager.start()
+
+    # ✅ 로그 write-behind 버퍼 시작 / 종료 시 남은 로그 flush
+    if LOG_BUFFER_ENABLED:
+        await log_buffer.start()
+    yield
+    await model_warmup.stop()
+    await model_registry.stop()
+    await diary_job_manager.stop()
+    await log_buffer.stop()
+
+    # ✅ 비동기 DB 커넥션 풀 정리
+    await pg_async_engine.dispose()
+    async_mongo_client.close()
+
+app = FastAPI(root_path = "/service2", lifespan=lifespan)
+
+@app.get("/ready")
+async def ready():
+    """
+    모든 모델 warm-up이 끝났으면 200, 아니면 503 (로드밸런서 / 배포 readiness 체크용)
+    """
+    stats = model_warmup.stats()
+    return JSONResponse(status_code=200 if stats["ready"] else 503, content=stats)
 
 app.mount("/service2/static", StaticFiles(directory="static"), name="static")
 
@@ -16,4 +60,4 @@ app.include_router(diary_router, prefix="/diary", tags=["감성일지"])
 app.include_router(mbti_router, prefix="/mbti", tags=["MBTI"])
 
 # 기타 API 라우터 등록
-app.include_router(etc_router, prefix="/etc", tags=["기타"])
\ No newline at end of file
+app.include_router(etc_router, prefix="/etc", tags=["기타"])
@@ -1,12 +1,14 @@
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Date, Computed, Index, JSON, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from langchain_ollama import ChatOllama, OllamaEmbeddings
-from transformers import BlipProcessor, BlipForConditionalGeneration
 from functools import lru_cache
 from langchain_openai import ChatOpenAI
 from app.core.config import OPENAI_API_KEY
+from app.utils.llm_cache import install_llm_cache
+from app.utils.llm_governor import get_governor
 from app.utils.embedding_wrapper import LangchainEmbeddingWrapper # 허깅페이스 임베딩모델로 수정할때 사용 
-import torch
+from app.models.registry import model_registry
 
 Base = declarative_base()
 
@@ -17,8 +19,10 @@ class UserLog(Base):
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(String)
     user_id = Column(String)
-    timestamp = Column(String)
-    ingame_datetime = Column(String)
+    timestamp = Column(DateTime)
+    ingame_datetime = Column(DateTime)
+    # ✅ 인게임 날짜 (ingame_datetime에서 DB가 자동 계산, 일자별 조회용)
+    ingame_date = Column(Date, Computed("CAST(ingame_datetime AS DATE)", persisted=True))
     location = Column(String)
     action_type = Column(String)
     action_name = Column(String)
@@ -26,6 +30,10 @@ class UserLog(Base):
     with_ = Column("with_", String)
     screenshot = Column(String)
 
+    __table_args__ = (
+        Index("ix_game_logs_session_user_date", "session_id", "user_id", "ingame_date"),
+    )
+
 
 class UserMBTI(Base):
     __tablename__ = "users"
@@ -51,31 +59,100 @@ class Diary(Base):
     emotion_tags = Column(String, nullable=True)
     emotion_keywords = Column(String, nullable=True)
 
+
+# ✅ PostgreSQL에서는 JSONB로 저장
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+class DailyActivitySummary(Base):
+    """
+    (session_id, user_id, ingame_date)별 활동 요약. 로그 저장 시 증분 갱신됩니다.
+    """
+    __tablename__ = "daily_activity_summary"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(String, nullable=False)
+    user_id = Column(String, nullable=False)
+    ingame_date = Column(Date, nullable=False)
+    log_count = Column(Integer, nullable=False, default=0)
+    action_type_counts = Column(JSONType, nullable=False, default=dict)   # {"FARMING": 12, ...}
+    action_name_counts = Column(JSONType, nullable=False, default=dict)   # {"water_crop": 9, ...}
+    locations = Column(JSONType, nullable=False, default=list)            # 처음 방문한 순서
+    companions = Column(JSONType, nullable=False, default=list)           # with_ 목록
+    screenshots = Column(JSONType, nullable=False, default=list)
+    first_ingame_datetime = Column(DateTime, nullable=True)
+    last_ingame_datetime = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("session_id", "user_id", "ingame_date", name="uq_daily_activity_summary_key"),
+    )
+
+class GovernedChatOllama(ChatOllama):
+    """
+    실제 모델 실행(_generate / _stream 및 async 버전)을 Ollama 모델별 동시 실행 제한(llm_governor) 안에서 합니다.
+    응답 캐시 적중은 실행 전에 처리되므로 슬롯을 쓰지 않습니다.
+    """
+
+    def _generate(self, *args, **kwargs):
+        with get_governor(self.model).slot():
+            return super()._generate(*args, **kwargs)
+
+    async def _agenerate(self, *args, **kwargs):
+        async with get_governor(self.model).aslot():
+            return await super()._agenerate(*args, **kwargs)
+
+    def _stream(self, *args, **kwargs):
+        with get_governor(self.model).slot():
+            yield from super()._stream(*args, **kwargs)
+
+    async def _astream(self, *args, **kwargs):
+        async with get_governor(self.model).aslot():
+            async for chunk in super()._astream(*args, **kwargs):
+                yield chunk
+
 # ✅ 필요 시 캐싱된 LLM 접근 (동일 모델 호출 최적화용, 사용자가 원하는 경우에만 사용)
 @lru_cache(maxsize=10)
 def get_llm(model_name: str, temperature: float = 0.7) -> ChatOllama:
-    return ChatOllama(model=model_name, temperature=temperature)
+    return GovernedChatOllama(model=model_name, temperature=temperature)
 
 # ✅ 메모리 절약 + 기존 코드 호환
 llm_question = get_llm("gemma3:12b", temperature=0.7)
 llm_evaluator = get_llm("qwen3:8b", temperature=0.7)
 # diary_llm = ChatOpenAI(model_name="gpt-4o-mini", temperature=1.0)
-diary_llm = ChatOllama(model="gemma3:12b", temperature=1.0)
+diary_llm = GovernedChatOllama(model="gemma3:12b", temperature=1.0)
 emo_llm = get_llm("gemma3:12b", temperature=0.2)
 sfx_llm = get_llm("qwen3:8b", temperature=0.2)
 comfy_llm = get_llm("qwen3:8b", temperature=0.2)
 
-# ✅ 텍스트 임베딩
+# ✅ 같은 입력이 반복되는 낮은 temperature LLM(번역, 감정 태그)에만 SQLite 응답 캐시 설치
+for _name, _llm in {
+    "llm_question": llm_question, "llm_evaluator": llm_evaluator, "diary_llm": diary_llm,
+    "emo_llm": emo_llm, "sfx_llm": sfx_llm, "comfy_llm": comfy_llm
+}.items():
+    install_llm_cache(_name, _llm)
+
+# ✅ 텍스트 임베딩 (BGE-m3-ko는 첫 임베딩 호출 때 로드)
 c_embedding_model = LangchainEmbeddingWrapper("dragonkue/BGE-m3-ko")
 embedding_model = OllamaEmbeddings(model="nomic-embed-text:latest")
 
-# ✅ 이미지 처리 모델 
-image_processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-base", use_fast=True)
-caption_model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-base").to("cuda" if torch.cuda.is_available() else "cpu")
+# ✅ 이미지 처리 모델 (import 시점이 아니라 첫 캡션 생성 때 로드)
+BLIP_MODEL_NAME = "Salesforce/blip-image-captioning-base"
+
+def _load_image_processor():
+    from transformers import BlipProcessor
+    return BlipProcessor.from_pretrained(BLIP_MODEL_NAME, use_fast=True)
+
+def _load_caption_model():
+    import torch
+    from transformers import BlipForConditionalGeneration
+    return BlipForConditionalGeneration.from_pretrained(BLIP_MODEL_NAME).to("cuda" if torch.cuda.is_available() else "cpu")
+
+image_processor = model_registry.lazy("image_processor", _load_image_processor)
+caption_model = model_registry.lazy("caption_model", _load_caption_model, idle_unload=True)
 
 # ✅ 외부 import 제한
 __all__ = [
     "llm_question", "llm_evaluator", "diary_llm", "emo_llm", "sfx_llm", "comfy_llm",
     "embedding_model", "get_llm", "image_processor", "caption_model",
-    "UserLog", "UserMBTI", "Diary"
+    "UserLog", "UserMBTI", "Diary", "DailyActivitySummary"
 ]
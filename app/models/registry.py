@@ -0,0 +1,167 @@
+import asyncio
+import gc
+import sys
+import threading
+import time
+from typing import Any, Callable, Optional
+from app.core.config import MODEL_IDLE_UNLOAD_SEC
+
+class LazyResource:
+    """
+    처음 사용할 때 loader를 한 번만 실행해 만드는 무거운 객체(모델, 벡터스토어 등)입니다.
+    idle_unload=True인 리소스는 idle_unload_sec 동안 사용되지 않으면 메모리에서 내리고 다음 사용 때 다시 로드합니다.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Any], idle_unload: bool = False):
+        self.name = name
+        self.loader = loader
+        self.idle_unload = idle_unload
+
+        self._lock = threading.Lock()
+        self._value: Optional[Any] = None
+        self.last_used_at: Optional[float] = None
+
+        # ✅ 모니터링용 지표
+        self.loads = 0
+        self.unloads = 0
+        self.failures = 0
+        self.last_load_ms = 0.0
+        self._total_load_ms = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        return self._value is not None
+
+    def get(self) -> Any:
+        self.last_used_at = time.time()
+        value = self._value
+        if value is not None:
+            return value
+        with self._lock:
+            if self._value is None:
+                started = time.perf_counter()
+                try:
+                    self._value = self.loader()
+                except Exception:
+                    self.failures += 1
+                    raise
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self.loads += 1
+                self.last_load_ms = elapsed_ms
+                self._total_load_ms += elapsed_ms
+                print(f"📦 [INFO] {self.name} 로드 완료 ({elapsed_ms:.0f}ms)")
+            return self._value
+
+    def unload(self) -> bool:
+        # 사용 중인 호출은 자기 참조를 들고 있으므로 끝난 뒤에 해제됨
+        with self._lock:
+            if self._value is None:
+                return False
+            self._value = None
+            self.unloads += 1
+        _release_memory()
+        print(f"📤 [INFO] {self.name} 언로드 (유휴)")
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "idle_unload": self.idle_unload,
+            "loads": self.loads,
+            "unloads": self.unloads,
+            "failures": self.failures,
+            "last_load_ms": round(self.last_load_ms, 1),
+            "avg_load_ms": round(self._total_load_ms / self.loads, 1) if self.loads else 0.0,
+            "last_used_at": self.last_used_at
+        }
+
+def _release_memory():
+    gc.collect()
+    # torch를 이미 불러온 프로세스에서만 GPU 캐시 반환 (여기서 torch를 새로 import하지 않음)
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+class LazyProxy:
+    """
+    LazyResource를 기존 모듈 변수처럼 쓰기 위한 대리 객체입니다.
+    속성 접근 / 호출 시점에 리소스를 로드해서 전달합니다. (예: caption_model.generate(...))
+    """
+
+    def __init__(self, resource: LazyResource):
+        object.__setattr__(self, "_resource", resource)
+
+    def __getattr__(self, name: str):
+        return getattr(self._resource.get(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._resource.get()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._resource.loaded else "not loaded"
+        return f"<LazyProxy {self._resource.name} ({state})>"
+
+class ModelRegistry:
+    """
+    이름별 LazyResource 모음입니다. idle_unload_sec > 0이면 백그라운드에서 유휴 리소스를 언로드합니다.
+    """
+
+    def __init__(self, idle_unload_sec: int = MODEL_IDLE_UNLOAD_SEC):
+        self.idle_unload_sec = idle_unload_sec
+        self.resources: dict[str, LazyResource] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, loader: Callable[[], Any], idle_unload: bool = False) -> LazyResource:
+        if name not in self.resources:
+            self.resources[name] = LazyResource(name, loader, idle_unload=idle_unload)
+        return self.resources[name]
+
+    def lazy(self, name: str, loader: Callable[[], Any], idle_unload: bool = False) -> LazyProxy:
+        return LazyProxy(self.register(name, loader, idle_unload=idle_unload))
+
+    def get(self, name: str) -> Any:
+        return self.resources[name].get()
+
+    def unload_idle(self) -> list[str]:
+        now = time.time()
+        unloaded = []
+        for resource in self.resources.values():
+            if (
+                resource.idle_unload and resource.loaded and resource.last_used_at is not None
+                and now - resource.last_used_at >= self.idle_unload_sec and resource.unload()
+            ):
+                unloaded.append(resource.name)
+        return unloaded
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.idle_unload_sec <= 0 or self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+        print(f"✅ [INFO] 유휴 모델 언로드 시작 (idle={self.idle_unload_sec}s)")
+
+    async def stop(self):
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self):
+        interval = min(60, self.idle_unload_sec)
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self.unload_idle)
+
+    def stats(self) -> dict:
+        return {
+            "idle_unload_sec": self.idle_unload_sec,
+            "resources": {name: resource.stats() for name, resource in self.resources.items()}
+        }
+
+model_registry = ModelRegistry()
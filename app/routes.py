@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Body, Query
-from fastapi.responses import FileResponse
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Body, Query, Request, BackgroundTasks
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse, Response
+from pydantic import BaseModel, Field, ValidationError
 from uuid import uuid4
 from datetime import datetime
+from sqlalchemy import select, func
 from sqlalchemy.orm import Session as DbSession
-from app.core.database import get_pg_session, get_mongo_collection
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_pg_session, get_async_pg_session, get_async_mongo_collection
 from app.utils.action_enum import ActionType, ActionName
 from typing import List, Optional
 from datetime import datetime
@@ -13,20 +15,52 @@ import pandas as pd
 import os
 import shutil
 import json
+import asyncio
+from contextlib import nullcontext
 from app.api.mbti.logic import generate_question, judge_response 
 from app.utils.mbti_helper import init_mbti_state, update_score, get_session, update_session, get_mbti_profile, finalize_mbti
 from app.models.models import UserLog, UserMBTI
 from app.utils.db_helper import (
-    get_mbti_by_user_id,
-    get_game_logs_by_user_id,
-    save_diary_to_mongo,
-    get_diary_from_mongo
+    get_mbti_by_user_id_async,
+    save_diary_to_mongo_async
 )
-from app.utils.log_helper import get_logs_by_user_and_date, convert_path_to_url, extract_date_only
-from app.api.diary.diary_generator import run_diary_generation, format_diary_output, regenerate_emotion_info
-from app.utils.image_helper import save_screenshot
+from app.utils.log_helper import (
+    get_logs_by_user_and_date_async,
+    convert_path_to_url,
+    extract_date_only,
+    parse_log_datetime,
+    parse_log_date,
+    bulk_insert_logs_async,
+    build_log_filters,
+    fetch_log_page_async,
+    stream_logs
+)
+from app.api.diary.diary_generator import run_diary_generation, format_diary_output, regenerate_emotion_info, stream_diary_generation
+from app.api.diary.diary_jobs import diary_job_manager, JOB_SUCCEEDED, JOB_FAILED
+from app.api.diary.diary_batch import run_diary_batch, claim_batch, batch_status
+from app.utils.single_flight import get_single_flight_stats
+from app.utils.llm_cache import bypass_llm_cache, get_llm_cache_stats
+from app.utils.semantic_cache import get_semantic_cache_stats
+from app.models.registry import model_registry
+from app.utils.llm_governor import llm_priority, get_llm_governor_stats, PRIORITY_INTERACTIVE
+from app.api.diary.diary_cache import diary_cache
+from app.api.diary.diary_context import DiaryRunContext, stage_stats
+from app.core.config import DIARY_BATCH_CONCURRENCY, DIARY_BATCH_CHUNK_SIZE
+from app.utils.image_helper import (
+    save_screenshot,
+    resolve_screenshot_path,
+    get_screenshot_variant,
+    pregenerate_screenshot_variants,
+    build_cache_headers,
+    is_not_modified,
+    SCREENSHOT_VARIANT_SIZES,
+    SCREENSHOT_VARIANT_FORMATS
+)
+from app.utils.log_buffer import log_buffer
+from app.utils.summary_helper import rebuild_daily_summary_async, get_daily_summary_async
+from app.utils.export_helper import export_logs_to_parquet
 from app.api.diary.screenshot_selector import select_best_screenshot
-from app.api.diary.prompt_diary import emotion_tag_chain
+from app.api.diary.emotion_classifier import emotion_tag_chain, emotion_classifier
 from app.api.sfx.sfx_service import generate_sfx_with_translation
 from app.api.comfy.comfyui_service import generate_comfyui_prompt
 
@@ -39,7 +73,7 @@ etc_router = APIRouter()
 UPLOAD_DIR = "static/screenshot"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-# PostgreSQL DB 세션 생성 함수
+# PostgreSQL DB 세션 생성 함수 (동기 로직을 사용하는 MBTI 라우트용)
 def get_db():
     db = get_pg_session()
     try:
@@ -47,6 +81,11 @@ def get_db():
     finally:
         db.close()
 
+# PostgreSQL 비동기 DB 세션 생성 함수
+async def get_async_db():
+    async with get_async_pg_session() as db:
+        yield db
+
 class LogEntry(BaseModel):
     session_id: str
     user_id: str
@@ -61,6 +100,7 @@ class LogEntry(BaseModel):
 
 @log_router.post("/upload_with_screenshot")
 async def upload_log_with_screenshot(
+    background_tasks: BackgroundTasks,
     session_id: str = Form(...),
     user_id: str = Form(...),
     timestamp: str = Form(...),
@@ -71,16 +111,12 @@ async def upload_log_with_screenshot(
     detail: str = Form(...),
     with_: str = Form(None),
     file: UploadFile = File(None),
-    db: DbSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     로그와 스크린샷을 동시에 업로드하고 DB에 저장합니다.
     """
-    screenshot_path = None
-    if file:
-        screenshot_path = save_screenshot(file, user_id, session_id)
-
-    # ✅ 날짜 형식 변환
+    # ✅ 날짜 형식 변환 (잘못된 요청이면 스크린샷 저장 / 썸네일 생성 전에 반환)
     try:
         timestamp = datetime.strptime(timestamp, "%Y.%m.%d-%H.%M.%S")
         ingame_datetime = datetime.strptime(ingame_datetime, "%Y.%m.%d-%H.%M.%S")
@@ -90,30 +126,42 @@ async def upload_log_with_screenshot(
             "error": str(e)
         }
 
+    screenshot_path = None
+    if file:
+        screenshot_path = await save_screenshot(file)
+        # ✅ 목록 화면용 썸네일은 응답 후 백그라운드에서 미리 생성
+        background_tasks.add_task(pregenerate_screenshot_variants, screenshot_path)
+
     # ✅ 경로 보정 로직 추가
     if screenshot_path and not screenshot_path.startswith("static/"):
         screenshot_path = os.path.join("static", screenshot_path).replace("\\", "/")
 
-    # ✅ SQLAlchemy 모델 생성
-    log = UserLog(
-        session_id=session_id,
-        user_id=user_id,
-        timestamp=timestamp,
-        ingame_datetime=ingame_datetime,
-        location=location,
-        action_type=action_type,
-        action_name=action_name,
-        detail=detail,
-        with_=with_,
-        screenshot=screenshot_path
-    )
+    row = {
+        "session_id": session_id,
+        "user_id": user_id,
+        "timestamp": timestamp,
+        "ingame_datetime": ingame_datetime,
+        "location": location,
+        "action_type": action_type,
+        "action_name": action_name,
+        "detail": detail,
+        "with_": with_,
+        "screenshot": screenshot_path
+    }
+
+    # ✅ write-behind 버퍼가 켜져 있으면 큐에 넣고 바로 202 응답
+    if log_buffer.running:
+        await log_buffer.put(row)
+        return JSONResponse(status_code=202, content={
+            "message": "로그 저장 요청 접수",
+            "screenshot": screenshot_path or "스크린샷 없음"
+        })
 
-    # ✅ DB 저장
+    # ✅ DB 저장 (일일 활동 요약도 함께 갱신)
     try:
-        db.add(log)
-        db.commit()
+        await bulk_insert_logs_async(db, [row])
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         return {"message": "DB 저장 중 오류가 발생했습니다.", "error": str(e)}
 
     return {
@@ -121,45 +169,198 @@ async def upload_log_with_screenshot(
         "screenshot": screenshot_path or "스크린샷 없음"
     }
 
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+async def iter_ndjson_records(request: Request):
+    """
+    NDJSON 요청 본문을 스트림으로 읽어 한 줄씩 (줄 번호, 원본 문자열)을 반환합니다.
+    """
+    buffer = b""
+    index = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield index, line
+                index += 1
+    if buffer.strip():
+        yield index, buffer
+
+def log_entry_to_row(entry: LogEntry) -> dict:
+    """
+    검증된 LogEntry를 game_logs INSERT용 딕셔너리로 변환합니다.
+    """
+    row = entry.dict()
+    row["timestamp"] = parse_log_datetime(entry.timestamp)
+    row["ingame_datetime"] = parse_log_datetime(entry.ingame_datetime)
+    row["action_type"] = entry.action_type.value
+    row["action_name"] = entry.action_name.value
+    return row
+
+@log_router.post("/upload_batch")
+async def upload_log_batch(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    여러 개의 로그를 한 번에 업로드합니다.
+    JSON 배열 또는 NDJSON(한 줄에 LogEntry 하나) 형식을 지원하며,
+    검증에 실패한 행은 건너뛰고 나머지를 하나의 multi-row INSERT로 저장합니다.
+    """
+    rows = []
+    failed = []
+
+    def collect(index: int, record):
+        try:
+            if isinstance(record, (bytes, str)):
+                record = json.loads(record)
+            rows.append(log_entry_to_row(LogEntry(**record)))
+        except ValidationError as e:
+            failed.append({"index": index, "error": e.errors(include_url=False, include_context=False)})
+        except (ValueError, TypeError) as e:
+            failed.append({"index": index, "error": str(e)})
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_CONTENT_TYPES:
+        async for index, line in iter_ndjson_records(request):
+            collect(index, line)
+    else:
+        try:
+            records = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="요청 본문이 올바른 JSON 배열이 아닙니다.")
+        if not isinstance(records, list):
+            raise HTTPException(status_code=400, detail="로그는 JSON 배열 형식으로 전송해야 합니다.")
+        for index, record in enumerate(records):
+            collect(index, record)
+
+    # ✅ DB 저장 (한 번의 트랜잭션)
+    try:
+        inserted = await bulk_insert_logs_async(db, rows)
+    except Exception as e:
+        await db.rollback()
+        return {"message": "DB 저장 중 오류가 발생했습니다.", "error": str(e), "inserted": 0, "failed": failed}
+
+    return {
+        "message": "로그 일괄 저장 완료",
+        "inserted": inserted,
+        "failed": failed
+    }
+
+@log_router.get("/buffer/stats")
+async def get_log_buffer_stats():
+    """
+    로그 write-behind 버퍼의 큐 길이와 flush 지연 시간, 재시도 / dead-letter 건수와 최근 dead-letter 행을 반환합니다.
+    """
+    return log_buffer.stats()
+
+@log_router.get("/summary")
+async def get_daily_summary(
+    session_id: str = Query(...),
+    user_id: str = Query(...),
+    ingame_date: str = Query(..., description="인게임 날짜 (YYYY.MM.DD)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    (세션, 유저, 인게임 날짜)별로 미리 집계된 일일 활동 요약을 반환합니다.
+    """
+    try:
+        target_date = parse_log_date(ingame_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="날짜 형식이 잘못되었습니다. 'YYYY.MM.DD' 형식을 맞춰주세요.")
+
+    summary = await get_daily_summary_async(db, session_id, user_id, target_date)
+    if not summary:
+        raise HTTPException(status_code=404, detail="해당 날짜의 활동 요약이 없습니다.")
+    return summary
+
+@log_router.post("/export/parquet")
+async def export_logs_parquet():
+    """
+    마지막 export 이후 추가된 로그를 세션/인게임 날짜별 Parquet 파티션으로 내보냅니다.
+    """
+    try:
+        return await asyncio.to_thread(export_logs_to_parquet)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
 @diary_router.post("/new_session")
 async def generate_session_id():
     return {"session_id": str(uuid4())}
 
+def to_ndjson_line(record: dict) -> str:
+    return json.dumps(record, ensure_ascii=False, default=lambda v: v.isoformat()) + "\n"
+
 @log_router.get("/logs")
-async def get_all_logs(db: DbSession = Depends(get_db)):
-    logs = db.query(UserLog).all()
-    result = [{
-        "id": log.id,
-        "session_id": log.session_id,
-        "user_id": log.user_id,
-        "timestamp": log.timestamp,
-        "ingame_datetime": log.ingame_datetime,
-        "location": log.location,
-        "action_type": log.action_type,
-        "action_name": log.action_name,
-        "detail": log.detail,
-        "with_": log.with_,
-        "screenshot": log.screenshot
-    } for log in logs]
-    return {"logs": result}
+async def get_all_logs(
+    user_id: Optional[str] = Query(default=None, description="사용자 ID"),
+    session_id: Optional[str] = Query(default=None, description="세션 ID"),
+    start_date: Optional[str] = Query(default=None, description="인게임 시작 날짜 (YYYY.MM.DD, 포함)"),
+    end_date: Optional[str] = Query(default=None, description="인게임 종료 날짜 (YYYY.MM.DD, 포함)"),
+    action_type: Optional[ActionType] = Query(default=None, description="행동 분류"),
+    cursor: Optional[int] = Query(default=None, description="이전 페이지의 next_cursor (이 id 이후부터 조회)"),
+    limit: int = Query(default=100, ge=1, le=1000, description="페이지 크기"),
+    stream: bool = Query(default=False, description="true이면 조건에 맞는 전체 로그를 NDJSON으로 스트리밍"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    로그를 id 기준 keyset 페이지네이션으로 조회합니다.
+    stream=true이면 서버 사이드 커서로 읽으면서 NDJSON으로 한 줄씩 전송합니다. (limit 무시)
+    """
+    try:
+        filters = build_log_filters(
+            user_id=user_id,
+            session_id=session_id,
+            start_date=parse_log_date(start_date) if start_date else None,
+            end_date=parse_log_date(end_date) if end_date else None,
+            action_type=action_type.value if action_type else None
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="날짜 형식이 잘못되었습니다. 'YYYY.MM.DD' 형식을 맞춰주세요.")
+
+    if stream:
+        return StreamingResponse(
+            (to_ndjson_line(record) for record in stream_logs(filters, after_id=cursor)),
+            media_type="application/x-ndjson"
+        )
+
+    logs, next_cursor = await fetch_log_page_async(db, filters, after_id=cursor, limit=limit)
+    return {"logs": logs, "next_cursor": next_cursor}
 
 @log_router.delete("/delete/{log_id}")
-async def delete_log(log_id: int, db: DbSession = Depends(get_db)):
-    log = db.query(UserLog).filter(UserLog.id == log_id).first()
+async def delete_log(log_id: int, db: AsyncSession = Depends(get_async_db)):
+    log = await db.get(UserLog, log_id)
     if not log:
         return {"error": f"ID {log_id}에 해당하는 로그가 없습니다."}
-    db.delete(log)
-    db.commit()
+    summary_key = (log.session_id, log.user_id, log.ingame_date)
+    await db.delete(log)
+    await db.flush()
+    await rebuild_daily_summary_async(db, *summary_key)
+    await db.commit()
+    # ✅ 해당 날짜의 일지 결과 캐시 무효화
+    await diary_cache.invalidate_async(*summary_key)
     return {"message": f"ID {log_id} 로그가 삭제되었습니다."}
 
 @log_router.put("/update/{log_id}")
-async def update_log(log_id: int, updated: LogEntry, db: DbSession = Depends(get_db)):
-    log = db.query(UserLog).filter(UserLog.id == log_id).first()
+async def update_log(log_id: int, updated: LogEntry, db: AsyncSession = Depends(get_async_db)):
+    log = await db.get(UserLog, log_id)
     if not log:
         raise HTTPException(status_code=404, detail="해당 로그를 찾을 수 없습니다.")
-    for field in updated.dict():
-        setattr(log, field, updated.dict()[field])
-    db.commit()
+    try:
+        row = log_entry_to_row(updated)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"날짜 형식이 잘못되었습니다: {e}")
+    old_key = (log.session_id, log.user_id, log.ingame_date)
+    for field, value in row.items():
+        setattr(log, field, value)
+    await db.flush()
+
+    # ✅ 변경 전/후 날짜의 일일 활동 요약 재계산
+    new_key = (row["session_id"], row["user_id"], row["ingame_datetime"].date())
+    for key in sorted({old_key, new_key}, key=str):
+        await rebuild_daily_summary_async(db, *key)
+    await db.commit()
+    # ✅ 변경 전/후 날짜의 일지 결과 캐시 무효화
+    for key in {old_key, new_key}:
+        await diary_cache.invalidate_async(*key)
     return {"message": f"ID {log_id} 로그가 수정되었습니다."}
 
 class MBTIAskRequest(BaseModel):
@@ -167,9 +368,10 @@ class MBTIAskRequest(BaseModel):
     session_id: str
 
 @mbti_router.post("/ask")
-async def ask(input: MBTIAskRequest, db: DbSession = Depends(get_db)):
+def ask(input: MBTIAskRequest, db: DbSession = Depends(get_db)):
     """
     사용자별 세션에 질문을 생성하여 반환합니다.
+    동기 DB/LLM 호출이 이벤트 루프를 막지 않도록 스레드풀에서 실행됩니다.
     """
     session_state = get_session(input.user_id, input.session_id, db)
 
@@ -180,7 +382,8 @@ async def ask(input: MBTIAskRequest, db: DbSession = Depends(get_db)):
     # Dimension 생성
     history = "\n".join(session_state["conversation_history"])
     remain = [d for d in ["I-E", "S-N", "T-F", "J-P"] if d not in session_state["asked_dimensions"]]
-    q, dim = generate_question(history, ", ".join(remain))
+    with llm_priority(PRIORITY_INTERACTIVE):
+        q, dim = generate_question(history, ", ".join(remain))
 
     # ✅ 만약 dimension이 비어 있거나 유효하지 않다면 기본값으로 대체
     if not dim or dim not in ["I-E", "S-N", "T-F", "J-P"]:
@@ -206,9 +409,10 @@ with open(MBTI_PROFILE_PATH, "r", encoding="utf-8") as f:
     MBTI_PROFILES = json.load(f)
 
 @mbti_router.post("/answer")
-async def answer(input: MBTIAnswerRequest, db: DbSession = Depends(get_db)):
+def answer(input: MBTIAnswerRequest, db: DbSession = Depends(get_db)):
     """
     사용자 응답을 저장하고 분석하여 세션에 반영합니다.
+    동기 DB/LLM 호출이 이벤트 루프를 막지 않도록 스레드풀에서 실행됩니다.
     """
     session_state = get_session(input.user_id, input.session_id, db)
     if session_state.get("completed", False):
@@ -226,7 +430,8 @@ async def answer(input: MBTIAnswerRequest, db: DbSession = Depends(get_db)):
     session_state["current_response"] = input.response
     session_state["dimension_counts"][session_state["current_dimension"]] += 1
 
-    judged = judge_response(input.response, session_state["current_dimension"])
+    with llm_priority(PRIORITY_INTERACTIVE):
+        judged = judge_response(input.response, session_state["current_dimension"])
     update_score(session_state, judged)
 
     session_state["question_count"] += 1
@@ -250,18 +455,18 @@ async def answer(input: MBTIAnswerRequest, db: DbSession = Depends(get_db)):
     }
 
 @mbti_router.get("/users")
-async def get_users(limit: int = Query(default=3, description="조회할 사용자 수"), db: DbSession = Depends(get_db)):
+async def get_users(limit: int = Query(default=3, description="조회할 사용자 수"), db: AsyncSession = Depends(get_async_db)):
     """
     사용자의 MBTI 정보를 지정된 개수만큼 조회하고, 전체 행 개수도 함께 반환합니다.
     """
     # ✅ 전체 행 개수 조회
-    total_count = db.query(UserMBTI).count()
+    total_count = await db.scalar(select(func.count()).select_from(UserMBTI))
 
     if total_count == 0:
         raise HTTPException(status_code=404, detail="데이터가 존재하지 않습니다.")
     
     # ✅ 지정된 개수만큼 조회
-    users = db.query(UserMBTI).limit(limit).all()
+    users = (await db.scalars(select(UserMBTI).limit(limit))).all()
 
     # ✅ 결과 포맷
     result = {
@@ -285,7 +490,7 @@ async def get_users(limit: int = Query(default=3, description="조회할 사용
 async def skip_mbti(
     user_id: str = Body(...),
     session_id: str = Body(...),
-    db: DbSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     사용자가 MBTI 테스트를 스킵할 경우,
@@ -293,10 +498,10 @@ async def skip_mbti(
     """
 
     # ✅ 기존 데이터 중복 확인
-    existing = db.query(UserMBTI).filter(
+    existing = (await db.scalars(select(UserMBTI).where(
         UserMBTI.user_id == user_id,
         UserMBTI.session_id == session_id
-    ).first()
+    ).limit(1))).first()
 
     if existing:
         return {"message": "이미 MBTI 정보가 저장되어 있습니다.", "mbti_type": existing.mbti_type}
@@ -321,9 +526,9 @@ async def skip_mbti(
 
     try:
         db.add(new_user)
-        db.commit()
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"DB 저장 중 오류 발생: {str(e)}")
 
     return {
@@ -334,45 +539,55 @@ async def skip_mbti(
         "assigned_profile": profile
     }
 
-@diary_router.post("/generate_diary")
-async def generate_diary_endpoint(
-    session_id: str = Body(...),
-    user_id: str = Body(...),
-    ingame_date: str = Body(...),
-    db: DbSession = Depends(get_db)
-):
+async def load_diary_inputs(db: AsyncSession, session_id: str, user_id: str, ingame_date: str) -> tuple[str, pd.DataFrame]:
     """
-    PostgreSQL에서 로그 정보를 가져오고 Diary를 생성한 뒤, 클라이언트에 반환합니다.
-    DB에 저장하지 않습니다.
+    일지 생성에 필요한 MBTI와 해당 날짜의 로그를 조회합니다. 없으면 404를 발생시킵니다.
     """
-
     # 1️⃣ MBTI 정보 가져오기
-    mbti = get_mbti_by_user_id(db, user_id)
+    mbti = await get_mbti_by_user_id_async(db, user_id)
     if not mbti:
         print("❌ [ERROR] MBTI 정보가 없습니다.")
         raise HTTPException(status_code=404, detail="해당 user_id의 MBTI 정보를 찾을 수 없습니다.")
 
     # 2️⃣ 로그 정보 가져오기 (PostgreSQL)
-    logs_df = get_logs_by_user_and_date(db, session_id, user_id, ingame_date)
+    logs_df = await get_logs_by_user_and_date_async(db, session_id, user_id, ingame_date)
 
     if logs_df.empty:
         print("⚠️ [ERROR] 로그가 존재하지 않습니다. 404 에러를 반환합니다.")
         raise HTTPException(status_code=404, detail="해당 날짜의 로그가 존재하지 않습니다.")
-
+    return mbti, logs_df
+
+def build_diary_response(
+    session_id: str,
+    user_id: str,
+    ingame_date: str,
+    logs_df: pd.DataFrame,
+    mbti: str,
+    on_stage=None,
+    force_regenerate: bool = False
+) -> dict:
+    """
+    일지를 생성하고 클라이언트 응답 형식으로 변환합니다. (DB에 저장하지 않음)
+    동기 함수이므로 라우트에서는 스레드/작업 워커에서 실행합니다.
+    force_regenerate=True이면 결과 캐시를 무시하고 새로 생성합니다.
+    """
     # 3️⃣ 일지 생성
     print("📝 [DEBUG] 일지 생성 중...")
+    context = DiaryRunContext()
     result_state = run_diary_generation(
         session_id=session_id,
         user_id=user_id,
         date=ingame_date,
         group=logs_df,
         mbti=mbti,
-        save_to_db=False
+        save_to_db=False,
+        on_stage=on_stage,
+        context=context,
+        force_regenerate=force_regenerate
     )
 
-    # ✅ 대표 이미지 찾기
-    screenshot_paths = logs_df['screenshot'].dropna().unique().tolist()
-    best_screenshot_path = select_best_screenshot(result_state["diary"], screenshot_paths)
+    # ✅ 대표 이미지 (run_diary_generation에서 고른 결과 또는 캐시된 결과 재사용)
+    best_screenshot_path = result_state["best_screenshot_path"]
 
     # ✅ 날짜 포맷 변환
     formatted_ingame_date = extract_date_only(ingame_date)
@@ -388,14 +603,208 @@ async def generate_diary_endpoint(
         "message": "Diary generated successfully.",
         "best_screenshot_filename": best_screenshot_filename,
         "formatted_date": formatted_ingame_date,
-        "mbti_name": MBTI_PROFILES.get(mbti, {}).get("name", "")    
+        "mbti_name": MBTI_PROFILES.get(mbti, {}).get("name", ""),
+        "cache_hit": result_state.get("cache_hit", False)
     })
 
     return formatted_response
 
+@diary_router.post("/generate_diary")
+async def generate_diary_endpoint(
+    session_id: str = Body(...),
+    user_id: str = Body(...),
+    ingame_date: str = Body(...),
+    force_regenerate: bool = Body(False),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    PostgreSQL에서 로그 정보를 가져오고 Diary를 생성한 뒤, 클라이언트에 반환합니다.
+    DB에 저장하지 않습니다. 로그/MBTI가 그대로면 캐시된 결과를 반환합니다. (force_regenerate=true이면 새로 생성)
+    """
+    mbti, logs_df = await load_diary_inputs(db, session_id, user_id, ingame_date)
+    # ✅ 일지 생성(LLM 호출 / 모델 슬롯 대기)은 동기 코드이므로 스레드에서 실행 (이벤트 루프를 막지 않도록)
+    return await asyncio.to_thread(
+        build_diary_response, session_id, user_id, ingame_date, logs_df, mbti, force_regenerate=force_regenerate
+    )
+
+@diary_router.post("/jobs")
+async def submit_diary_job(
+    session_id: str = Body(...),
+    user_id: str = Body(...),
+    ingame_date: str = Body(...),
+    force_regenerate: bool = Body(False),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    일지 생성 작업을 등록하고 job_id를 바로 반환합니다. (202)
+    결과는 GET /diary/jobs/{job_id} 또는 GET /diary/jobs/{job_id}/events(SSE)로 확인합니다.
+    """
+    mbti, logs_df = await load_diary_inputs(db, session_id, user_id, ingame_date)
+    try:
+        job = diary_job_manager.submit(
+            build_diary_response,
+            session_id=session_id,
+            user_id=user_id,
+            ingame_date=ingame_date,
+            logs_df=logs_df,
+            mbti=mbti,
+            force_regenerate=force_regenerate
+        )
+    except asyncio.QueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="일지 생성 대기열이 가득 찼습니다. 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": "30"}
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return JSONResponse(status_code=202, content={
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"/diary/jobs/{job['job_id']}",
+        "events_url": f"/diary/jobs/{job['job_id']}/events"
+    })
+
+@diary_router.get("/jobs/stats")
+async def get_diary_job_stats():
+    """
+    일지 작업 워커 수, 대기열 길이, 평균 대기/실행 시간을 반환합니다.
+    """
+    return diary_job_manager.stats()
+
+@diary_router.get("/jobs/{job_id}")
+async def get_diary_job(job_id: str):
+    """
+    일지 생성 작업의 상태(queued/running/succeeded/failed), 진행 단계, 결과를 반환합니다.
+    """
+    job = diary_job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="해당 job_id의 작업을 찾을 수 없습니다.")
+    return job
+
+def to_sse_message(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+@diary_router.get("/jobs/{job_id}/events")
+async def stream_diary_job_events(job_id: str):
+    """
+    일지 생성 작업의 진행 상황을 SSE(text/event-stream)로 전송합니다.
+    상태가 바뀔 때마다 progress 이벤트를, 끝나면 result(성공) 또는 error(실패) 이벤트를 보냅니다.
+    """
+    if diary_job_manager.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="해당 job_id의 작업을 찾을 수 없습니다.")
+
+    async def event_stream():
+        async for job in diary_job_manager.watch(job_id):
+            if job is None:
+                # 연결 유지용 주석
+                yield ": keep-alive\n\n"
+                continue
+            if job["status"] == JOB_SUCCEEDED:
+                yield to_sse_message("result", job)
+            elif job["status"] == JOB_FAILED:
+                yield to_sse_message("error", job)
+            else:
+                yield to_sse_message("progress", {k: v for k, v in job.items() if k != "result"})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@diary_router.post("/generate_diary/stream")
+async def generate_diary_stream_endpoint(
+    session_id: str = Body(...),
+    user_id: str = Body(...),
+    ingame_date: str = Body(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    감성일지 본문을 토큰 단위로 SSE(text/event-stream) 전송합니다. DB에 저장하지 않습니다.
+    이벤트 순서: token(여러 번) → diary → emotion → screenshot → done
+    done 이벤트에는 /diary/generate_diary와 같은 형식의 최종 결과가 담깁니다.
+    """
+    mbti, logs_df = await load_diary_inputs(db, session_id, user_id, ingame_date)
+
+    async def event_stream():
+        result = {
+            "message": "Diary generated successfully.",
+            "user_id": user_id,
+            "mbti": mbti,
+            "mbti_name": MBTI_PROFILES.get(mbti, {}).get("name", ""),
+            "formatted_date": extract_date_only(ingame_date)
+        }
+        try:
+            async for event, data in stream_diary_generation(session_id, user_id, ingame_date, logs_df, mbti):
+                if event == "screenshot":
+                    path = data["best_screenshot_path"]
+                    data["best_screenshot_filename"] = Path(path).name if path else "default.png"
+                if event != "token":
+                    result.update(data)
+                yield to_sse_message(event, data)
+        except Exception as e:
+            print(f"❌ [ERROR] 일지 스트리밍 중 오류 발생: {e}")
+            yield to_sse_message("error", {"error": str(e)})
+            return
+        yield to_sse_message("done", result)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@diary_router.post("/batch/run")
+async def run_diary_batch_endpoint(
+    background_tasks: BackgroundTasks,
+    concurrency: int = Query(DIARY_BATCH_CONCURRENCY, ge=1, le=32, description="LLM 동시 호출 수"),
+    chunk_size: int = Query(DIARY_BATCH_CHUNK_SIZE, ge=1, le=500, description="한 번에 처리/저장할 날짜 수"),
+    session_id: Optional[str] = Query(None, description="특정 세션만 처리"),
+    limit: Optional[int] = Query(None, ge=1, description="최대 처리 날짜 수")
+):
+    """
+    (관리자용) 로그는 있지만 일지가 없는 날짜의 감성일지 일괄 생성을 백그라운드로 시작합니다.
+    진행 상황과 결과는 GET /diary/batch/status로 확인합니다.
+    """
+    # ✅ 확인과 실행 권한 획득을 한 번에 (동시에 들어온 요청은 하나만 202, 나머지는 409)
+    if not claim_batch():
+        raise HTTPException(status_code=409, detail="이미 일지 배치 작업이 실행 중입니다.")
+
+    background_tasks.add_task(
+        run_diary_batch,
+        concurrency=concurrency,
+        chunk_size=chunk_size,
+        session_id=session_id,
+        limit=limit,
+        lock_claimed=True
+    )
+    return JSONResponse(status_code=202, content={"message": "일지 배치 작업을 시작했습니다."})
+
+@diary_router.get("/stage_stats")
+async def get_diary_stage_stats():
+    """
+    일지 파이프라인 단계별 실행 횟수, 요청 내 재사용 횟수, 평균/최대 소요 시간을 반환합니다.
+    """
+    return stage_stats.snapshot()
+
+@diary_router.get("/cache/stats")
+async def get_diary_cache_stats():
+    """
+    일지 결과 캐시의 적중률, 저장/삭제(LRU)/무효화 건수와 현재 프롬프트 서명을 반환합니다.
+    """
+    return diary_cache.stats()
+
+@diary_router.get("/emotion/stats")
+async def get_emotion_classifier_stats():
+    """
+    임베딩 감정 분류 건수, LLM fallback 비율, 평균 유사도/1·2위 차이를 반환합니다. (임계값 조정용)
+    """
+    return emotion_classifier.stats()
+
+@diary_router.get("/batch/status")
+async def get_diary_batch_status():
+    """
+    (관리자용) 일지 배치 작업의 실행 여부, 진행 상황, 마지막 실행 결과를 반환합니다.
+    """
+    return batch_status
+
 @diary_router.post("/regenerate_emotion")
 async def regenerate_emotion(diary_text: str):
-    return regenerate_emotion_info(diary_text)
+    return await regenerate_emotion_info(diary_text)
 
 @diary_router.post("/save_diary")
 async def save_diary_endpoint(
@@ -403,13 +812,13 @@ async def save_diary_endpoint(
     user_id: str = Body(...),
     ingame_date: str = Body(...),
     diary_content: str = Body(...),
-    db: DbSession = Depends(get_db)  # ✅ PostgreSQL 세션 유지
+    db: AsyncSession = Depends(get_async_db)  # ✅ PostgreSQL 세션 유지
 ):
     """
     로그를 조회하여 대표 이미지를 선택하고 MongoDB에 일지 저장
     """
     # 1️⃣ PostgreSQL에서 로그 정보 가져오기
-    logs_df = get_logs_by_user_and_date(db, session_id, user_id, ingame_date)
+    logs_df = await get_logs_by_user_and_date_async(db, session_id, user_id, ingame_date)
 
     # ✅ 컬럼이 없을 경우 강제로 생성
     if 'screenshot' not in logs_df.columns:
@@ -423,15 +832,16 @@ async def save_diary_endpoint(
         print("⚠️ 'screenshot' 컬럼이 존재하지 않아서 기본 이미지로 대체합니다.")
         screenshot_paths = ["static/screenshot/default.png"]
 
-    # ✅ 기본 이미지 설정
+    # ✅ 3️⃣ 대표 이미지 선택과 감정 태그/키워드 생성은 서로 독립이므로 동시에 실행
     if not screenshot_paths:
         print("⚠️ 대표 이미지가 없어서 기본 이미지로 대체합니다.")
         best_screenshot_path = "static/screenshot/default.png"
+        emotion_result = await emotion_tag_chain.ainvoke({"diary": diary_content})
     else:
-        best_screenshot_path = select_best_screenshot(diary_content, screenshot_paths)
-
-    # ✅ 3️⃣ 감정 태그/키워드 생성
-    emotion_result = emotion_tag_chain.invoke({"diary": diary_content})
+        best_screenshot_path, emotion_result = await asyncio.gather(
+            asyncio.to_thread(select_best_screenshot, diary_content, screenshot_paths),
+            emotion_tag_chain.ainvoke({"diary": diary_content})
+        )
     
     emotion_keywords = emotion_result.get("keywords", [])
     emotion_tags = emotion_result.get("emotion_tags", [])
@@ -448,8 +858,7 @@ async def save_diary_endpoint(
     formatted_ingame_date = extract_date_only(ingame_date)
 
     # ✅ 4️⃣ MongoDB에 저장
-    from app.utils.db_helper import save_diary_to_mongo
-    save_diary_to_mongo(
+    await save_diary_to_mongo_async(
         session_id=session_id,
         user_id=user_id,
         date=formatted_ingame_date,
@@ -471,9 +880,6 @@ async def save_diary_endpoint(
         "emotion_keywords": emotion_keywords
     }
 
-# ✅ FileResponse로 반환할 파일 기본 경로 설정
-BASE_IMAGE_PATH = Path("static/screenshot")
-
 @diary_router.post("/get_all_diaries")
 async def get_all_diaries_endpoint(
     user_id: str = Body(...),
@@ -483,13 +889,13 @@ async def get_all_diaries_endpoint(
     MongoDB에서 특정 user_id와 session_id에 해당하는 모든 일지를 조회합니다.
     """
     # ✅ MongoDB 컬렉션 가져오기
-    diary_collection = get_mongo_collection("diary")
+    diary_collection = get_async_mongo_collection("diary")
 
     # ✅ MongoDB 쿼리 실행 (모든 일지 조회)
-    diaries = list(diary_collection.find({
+    diaries = await diary_collection.find({
         "user_id": user_id,
         "session_id": session_id
-    }))
+    }).to_list(length=None)
 
     # ✅ 결과가 없으면 404 에러
     if not diaries:
@@ -518,22 +924,51 @@ async def get_all_diaries_endpoint(
 
 # ✅ 파일을 다운로드가 아닌 화면에 바로 렌더링
 @diary_router.get("/render_image/{image_name}")
-async def render_image(image_name: str):
-    file_path = BASE_IMAGE_PATH / image_name
+async def render_image(
+    image_name: str,
+    request: Request,
+    size: str = Query("original", description="original / thumb(256px) / small(512px) / medium(1024px)"),
+    image_format: str = Query("webp", alias="format", description="변형 이미지 포맷 (webp / jpeg), size=original이면 무시")
+):
+    """
+    스크린샷을 브라우저에 바로 렌더링합니다.
+    size를 지정하면 축소된 WebP/JPEG 변형을 반환하며, 변형은 처음 요청될 때 만들어 캐시합니다.
+    ETag / Last-Modified 조건부 요청에는 304로 응답합니다.
+    """
+    if size != "original" and size not in SCREENSHOT_VARIANT_SIZES:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 size입니다: {size}")
+    if size != "original" and image_format not in SCREENSHOT_VARIANT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 format입니다: {image_format}")
+
+    file_path = Path(resolve_screenshot_path(image_name))
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="파일이 존재하지 않습니다.")
-    
+
+    media_type = "image/png"
+    variant_key = "original"
+    if size != "original":
+        try:
+            file_path = Path(await get_screenshot_variant(str(file_path), size, image_format))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"변형 이미지 생성 실패: {e}")
+        media_type = SCREENSHOT_VARIANT_FORMATS[image_format][1]
+        variant_key = f"{size}.{image_format}"
+
+    cache_headers = build_cache_headers(str(file_path), variant_key)
+    if is_not_modified(request.headers, cache_headers):
+        return Response(status_code=304, headers=cache_headers)
+
     # ✅ 다운로드가 아닌 브라우저에 바로 렌더링하도록 설정
-    headers = {"Content-Disposition": "inline"}
-    return FileResponse(file_path, media_type='image/png', headers=headers)
+    headers = {"Content-Disposition": "inline", **cache_headers}
+    return FileResponse(file_path, media_type=media_type, headers=headers)
 
 @log_router.delete("/diary/delete")
 async def delete_diary(session_id: str, user_id: str):
     """
     특정 session_id와 user_id에 해당하는 Diary 데이터를 MongoDB에서 삭제합니다.
     """
-    diary_collection = get_mongo_collection("diary")
-    result = diary_collection.delete_many({
+    diary_collection = get_async_mongo_collection("diary")
+    result = await diary_collection.delete_many({
         "session_id": str(session_id),
         "user_id": str(user_id)
     })
@@ -544,13 +979,15 @@ async def delete_diary(session_id: str, user_id: str):
     return {"message": f"{result.deleted_count}개의 일지가 삭제되었습니다."}
 
 @etc_router.post("/sfx/generate")
-async def generate_sfx(prompt: str, duration: float = None, prompt_influence: float = 0.3):
+async def generate_sfx(prompt: str, duration: float = None, prompt_influence: float = 0.3, refresh: bool = False):
     """
     텍스트 설명을 기반으로 효과음을 생성하고, 생성된 파일을 클라이언트가 바로 다운로드할 수 있도록 합니다.
+    refresh=true이면 번역 캐시(LLM 응답 / 의미 기반)를 쓰지 않고 새로 번역합니다.
     """
     try:
-        # ✅ SFX 생성 및 파일 경로 반환
-        result = generate_sfx_with_translation(prompt, duration, prompt_influence)
+        # ✅ SFX 생성 및 파일 경로 반환 (블로킹 호출이므로 스레드에서 실행 → 동시 요청끼리 번역 합치기 가능)
+        with (bypass_llm_cache() if refresh else nullcontext()), llm_priority(PRIORITY_INTERACTIVE):
+            result = await asyncio.to_thread(generate_sfx_with_translation, prompt, duration, prompt_influence)
 
         # ✅ 파일 경로 추출
         file_path = result["file_path"]
@@ -564,13 +1001,52 @@ async def generate_sfx(prompt: str, duration: float = None, prompt_influence: fl
             )
         else:
             raise HTTPException(status_code=404, detail="생성된 SFX 파일을 찾을 수 없습니다.")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @etc_router.post("/comfyui/generate")
-async def generate_comfyui(prompt: str):
+async def generate_comfyui(prompt: str, refresh: bool = False):
     """
     ComfyUI에서 사용할 수 있는 형식으로 프롬프트 생성
+    refresh=true이면 캐시(LLM 응답 / 의미 기반)를 쓰지 않고 새로 변환합니다.
     """
-    result = generate_comfyui_prompt(prompt)
+    with (bypass_llm_cache() if refresh else nullcontext()), llm_priority(PRIORITY_INTERACTIVE):
+        result = await asyncio.to_thread(generate_comfyui_prompt, prompt)
     return result
+
+@etc_router.get("/llm_cache/stats")
+async def get_llm_cache_stats_endpoint():
+    """
+    LLM 응답 캐시(SQLite)의 항목 수, 적중률, 우회/삭제(LRU) 건수와 캐시가 설치된 LLM 목록을 반환합니다.
+    """
+    return get_llm_cache_stats()
+
+@etc_router.get("/semantic_cache/stats")
+async def get_semantic_cache_stats_endpoint():
+    """
+    번역 / ComfyUI 변환 의미 기반 캐시의 완전 일치·근사 적중 수, 삭제 건수와 false hit 점검 결과를 반환합니다.
+    """
+    return get_semantic_cache_stats()
+
+@etc_router.get("/llm_governor/stats")
+async def get_llm_governor_stats_endpoint():
+    """
+    Ollama 모델별 동시 실행 수, 우선순위별 대기 수 / 대기 시간, 거절(429) / 대기 시간 초과(503) 건수를 반환합니다.
+    """
+    return get_llm_governor_stats()
+
+@etc_router.get("/models/stats")
+async def get_model_registry_stats_endpoint():
+    """
+    지연 로드 리소스(BLIP, BGE-m3-ko, MBTI 벡터스토어 / RAG 체인)별 로드 여부, 로드 시간, 유휴 언로드 횟수를 반환합니다.
+    """
+    return model_registry.stats()
+
+@etc_router.get("/single_flight/stats")
+async def get_single_flight_stats_endpoint():
+    """
+    MBTI 어투 조회 / 번역 / ComfyUI 변환에서 동시에 들어온 같은 호출이 합쳐진(coalesced) 횟수와 실제 실행 횟수를 반환합니다.
+    """
+    return get_single_flight_stats()
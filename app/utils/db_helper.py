@@ -1,4 +1,6 @@
-from app.core.database import get_pg_session, get_mongo_collection
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_pg_session, get_mongo_collection, get_async_mongo_collection
 from app.models.models import UserMBTI, UserLog
 
 def get_mbti_by_user_id(db, user_id: str) -> str | None:
@@ -60,4 +62,51 @@ def save_diary_to_mongo(session_id, user_id, date, content, emotion_tags, emotio
     }
 
     # MongoDB에 삽입
-    diary_collection.insert_one(diary_data)
\ No newline at end of file
+    diary_collection.insert_one(diary_data)
+
+# ✅ async 라우트용 비동기 버전
+
+async def get_mbti_by_user_id_async(db: AsyncSession, user_id: str) -> str | None:
+    """
+    PostgreSQL에서 UserMBTI 정보를 비동기로 조회합니다.
+
+    :param db: FastAPI에서 전달받은 비동기 DB 세션
+    :param user_id: 조회할 사용자의 ID
+    :return: 사용자의 MBTI 타입 문자열 (없으면 None 반환)
+    """
+    result = await db.execute(select(UserMBTI.mbti_type).where(UserMBTI.user_id == user_id).limit(1))
+    return result.scalar_one_or_none()
+
+async def get_diary_from_mongo_async(user_id: str, date: str):
+    """
+    MongoDB에서 특정 user_id와 date에 해당하는 Diary를 비동기로 조회합니다.
+    """
+    diary_collection = get_async_mongo_collection("diary")
+    formatted_date = date if "." in date else date.replace("-", ".")
+
+    diary = await diary_collection.find_one({"user_id": user_id, "date": formatted_date})
+    if not diary:
+        print("❌ 일지를 찾을 수 없습니다.")
+    return diary
+
+async def get_game_logs_by_user_id_async(db: AsyncSession, user_id: str):
+    """
+    PostgreSQL에서 UserLog 정보를 비동기로 조회합니다.
+    """
+    result = await db.scalars(select(UserLog).where(UserLog.user_id == user_id))
+    return result.all()
+
+async def save_diary_to_mongo_async(session_id, user_id, date, content, emotion_tags, emotion_keywords, screenshot_path):
+    """
+    MongoDB에 Diary를 비동기로 저장합니다.
+    """
+    diary_collection = get_async_mongo_collection("diary")
+    await diary_collection.insert_one({
+        "session_id": session_id,
+        "user_id": user_id,
+        "date": date,
+        "content": content,
+        "emotion_tags": emotion_tags,
+        "emotion_keywords": emotion_keywords,
+        "screenshot_path": screenshot_path
+    })
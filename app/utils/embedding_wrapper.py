@@ -1,11 +1,28 @@
 from langchain.embeddings.base import Embeddings
-from typing import List
-from sentence_transformers import SentenceTransformer
+from typing import List, Optional
+from app.models.registry import model_registry
 
 class LangchainEmbeddingWrapper(Embeddings):
-    def __init__(self, model_name: str = "dragonkue/BGE-m3-ko", device: str = "cuda"):
-        self.model = SentenceTransformer(model_name)
-        self.model.to(device)
+    def __init__(self, model_name: str = "dragonkue/BGE-m3-ko", device: Optional[str] = None):
+        self.model_name = model_name
+        self.device = device
+        # ✅ SentenceTransformer는 첫 임베딩 호출 때 로드 (유휴 시 언로드 대상)
+        self._model = model_registry.register(f"sentence_transformer:{model_name}", self._load, idle_unload=True)
+
+    def _load(self):
+        import torch
+        from sentence_transformers import SentenceTransformer
+        # 기본은 GPU, GPU가 없는 서버면 CPU로 로드 (BLIP 로더와 같은 기준)
+        device = self.device or "cuda"
+        if device.startswith("cuda") and not torch.cuda.is_available():
+            device = "cpu"
+        model = SentenceTransformer(self.model_name)
+        model.to(device)
+        return model
+
+    @property
+    def model(self):
+        return self._model.get()
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         return self.model.encode(texts, convert_to_numpy=True).tolist()
@@ -0,0 +1,224 @@
+"""
+game_logs를 Parquet 파일로 내보내는 도구
+
+    python -m app.utils.export_helper
+
+EXPORT_DIR 아래에 세션 / 인게임 날짜 기준 hive 파티션으로 저장합니다.
+    exports/game_logs/session_id=<세션>/ingame_date=<YYYY-MM-DD>/part-<시작 id>.parquet
+
+마지막으로 내보낸 id를 _export_state.json에 기록해 두고,
+다음 실행 시에는 그 이후에 추가된 로그가 있는 파티션에만 새 part 파일을 추가합니다.
+id는 INSERT 때 정해지지만 commit 순서는 다를 수 있으므로, 마지막 id 아래로 EXPORT_RESCAN_WINDOW 범위 안에서
+아직 보이지 않던 id(pending_ids)도 함께 기록해 두고 다음 실행에서 다시 확인합니다. (한 번 내보낸 id는 다시 내보내지 않음)
+(이미 내보낸 로그의 수정/삭제는 반영되지 않습니다.)
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from urllib.parse import quote
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select, asc, func, or_
+from app.core.config import EXPORT_DIR, EXPORT_CHUNK_SIZE, EXPORT_RESCAN_WINDOW
+from app.core.database import get_pg_session
+from app.models.models import UserLog
+
+STATE_FILE_NAME = "_export_state.json"
+
+# ✅ 파티션 컬럼(session_id, ingame_date)은 디렉토리 경로로 표현하므로 파일에는 넣지 않음
+EXPORT_COLUMNS = [
+    UserLog.id,
+    UserLog.session_id,
+    UserLog.ingame_date,
+    UserLog.user_id,
+    UserLog.timestamp,
+    UserLog.ingame_datetime,
+    UserLog.location,
+    UserLog.action_type,
+    UserLog.action_name,
+    UserLog.detail,
+    UserLog.with_,
+    UserLog.screenshot
+]
+
+# ✅ action_type / action_name은 값 종류가 적으므로 dictionary 인코딩
+EXPORT_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("user_id", pa.string()),
+    ("timestamp", pa.timestamp("us")),
+    ("ingame_datetime", pa.timestamp("us")),
+    ("location", pa.string()),
+    ("action_type", pa.dictionary(pa.int32(), pa.string())),
+    ("action_name", pa.dictionary(pa.int32(), pa.string())),
+    ("detail", pa.string()),
+    ("with_", pa.string()),
+    ("screenshot", pa.string())
+])
+DICTIONARY_COLUMNS = {"action_type", "action_name"}
+
+_export_lock = threading.Lock()
+
+def load_export_state(export_dir: str = EXPORT_DIR) -> dict:
+    state_path = os.path.join(export_dir, STATE_FILE_NAME)
+    if not os.path.exists(state_path):
+        return {"last_id": 0, "pending_ids": []}
+    with open(state_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_export_state(state: dict, export_dir: str = EXPORT_DIR):
+    state_path = os.path.join(export_dir, STATE_FILE_NAME)
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, state_path)
+
+def partition_dir(export_dir: str, session_id: str, ingame_date) -> str:
+    date_value = ingame_date.isoformat() if ingame_date else "unknown"
+    return os.path.join(export_dir, f"session_id={quote(str(session_id), safe='')}", f"ingame_date={date_value}")
+
+def rows_to_table(rows: list) -> pa.Table:
+    """
+    조회한 행 목록을 EXPORT_SCHEMA에 맞는 Arrow 테이블로 변환합니다.
+    """
+    arrays = []
+    for field in EXPORT_SCHEMA:
+        values = [getattr(row, field.name) for row in rows]
+        if field.name in DICTIONARY_COLUMNS:
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=EXPORT_SCHEMA)
+
+class _PartitionWriter:
+    """
+    파티션 하나에 대한 Parquet writer. 임시 파일에 쓰고 close 시 이름을 바꿔
+    중간에 실패해도 불완전한 part 파일이 남지 않게 합니다.
+    """
+
+    def __init__(self, directory: str, start_id: int):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"part-{start_id:012d}.parquet")
+        self.tmp_path = f"{self.path}.tmp"
+        self.writer = pq.ParquetWriter(self.tmp_path, EXPORT_SCHEMA, compression="zstd")
+        self.rows = 0
+
+    def write(self, rows: list):
+        if rows:
+            self.writer.write_table(rows_to_table(rows))
+            self.rows += len(rows)
+
+    def close(self):
+        self.writer.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        # 실패한 파티션의 임시 파일 삭제
+        try:
+            self.writer.close()
+        finally:
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+
+def export_logs_to_parquet(
+    export_dir: str = EXPORT_DIR,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+    rescan_window: int = EXPORT_RESCAN_WINDOW
+) -> dict:
+    """
+    마지막 export 이후 추가된 로그를 파티션별 Parquet 파일로 내보냅니다.
+    (session_id, ingame_date, id) 순서로 서버 사이드 커서에서 chunk_size씩 읽으므로
+    한 번에 하나의 파티션 writer만 열리고 메모리 사용량은 chunk 크기로 제한됩니다.
+
+    Returns:
+        dict: 내보낸 행 수, 새로 추가된 part 파일 수, 소요 시간 등 요약 정보
+    """
+    if not _export_lock.acquire(blocking=False):
+        raise RuntimeError("이미 export 작업이 실행 중입니다.")
+
+    try:
+        started = time.perf_counter()
+        os.makedirs(export_dir, exist_ok=True)
+        state = load_export_state(export_dir)
+        last_id = state.get("last_id", 0)
+        pending_ids = set(state.get("pending_ids", []))
+
+        db = get_pg_session()
+        writer = None
+        current_key = None
+        total_rows = 0
+        partitions = []
+
+        try:
+            # ✅ 이번 실행의 상한 id를 먼저 고정 (조회 중에 commit된 더 큰 id는 다음 실행에서 처리)
+            max_id = db.execute(select(func.max(UserLog.id))).scalar() or last_id
+            max_id = max(max_id, last_id)
+            window_start = max(last_id, max_id - rescan_window)
+            seen_in_window = set()
+
+            # ✅ 마지막 id 이후의 로그 + 지난 실행 때 아직 보이지 않던 id
+            id_filter = UserLog.id.between(last_id + 1, max_id)
+            if pending_ids:
+                id_filter = or_(id_filter, UserLog.id.in_(sorted(pending_ids)))
+            stmt = (
+                select(*EXPORT_COLUMNS)
+                .where(id_filter)
+                .order_by(asc(UserLog.session_id), asc(UserLog.ingame_date), asc(UserLog.id))
+                .execution_options(yield_per=chunk_size)
+            )
+
+            for chunk in db.execute(stmt).partitions():
+                pending = []
+                for row in chunk:
+                    key = (row.session_id, row.ingame_date)
+                    if key != current_key:
+                        if writer:
+                            writer.write(pending)
+                            writer.close()
+                            pending = []
+                        writer = _PartitionWriter(partition_dir(export_dir, *key), row.id)
+                        partitions.append(writer.path)
+                        current_key = key
+                    pending.append(row)
+                    pending_ids.discard(row.id)
+                    if row.id > window_start:
+                        seen_in_window.add(row.id)
+                writer.write(pending)
+                total_rows += len(chunk)
+            if writer:
+                writer.close()
+                writer = None
+        finally:
+            if writer:
+                writer.abort()
+            db.close()
+
+        # ✅ 이번 범위에서 보이지 않은 id는 늦게 commit될 수 있으므로 다시 확인 대상으로 남김
+        # (롤백 / 삭제로 영영 생기지 않는 id는 rescan_window 밖으로 밀려나면 제외)
+        pending_ids.update(set(range(window_start + 1, max_id + 1)) - seen_in_window)
+        pending_ids = {log_id for log_id in pending_ids if log_id > max_id - rescan_window}
+
+        # ✅ 모든 파티션 쓰기가 끝난 뒤에만 워터마크 갱신
+        if total_rows or max_id != last_id or pending_ids != set(state.get("pending_ids", [])):
+            save_export_state({
+                "last_id": max_id,
+                "pending_ids": sorted(pending_ids),
+                "exported_at": datetime.now().isoformat()
+            }, export_dir)
+
+        summary = {
+            "rows": total_rows,
+            "partitions_written": len(partitions),
+            "last_id": max_id,
+            "pending_ids": len(pending_ids),
+            "elapsed_sec": round(time.perf_counter() - started, 2),
+            "export_dir": export_dir
+        }
+        print(f"✅ [EXPORT] {summary}")
+        return summary
+    finally:
+        _export_lock.release()
+
+if __name__ == "__main__":
+    export_logs_to_parquet()
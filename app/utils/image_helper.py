@@ -1,20 +1,48 @@
-import torch
 from app.models.models import caption_model, image_processor 
+from app.core.config import SCREENSHOT_PREGENERATE_VARIANTS, SCREENSHOT_VARIANT_QUALITY
 from PIL import Image
 from fastapi import UploadFile
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import aiofiles
+import aiofiles.os
+import asyncio
+import hashlib
 import os
+import re
 import uuid
-import datetime
-import shutil
 
 UPLOAD_DIR = "static/screenshot"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# ✅ 업로드 파일을 나눠 읽을 크기 (1MB)
+SCREENSHOT_CHUNK_SIZE = 1024 * 1024
+SCREENSHOT_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# ✅ 변형 이미지 설정 (긴 변 기준 최대 픽셀)
+VARIANT_DIR = os.path.join(UPLOAD_DIR, "variants")
+SCREENSHOT_VARIANT_SIZES = {"thumb": 256, "small": 512, "medium": 1024}
+SCREENSHOT_VARIANT_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg")
+}
+
+# ✅ 해시 파일명은 내용이 바뀌지 않으므로 1년 캐시, 기존 파일은 하루 캐시
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=86400"
+
 def run_captioning(image_path: str) -> str:
     """
     이미지 경로를 받아 캡션을 생성하는 함수 (GPU 사용)
     """
-    raw_image = Image.open(image_path).convert("RGB")
+    return caption_image(Image.open(image_path).convert("RGB"))
+
+def caption_image(raw_image: Image.Image) -> str:
+    """
+    RGB 이미지에 대한 캡션을 생성합니다. (모델 warm-up에서도 사용)
+    """
+    import torch  # BLIP과 마찬가지로 첫 캡션 생성 때 로드
+
     inputs = image_processor(raw_image, return_tensors="pt")
     
     # ✅ GPU로 전송
@@ -27,29 +55,167 @@ def run_captioning(image_path: str) -> str:
     caption = image_processor.decode(out[0], skip_special_tokens=True)
     return caption.strip()
 
-def save_screenshot(file: UploadFile, user_id: str, session_id: str) -> str:
+def content_addressed_path(digest: str, ext: str = ".png") -> str:
+    """
+    sha256 해시로 스크린샷 저장 경로를 만듭니다.
+    한 디렉토리에 파일이 몰리지 않도록 앞 4글자로 2단계 샤딩합니다.
+    예: static/screenshot/ab/cd/abcd....png
+    """
+    return os.path.join(UPLOAD_DIR, digest[:2], digest[2:4], f"{digest}{ext}").replace("\\", "/")
+
+def resolve_screenshot_path(image_name: str) -> str:
+    """
+    파일명으로 실제 스크린샷 경로를 찾습니다.
+    해시 파일명이면 샤딩된 경로를, 그 외(기존 UUID 파일)는 UPLOAD_DIR 바로 아래를 반환합니다.
     """
-    스크린샷 파일을 UUID 기반으로 저장합니다. 
+    stem, ext = os.path.splitext(image_name)
+    if SCREENSHOT_HASH_PATTERN.match(stem):
+        return content_addressed_path(stem, ext or ".png")
+    return os.path.join(UPLOAD_DIR, image_name).replace("\\", "/")
+
+async def save_screenshot(file: UploadFile) -> str:
+    """
+    스크린샷 파일을 내용 해시(sha256) 기반 경로에 비동기로 저장합니다.
+    업로드를 청크 단위로 읽으면서 해시를 계산하고,
+    같은 내용의 파일이 이미 있으면 새로 쓰지 않고 기존 파일을 공유합니다.
     확장자는 .png로 고정됩니다.
-    
+
     Args:
         file (UploadFile): 업로드된 파일 객체
-        user_id (str): 사용자 ID
-        session_id (str): 세션 ID
-    
+
     Returns:
         str: 상대경로로 반환된 이미지 경로
     """
-    # 디렉토리 생성
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    tmp_dir = os.path.join(UPLOAD_DIR, "tmp")
+    await aiofiles.os.makedirs(tmp_dir, exist_ok=True)
+    tmp_path = os.path.join(tmp_dir, f"{uuid.uuid4().hex}.part")
+
+    # 임시 파일에 스트리밍 저장 + 해시 계산
+    digest = hashlib.sha256()
+    try:
+        async with aiofiles.open(tmp_path, "wb") as f:
+            while chunk := await file.read(SCREENSHOT_CHUNK_SIZE):
+                digest.update(chunk)
+                await f.write(chunk)
+    except Exception:
+        await aiofiles.os.remove(tmp_path)
+        raise
 
-    # 고유한 파일 이름 생성
-    unique_name = f"screenshot_{user_id}_{session_id}_{uuid.uuid4().hex[:8]}.png"
-    file_path = os.path.join(UPLOAD_DIR, unique_name)
+    file_path = content_addressed_path(digest.hexdigest())
 
-    # 파일 저장
-    with open(file_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+    # 동일한 파일이 이미 있으면 임시 파일만 삭제
+    if await aiofiles.os.path.exists(file_path):
+        await aiofiles.os.remove(tmp_path)
+    else:
+        await aiofiles.os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        await aiofiles.os.replace(tmp_path, file_path)
 
     # 상대 경로로 반환 (API에서 접근 가능하도록 처리)
-    return os.path.relpath(file_path, ".").replace("\\", "/")
\ No newline at end of file
+    return os.path.relpath(file_path, ".").replace("\\", "/")
+
+
+def variant_path(source_path: str, size: str, fmt: str) -> str:
+    """
+    원본 스크린샷의 변형 이미지 경로를 만듭니다.
+    예: static/screenshot/variants/thumb/ab/abcd....webp
+    """
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(VARIANT_DIR, size, stem[:2], f"{stem}.{fmt}").replace("\\", "/")
+
+def generate_variant(source_path: str, size: str, fmt: str) -> str:
+    """
+    원본을 긴 변 기준으로 축소해 WebP/JPEG로 저장합니다.
+    이미 만들어진 변형이 원본보다 최신이면 다시 만들지 않습니다.
+    """
+    target_path = variant_path(source_path, size, fmt)
+    if os.path.exists(target_path) and os.path.getmtime(target_path) >= os.path.getmtime(source_path):
+        return target_path
+
+    pil_format, _ = SCREENSHOT_VARIANT_FORMATS[fmt]
+    max_px = SCREENSHOT_VARIANT_SIZES[size]
+
+    with Image.open(source_path) as image:
+        image.thumbnail((max_px, max_px), Image.LANCZOS)
+        if pil_format == "JPEG" and image.mode != "RGB":
+            image = image.convert("RGB")
+
+        # 동시에 같은 변형을 만들어도 깨진 파일이 보이지 않도록 임시 파일에 쓰고 교체
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        tmp_path = f"{target_path}.{uuid.uuid4().hex}.part"
+        try:
+            image.save(tmp_path, format=pil_format, quality=SCREENSHOT_VARIANT_QUALITY)
+            os.replace(tmp_path, target_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return target_path
+
+async def get_screenshot_variant(source_path: str, size: str, fmt: str) -> str:
+    """
+    generate_variant의 비동기 버전입니다. (이미지 처리는 스레드에서 실행)
+    """
+    return await asyncio.to_thread(generate_variant, source_path, size, fmt)
+
+def parse_variant_specs(specs: str) -> list[tuple[str, str]]:
+    """
+    "thumb:webp,small:jpeg" 형식의 설정을 [(size, fmt), ...]로 변환합니다. (잘못된 항목은 무시)
+    """
+    variants = []
+    for spec in specs.split(","):
+        size, _, fmt = spec.strip().partition(":")
+        if size in SCREENSHOT_VARIANT_SIZES and (fmt or "webp") in SCREENSHOT_VARIANT_FORMATS:
+            variants.append((size, fmt or "webp"))
+    return variants
+
+def pregenerate_screenshot_variants(source_path: str):
+    """
+    업로드 직후 SCREENSHOT_PREGENERATE_VARIANTS에 지정된 변형을 미리 만듭니다.
+    (BackgroundTasks에서 실행, 실패해도 요청 시 다시 생성되므로 로그만 남김)
+    """
+    for size, fmt in parse_variant_specs(SCREENSHOT_PREGENERATE_VARIANTS):
+        try:
+            generate_variant(source_path, size, fmt)
+        except Exception as e:
+            print(f"⚠️ 변형 이미지 생성 실패 ({source_path}, {size}:{fmt}): {e}")
+
+def build_cache_headers(file_path: str, variant_key: str = "original") -> dict:
+    """
+    이미지 응답용 ETag / Last-Modified / Cache-Control 헤더를 만듭니다.
+    해시 파일명은 내용이 곧 이름이므로 해시로, 그 외에는 수정 시각과 크기로 ETag를 만듭니다.
+    """
+    stat = os.stat(file_path)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    if SCREENSHOT_HASH_PATTERN.match(stem):
+        etag = f'"{stem}-{variant_key}"'
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        etag = f'"{int(stat.st_mtime)}-{stat.st_size}-{variant_key}"'
+        cache_control = DEFAULT_CACHE_CONTROL
+
+    last_modified = datetime.fromtimestamp(int(stat.st_mtime), tz=timezone.utc)
+    return {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": cache_control
+    }
+
+def is_not_modified(request_headers, cache_headers: dict) -> bool:
+    """
+    If-None-Match / If-Modified-Since 조건부 요청 헤더를 보고 304 응답 여부를 판단합니다.
+    (If-None-Match가 있으면 If-Modified-Since는 무시)
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match:
+        if if_none_match.strip() == "*":
+            return True
+        etags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return cache_headers["ETag"] in etags
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return parsedate_to_datetime(cache_headers["Last-Modified"]) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
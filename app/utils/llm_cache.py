@@ -0,0 +1,182 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional, Sequence
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+from app.core.config import (
+    LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_MAX_TEMPERATURE, LLM_CACHE_MODELS
+)
+
+# ✅ 호출 단위 캐시 우회 여부 (bypass_llm_cache 블록 안에서만 True)
+_bypass = ContextVar("llm_cache_bypass", default=False)
+
+@contextmanager
+def bypass_llm_cache():
+    """
+    블록 안의 LLM 호출은 캐시를 조회하지 않고 새로 실행합니다. (새 응답으로 캐시 갱신)
+    예: with bypass_llm_cache(): translate_chain.invoke(...)
+    """
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+def is_llm_cache_bypassed() -> bool:
+    return _bypass.get()
+
+def _loads_generations(text: str):
+    # langchain_core.load.loads는 beta 경고를 매번 출력하므로 여기서만 숨김
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", LangChainBetaWarning)
+        return loads(text)
+
+class SQLiteLLMCache(BaseCache):
+    """
+    LangChain 모델의 cache로 설치하는 SQLite 응답 캐시입니다.
+    키는 (모델 + 호출 파라미터 문자열, 렌더링된 프롬프트 메시지)의 해시이며
+    max_entries를 넘으면 마지막 사용 시각이 오래된 항목부터 삭제합니다.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                llm_string TEXT NOT NULL,
+                generations TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_accessed ON llm_cache (last_accessed)")
+        self._conn.commit()
+
+        # ✅ 모니터링용 지표
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.writes = 0
+        self.evicted = 0
+        self.errors = 0
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\n{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        if _bypass.get():
+            self.bypassed += 1
+            return None
+
+        key = self._key(prompt, llm_string)
+        try:
+            with self._lock:
+                row = self._conn.execute("SELECT generations FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE llm_cache SET last_accessed = ?, hits = hits + 1 WHERE key = ?", (time.time(), key)
+                    )
+                    self._conn.commit()
+            generations = _loads_generations(row[0]) if row is not None else None
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ LLM 캐시 조회 실패: {e}")
+            return None
+
+        if generations is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        now = time.time()
+        try:
+            generations = dumps(list(return_val))
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, llm_string, generations, created_at, last_accessed, hits) "
+                    "VALUES (?, ?, ?, ?, ?, 0)",
+                    (self._key(prompt, llm_string), llm_string, generations, now, now)
+                )
+                self._evict_overflow()
+                self._conn.commit()
+            self.writes += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ LLM 캐시 저장 실패: {e}")
+
+    def _evict_overflow(self):
+        # 최대 개수를 넘은 만큼 가장 오래 사용하지 않은 항목부터 삭제 (lock 안에서 호출)
+        overflow = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            cursor = self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_accessed LIMIT ?)",
+                (overflow,)
+            )
+            self.evicted += cursor.rowcount
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "bypassed": self.bypassed,
+            "writes": self.writes,
+            "evicted": self.evicted,
+            "errors": self.errors
+        }
+
+llm_response_cache = SQLiteLLMCache() if LLM_CACHE_ENABLED else None
+
+# ✅ 캐시를 설치한 LLM 이름 목록 (지표 조회용)
+cached_llm_names: list[str] = []
+
+def install_llm_cache(name: str, llm) -> bool:
+    """
+    temperature가 LLM_CACHE_MAX_TEMPERATURE 이하이거나 LLM_CACHE_MODELS에 이름이 있으면
+    해당 LLM에 응답 캐시를 설치합니다. 설치 여부를 반환합니다.
+    """
+    if llm_response_cache is None:
+        return False
+    temperature = getattr(llm, "temperature", None)
+    opted_in = name in LLM_CACHE_MODELS or (isinstance(temperature, (int, float)) and temperature <= LLM_CACHE_MAX_TEMPERATURE)
+    if not opted_in:
+        return False
+    llm.cache = llm_response_cache
+    if name not in cached_llm_names:
+        cached_llm_names.append(name)
+    return True
+
+def get_llm_cache_stats() -> dict:
+    if llm_response_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, "models": cached_llm_names, **llm_response_cache.stats()}
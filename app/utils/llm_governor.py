@@ -0,0 +1,293 @@
+import asyncio
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from fastapi import HTTPException
+from app.core.config import (
+    LLM_GOVERNOR_ENABLED, LLM_MAX_IN_FLIGHT, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT_SEC, LLM_MODEL_LIMITS
+)
+
+# ✅ 우선순위 (숫자가 작을수록 먼저 실행)
+PRIORITY_INTERACTIVE = "interactive"   # MBTI 질문/판정, SFX 번역, ComfyUI 변환
+PRIORITY_STANDARD = "standard"         # 요청 경로의 일지 생성 등 (기본값)
+PRIORITY_BATCH = "batch"               # 일지 작업(jobs) 워커, 야간 일지 배치
+PRIORITY_ORDER = {PRIORITY_INTERACTIVE: 0, PRIORITY_STANDARD: 1, PRIORITY_BATCH: 2}
+
+MAX_RETRY_AFTER_SEC = 60
+
+# ✅ 현재 호출의 우선순위 (llm_priority 블록 안에서만 바뀜, asyncio.to_thread / LangChain batch로 전달됨)
+_priority = ContextVar("llm_priority", default=PRIORITY_STANDARD)
+# ✅ 이미 슬롯을 잡은 호출 안에서 다시 잡지 않도록 (기본 _agenerate가 _generate를 스레드에서 부르는 경우 등)
+_holding = ContextVar("llm_governor_holding", default=False)
+
+@contextmanager
+def llm_priority(priority: str):
+    """
+    블록 안의 LLM 호출 우선순위를 지정합니다.
+    예: with llm_priority(PRIORITY_INTERACTIVE): generate_question(...)
+    """
+    if priority not in PRIORITY_ORDER:
+        raise ValueError(f"알 수 없는 우선순위입니다: {priority}")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+class ModelOverloadedError(HTTPException):
+    """
+    모델 대기열이 가득 찼거나(429) 대기 시간이 초과된(503) 경우의 예외입니다. Retry-After 헤더를 포함합니다.
+    """
+
+    def __init__(self, model: str, status_code: int, reason: str, retry_after: int):
+        super().__init__(
+            status_code=status_code,
+            detail=f"{model} 모델 요청이 많습니다 ({reason}). {retry_after}초 후 다시 시도해 주세요.",
+            headers={"Retry-After": str(retry_after)}
+        )
+        self.model = model
+        self.reason = reason
+        self.retry_after = retry_after
+
+class _Waiter:
+    def __init__(self, priority: str, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.priority = priority
+        self.granted = False
+        self.loop = loop
+        self.event = threading.Event() if loop is None else None
+        self.future = loop.create_future() if loop is not None else None
+
+    def notify(self):
+        if self.future is None:
+            self.event.set()
+            return
+        try:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+        except RuntimeError:
+            # 이벤트 루프가 이미 닫힘 (종료 중)
+            pass
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(True)
+
+class ModelGovernor:
+    """
+    Ollama 모델 하나의 동시 실행 수를 max_in_flight로 제한하고, 나머지는 우선순위 대기열에서 기다리게 합니다.
+    - interactive > standard > batch 순서로 실행 (같은 우선순위는 먼저 온 순서)
+    - 자기보다 앞선(같거나 높은 우선순위) 대기가 max_queue 이상이면 바로 429로 거절
+    - queue_timeout_sec 동안 차례가 오지 않으면 503으로 거절
+    batch 호출은 거절하지 않고 기다립니다. (일지 작업 대기열 / 배치 concurrency가 이미 개수를 제한)
+    """
+
+    def __init__(
+        self,
+        model: str,
+        max_in_flight: int = LLM_MAX_IN_FLIGHT,
+        max_queue: int = LLM_MAX_QUEUE,
+        queue_timeout_sec: float = LLM_QUEUE_TIMEOUT_SEC,
+        enabled: bool = LLM_GOVERNOR_ENABLED
+    ):
+        self.model = model
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout_sec = queue_timeout_sec
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._waiters: list[tuple[int, int, _Waiter]] = []
+        self._seq = itertools.count()
+        self.in_flight = 0
+
+        # ✅ 모니터링용 지표 (대기 시간은 우선순위별)
+        self.rejected = 0
+        self.timed_out = 0
+        self.completed = 0
+        self.event_loop_blocking_calls = 0
+        self._total_run_ms = 0.0
+        self._wait_stats = {
+            priority: {"admitted": 0, "total_wait_ms": 0.0, "max_wait_ms": 0.0} for priority in PRIORITY_ORDER
+        }
+
+    def _retry_after(self, ahead: int) -> int:
+        # 평균 실행 시간 x (앞선 대기 수 / 동시 실행 수)로 대략적인 재시도 시점 계산
+        avg_run_sec = self._total_run_ms / self.completed / 1000 if self.completed else 1.0
+        estimate = math.ceil(avg_run_sec * (ahead + 1) / self.max_in_flight)
+        return max(1, min(MAX_RETRY_AFTER_SEC, estimate))
+
+    def _enqueue(self, priority: str, loop: Optional[asyncio.AbstractEventLoop] = None) -> Optional[_Waiter]:
+        """
+        바로 실행할 수 있으면 None, 아니면 대기열에 넣은 _Waiter를 반환합니다. 대기열이 가득 차면 429 예외.
+        """
+        order = PRIORITY_ORDER[priority]
+        with self._lock:
+            if self.in_flight < self.max_in_flight and not self._waiters:
+                self.in_flight += 1
+                return None
+            if priority != PRIORITY_BATCH:
+                ahead = sum(1 for waiting_order, _, _ in self._waiters if waiting_order <= order)
+                if ahead >= self.max_queue:
+                    self.rejected += 1
+                    raise ModelOverloadedError(self.model, 429, "대기열 가득 참", self._retry_after(ahead))
+            waiter = _Waiter(priority, loop)
+            heapq.heappush(self._waiters, (order, next(self._seq), waiter))
+            return waiter
+
+    def _cancel(self, waiter: _Waiter) -> bool:
+        # 대기 취소 (시간 초과 / 요청 취소). 이미 차례를 받았으면 False
+        with self._lock:
+            if waiter.granted:
+                return False
+            self._waiters = [item for item in self._waiters if item[2] is not waiter]
+            heapq.heapify(self._waiters)
+            return True
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+            while self._waiters and self.in_flight < self.max_in_flight:
+                _, _, waiter = heapq.heappop(self._waiters)
+                waiter.granted = True
+                self.in_flight += 1
+                waiter.notify()
+
+    def _timeout_error(self, priority: str) -> ModelOverloadedError:
+        self.timed_out += 1
+        with self._lock:
+            ahead = sum(1 for waiting_order, _, _ in self._waiters if waiting_order <= PRIORITY_ORDER[priority])
+        return ModelOverloadedError(self.model, 503, "대기 시간 초과", self._retry_after(ahead))
+
+    def _queue_timeout(self, priority: str) -> Optional[float]:
+        return None if priority == PRIORITY_BATCH else self.queue_timeout_sec
+
+    def _record_wait(self, priority: str, started: float):
+        wait_ms = (time.perf_counter() - started) * 1000
+        stats = self._wait_stats[priority]
+        stats["admitted"] += 1
+        stats["total_wait_ms"] += wait_ms
+        stats["max_wait_ms"] = max(stats["max_wait_ms"], wait_ms)
+
+    def _record_run(self, started: float):
+        self.completed += 1
+        self._total_run_ms += (time.perf_counter() - started) * 1000
+
+    def _warn_if_event_loop_thread(self):
+        # 이벤트 루프 스레드에서 동기 슬롯을 기다리면 루프 전체가 멈춤 → async 경로는 ainvoke 또는 asyncio.to_thread를 써야 함
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self.event_loop_blocking_calls += 1
+        print(
+            f"⚠️ [LLM GOVERNOR] {self.model} 동기 호출이 이벤트 루프 스레드에서 실행됨 "
+            f"(누적 {self.event_loop_blocking_calls}회) → ainvoke 또는 asyncio.to_thread 사용 필요"
+        )
+
+    @contextmanager
+    def slot(self):
+        """
+        동기 호출용 실행 슬롯. 차례가 올 때까지 현재 스레드에서 기다립니다.
+        이벤트 루프가 실행 중인 스레드에서 호출되면 경고를 출력하고 event_loop_blocking_calls를 늘립니다.
+        """
+        if not self.enabled or _holding.get():
+            yield
+            return
+        self._warn_if_event_loop_thread()
+        priority = _priority.get()
+        started = time.perf_counter()
+        waiter = self._enqueue(priority)
+        if waiter is not None and not waiter.event.wait(self._queue_timeout(priority)) and self._cancel(waiter):
+            raise self._timeout_error(priority)
+        self._record_wait(priority, started)
+
+        token = _holding.set(True)
+        run_started = time.perf_counter()
+        try:
+            yield
+        finally:
+            _holding.reset(token)
+            self._record_run(run_started)
+            self._release()
+
+    @asynccontextmanager
+    async def aslot(self):
+        """
+        비동기 호출용 실행 슬롯. 이벤트 루프를 막지 않고 기다립니다.
+        """
+        if not self.enabled or _holding.get():
+            yield
+            return
+        priority = _priority.get()
+        started = time.perf_counter()
+        waiter = self._enqueue(priority, asyncio.get_running_loop())
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), self._queue_timeout(priority))
+            except asyncio.TimeoutError:
+                if self._cancel(waiter):
+                    raise self._timeout_error(priority)
+            except asyncio.CancelledError:
+                # 요청이 취소됨 → 대기열에서 빼거나, 이미 받은 슬롯은 반납
+                if not self._cancel(waiter):
+                    self._release()
+                raise
+        self._record_wait(priority, started)
+
+        token = _holding.set(True)
+        run_started = time.perf_counter()
+        try:
+            yield
+        finally:
+            _holding.reset(token)
+            self._record_run(run_started)
+            self._release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            queued = {priority: 0 for priority in PRIORITY_ORDER}
+            for _, _, waiter in self._waiters:
+                queued[waiter.priority] += 1
+            in_flight = self.in_flight
+        return {
+            "enabled": self.enabled,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "queue_timeout_sec": self.queue_timeout_sec,
+            "in_flight": in_flight,
+            "queued": queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "event_loop_blocking_calls": self.event_loop_blocking_calls,
+            "avg_run_ms": round(self._total_run_ms / self.completed, 1) if self.completed else 0.0,
+            "queue_wait_ms": {
+                priority: {
+                    "admitted": stats["admitted"],
+                    "avg": round(stats["total_wait_ms"] / stats["admitted"], 1) if stats["admitted"] else 0.0,
+                    "max": round(stats["max_wait_ms"], 1)
+                }
+                for priority, stats in self._wait_stats.items()
+            }
+        }
+
+# ✅ Ollama 모델 이름별 ModelGovernor (같은 모델을 쓰는 LLM 객체끼리 공유)
+governors: dict[str, ModelGovernor] = {}
+_governors_lock = threading.Lock()
+
+def get_governor(model: str) -> ModelGovernor:
+    governor = governors.get(model)
+    if governor is not None:
+        return governor
+    with _governors_lock:
+        if model not in governors:
+            max_in_flight, max_queue = LLM_MODEL_LIMITS.get(model, (LLM_MAX_IN_FLIGHT, LLM_MAX_QUEUE))
+            governors[model] = ModelGovernor(model, max_in_flight=max_in_flight, max_queue=max_queue)
+        return governors[model]
+
+def get_llm_governor_stats() -> dict:
+    return {"enabled": LLM_GOVERNOR_ENABLED, "models": {model: governor.stats() for model, governor in governors.items()}}
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from app.core.database import get_async_pg_session
+from app.core.config import (
+    LOG_BUFFER_MAX_ROWS, LOG_BUFFER_FLUSH_MS, LOG_BUFFER_MAX_QUEUE,
+    LOG_BUFFER_MAX_RETRIES, LOG_BUFFER_RETRY_BACKOFF_MS, LOG_BUFFER_DEAD_LETTER_PATH
+)
+from app.utils.log_helper import bulk_insert_logs_async
+
+class LogWriteBuffer:
+    """
+    로그 INSERT를 모아서 처리하는 프로세스 내 비동기 write-behind 버퍼입니다.
+    max_rows개가 쌓이거나 flush_interval_ms가 지나면 한 트랜잭션으로 flush합니다.
+    flush가 실패하면 max_retries번까지 대기 시간을 늘려 가며 다시 시도하고, 그래도 실패하면
+    한 행씩 나눠 저장합니다. 끝까지 저장되지 않은 행은 dead-letter 파일(JSONL)에 남깁니다.
+    """
+
+    def __init__(
+        self,
+        max_rows: int = LOG_BUFFER_MAX_ROWS,
+        flush_interval_ms: int = LOG_BUFFER_FLUSH_MS,
+        max_queue_size: int = LOG_BUFFER_MAX_QUEUE,
+        max_retries: int = LOG_BUFFER_MAX_RETRIES,
+        retry_backoff_ms: int = LOG_BUFFER_RETRY_BACKOFF_MS,
+        dead_letter_path: str = LOG_BUFFER_DEAD_LETTER_PATH,
+        session_factory=get_async_pg_session
+    ):
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_queue_size = max_queue_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff_ms / 1000
+        self.dead_letter_path = dead_letter_path
+        self.session_factory = session_factory
+
+        self.queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._closing = False
+
+        # ✅ 튜닝용 지표
+        self.enqueued = 0
+        self.flushed_rows = 0
+        self.failed_rows = 0
+        self.flush_count = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+        self.retries = 0
+        self.row_fallbacks = 0
+        self.dead_lettered_rows = 0
+        self.last_error: str | None = None
+        self.recent_dead_letters: deque = deque(maxlen=20)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+        print(f"✅ [INFO] 로그 버퍼 시작 (max_rows={self.max_rows}, flush={int(self.flush_interval * 1000)}ms)")
+
+    async def stop(self):
+        """
+        새 로그 수신을 멈추고 큐에 남은 로그를 모두 flush한 뒤 종료합니다.
+        """
+        if not self.running:
+            return
+        self._closing = True
+        await self._task
+        print(f"✅ [INFO] 로그 버퍼 종료 (flushed={self.flushed_rows}, failed={self.failed_rows})")
+
+    async def put(self, row: dict):
+        """
+        로그 한 건을 버퍼에 넣습니다. 큐가 가득 차면 자리가 날 때까지 대기합니다.
+        """
+        if not self.running or self._closing:
+            raise RuntimeError("로그 버퍼가 실행 중이 아닙니다.")
+        await self.queue.put(row)
+        self.enqueued += 1
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while not (self._closing and self.queue.empty()):
+            batch = []
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout=self.flush_interval))
+            except asyncio.TimeoutError:
+                continue
+
+            # ✅ 첫 행 이후 flush 주기 안에 들어온 행을 max_rows까지 모음
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.max_rows:
+                if self._closing:
+                    if self.queue.empty():
+                        break
+                    batch.append(self.queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[dict]):
+        started = time.perf_counter()
+        try:
+            # 1️⃣ 일시적인 오류(DB 재시작, 타임아웃)는 대기 시간을 늘려 가며 batch 전체를 다시 시도
+            for attempt in range(self.max_retries + 1):
+                try:
+                    await self._write(batch)
+                    self.flushed_rows += len(batch)
+                    return
+                except Exception as e:
+                    self.last_error = str(e)
+                    if attempt == self.max_retries:
+                        print(f"❌ [ERROR] 로그 버퍼 flush 실패 ({len(batch)}건, 재시도 {self.max_retries}회): {e}")
+                        break
+                    self.retries += 1
+                    await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+
+            # 2️⃣ 한 행 때문에 batch 전체가 실패하지 않도록 한 행씩 저장
+            self.row_fallbacks += 1
+            dead_letters = []
+            for row in batch:
+                try:
+                    await self._write([row])
+                    self.flushed_rows += 1
+                except Exception as e:
+                    dead_letters.append({"row": row, "error": str(e)})
+
+            # 3️⃣ 끝까지 저장되지 않은 행은 dead-letter 파일에 기록
+            if dead_letters:
+                self.failed_rows += len(dead_letters)
+                await asyncio.to_thread(self._write_dead_letters, dead_letters)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.flush_count += 1
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+
+    async def _write(self, batch: list[dict]):
+        async with self.session_factory() as db:
+            try:
+                await bulk_insert_logs_async(db, batch)
+            except Exception:
+                await db.rollback()
+                raise
+
+    def _write_dead_letters(self, dead_letters: list[dict]):
+        failed_at = time.time()
+        try:
+            os.makedirs(os.path.dirname(self.dead_letter_path) or ".", exist_ok=True)
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                for item in dead_letters:
+                    f.write(json.dumps({**item, "failed_at": failed_at}, ensure_ascii=False, default=str) + "\n")
+            self.dead_lettered_rows += len(dead_letters)
+        except Exception as e:
+            print(f"❌ [ERROR] 로그 dead-letter 기록 실패 ({len(dead_letters)}건): {e}")
+        for item in dead_letters:
+            self.recent_dead_letters.append({**item, "failed_at": failed_at})
+        print(f"🚨 [ERROR] 저장하지 못한 로그 {len(dead_letters)}건을 dead-letter에 기록: {self.dead_letter_path}")
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "max_queue_size": self.max_queue_size,
+            "enqueued": self.enqueued,
+            "flushed_rows": self.flushed_rows,
+            "failed_rows": self.failed_rows,
+            "flush_count": self.flush_count,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self._total_flush_ms / self.flush_count, 2) if self.flush_count else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 2),
+            "retries": self.retries,
+            "row_fallbacks": self.row_fallbacks,
+            "dead_lettered_rows": self.dead_lettered_rows,
+            "dead_letter_path": self.dead_letter_path,
+            "last_error": self.last_error,
+            "recent_dead_letters": list(self.recent_dead_letters)
+        }
+
+# ✅ 앱 전역에서 공유하는 버퍼 인스턴스
+log_buffer = LogWriteBuffer()
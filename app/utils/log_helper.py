@@ -1,14 +1,30 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, asc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import asc, insert, select
+from datetime import datetime, date
+from typing import Iterator, Optional
 import pandas as pd
 import os
 from pathlib import Path
 from dotenv import load_dotenv
 from app.models.models import UserLog
+from app.core.database import get_pg_session
+from app.utils.summary_helper import apply_summary_deltas, apply_summary_deltas_async
 
 load_dotenv()
 STATIC_BASE_URL = os.getenv("STATIC_BASE_URL")
 
+# ✅ 클라이언트가 전송하는 날짜 형식 (예: 2025.04.29-17.21.12)
+LOG_DATETIME_FORMAT = "%Y.%m.%d-%H.%M.%S"
+LOG_DATE_FORMAT = "%Y.%m.%d"
+
+def parse_log_datetime(value: str) -> datetime:
+    """
+    'YYYY.MM.DD-HH.MM.SS' 형식의 문자열을 datetime으로 변환합니다.
+    형식이 맞지 않으면 ValueError를 발생시킵니다.
+    """
+    return datetime.strptime(value, LOG_DATETIME_FORMAT)
+
 def extract_date_only(ingame_datetime: str) -> str:
     """
     예시: '0001.01.01-13.17.29' -> '0001.01.01' 로 변환
@@ -17,37 +33,37 @@ def extract_date_only(ingame_datetime: str) -> str:
         return ""
     return ingame_datetime.split('-')[0]  # '-'를 기준으로 앞부분만 추출
 
-def get_logs_by_user_and_date(db: Session, session_id: str, user_id: str, ingame_date: str) -> pd.DataFrame:
+def build_day_log_query(session_id: str, user_id: str, ingame_date: str):
     """
-    DB에서 session_id, user_id, ingame_date에 해당하는 로그를 조회합니다.
-    
-    Args:
-        db (Session): SQLAlchemy 세션
-        session_id (str): 세션 ID
-        user_id (str): 사용자 ID
-        ingame_date (str): 조회할 인게임 날짜 (0001.01.01-09.15.55 형식)
-
-    Returns:
-        pd.DataFrame: 조회된 로그 데이터프레임
+    session_id, user_id, ingame_date에 해당하는 로그 조회 쿼리를 만듭니다.
+    날짜 형식이 잘못되었으면 None을 반환합니다.
     """
-    
     # ✅ 날짜 포맷 변환 (extract_date_only 함수 활용)
     formatted_date = extract_date_only(ingame_date)
+    try:
+        target_date = datetime.strptime(formatted_date, LOG_DATE_FORMAT).date()
+    except ValueError:
+        print(f"❌ 잘못된 날짜 형식입니다: {ingame_date}")
+        return None
 
-    # ✅ 쿼리 실행 (to_char 사용)
-    logs = db.query(UserLog).filter(
+    # ✅ (session_id, user_id, ingame_date) 복합 인덱스 사용
+    return select(UserLog).where(
         UserLog.session_id == session_id,
         UserLog.user_id == user_id,
-        func.to_char(UserLog.ingame_datetime, 'YYYY.MM.DD') == formatted_date
-    ).order_by(asc(UserLog.ingame_datetime)).all()
+        UserLog.ingame_date == target_date
+    ).order_by(asc(UserLog.ingame_datetime))
 
+def logs_to_dataframe(logs: list[UserLog]) -> pd.DataFrame:
+    """
+    조회된 UserLog 목록을 일지 생성용 DataFrame으로 변환합니다.
+    """
     # ✅ 조회 결과 확인
     if not logs:
         print("❌ 조회된 로그가 없습니다.")
         return pd.DataFrame()
 
     # ✅ DataFrame 생성
-    logs_df = pd.DataFrame([{
+    return pd.DataFrame([{
         "user_id": log.user_id,
         "timestamp": log.timestamp,
         "ingame_datetime": log.ingame_datetime,
@@ -58,8 +74,171 @@ def get_logs_by_user_and_date(db: Session, session_id: str, user_id: str, ingame
         "with": log.with_,
         "screenshot": log.screenshot if log.screenshot else ""
     } for log in logs])
+
+def get_logs_by_user_and_date(db: Session, session_id: str, user_id: str, ingame_date: str) -> pd.DataFrame:
+    """
+    DB에서 session_id, user_id, ingame_date에 해당하는 로그를 조회합니다.
     
-    return logs_df
+    Args:
+        db (Session): SQLAlchemy 세션
+        session_id (str): 세션 ID
+        user_id (str): 사용자 ID
+        ingame_date (str): 조회할 인게임 날짜 (0001.01.01-09.15.55 형식)
+
+    Returns:
+        pd.DataFrame: 조회된 로그 데이터프레임
+    """
+    stmt = build_day_log_query(session_id, user_id, ingame_date)
+    if stmt is None:
+        return pd.DataFrame()
+    return logs_to_dataframe(db.scalars(stmt).all())
+
+async def get_logs_by_user_and_date_async(db: AsyncSession, session_id: str, user_id: str, ingame_date: str) -> pd.DataFrame:
+    """
+    get_logs_by_user_and_date의 비동기 버전입니다.
+    """
+    stmt = build_day_log_query(session_id, user_id, ingame_date)
+    if stmt is None:
+        return pd.DataFrame()
+    result = await db.scalars(stmt)
+    return logs_to_dataframe(result.all())
+
+def bulk_insert_logs(db: Session, rows: list[dict]) -> int:
+    """
+    여러 개의 로그를 하나의 트랜잭션에서 multi-row INSERT로 저장합니다.
+    같은 트랜잭션에서 daily_activity_summary도 증분 갱신합니다.
+
+    Args:
+        db (Session): SQLAlchemy 세션
+        rows (list[dict]): UserLog 컬럼명을 키로 가지는 로그 딕셔너리 목록
+
+    Returns:
+        int: 저장된 로그 개수
+    """
+    if not rows:
+        return 0
+
+    # ✅ executemany 대신 insertmanyvalues로 묶어서 한 번에 전송
+    db.execute(insert(UserLog), rows)
+    apply_summary_deltas(db, rows)
+    db.commit()
+    return len(rows)
+
+async def bulk_insert_logs_async(db: AsyncSession, rows: list[dict]) -> int:
+    """
+    bulk_insert_logs의 비동기 버전입니다.
+    """
+    if not rows:
+        return 0
+
+    await db.execute(insert(UserLog), rows)
+    await apply_summary_deltas_async(db, rows)
+    await db.commit()
+    return len(rows)
+
+def parse_log_date(value: str) -> date:
+    """
+    'YYYY.MM.DD' (또는 'YYYY.MM.DD-HH.MM.SS') 형식의 문자열을 date로 변환합니다.
+    """
+    return datetime.strptime(extract_date_only(value), LOG_DATE_FORMAT).date()
+
+def log_to_dict(log: UserLog) -> dict:
+    """
+    UserLog 객체를 API 응답용 딕셔너리로 변환합니다.
+    """
+    return {
+        "id": log.id,
+        "session_id": log.session_id,
+        "user_id": log.user_id,
+        "timestamp": log.timestamp,
+        "ingame_datetime": log.ingame_datetime,
+        "location": log.location,
+        "action_type": log.action_type,
+        "action_name": log.action_name,
+        "detail": log.detail,
+        "with_": log.with_,
+        "screenshot": log.screenshot
+    }
+
+def build_log_filters(
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    action_type: Optional[str] = None
+) -> list:
+    """
+    로그 목록 조회용 WHERE 조건 목록을 만듭니다. (None인 조건은 제외)
+    날짜 범위는 ingame_date 기준이며 start_date, end_date 모두 포함합니다.
+    """
+    filters = []
+    if user_id:
+        filters.append(UserLog.user_id == user_id)
+    if session_id:
+        filters.append(UserLog.session_id == session_id)
+    if start_date:
+        filters.append(UserLog.ingame_date >= start_date)
+    if end_date:
+        filters.append(UserLog.ingame_date <= end_date)
+    if action_type:
+        filters.append(UserLog.action_type == action_type)
+    return filters
+
+def build_log_page_query(filters: list, after_id: Optional[int], limit: int):
+    stmt = select(UserLog).where(*filters)
+    if after_id is not None:
+        stmt = stmt.where(UserLog.id > after_id)
+    # ✅ 다음 페이지 존재 여부 확인을 위해 1개 더 조회
+    return stmt.order_by(asc(UserLog.id)).limit(limit + 1)
+
+def to_log_page(logs: list[UserLog], limit: int) -> tuple[list[dict], Optional[int]]:
+    has_next = len(logs) > limit
+    logs = logs[:limit]
+    next_cursor = logs[-1].id if has_next else None
+    return [log_to_dict(log) for log in logs], next_cursor
+
+def fetch_log_page(db: Session, filters: list, after_id: Optional[int] = None, limit: int = 100) -> tuple[list[dict], Optional[int]]:
+    """
+    id 기준 keyset 페이지네이션으로 로그를 조회합니다.
+
+    Args:
+        db (Session): SQLAlchemy 세션
+        filters (list): build_log_filters로 만든 조건 목록
+        after_id (int, optional): 이전 페이지의 마지막 id (이 id보다 큰 로그부터 조회)
+        limit (int): 페이지 크기
+
+    Returns:
+        tuple[list[dict], Optional[int]]: (로그 목록, 다음 페이지 커서 / 마지막 페이지면 None)
+    """
+    logs = db.scalars(build_log_page_query(filters, after_id, limit)).all()
+    return to_log_page(logs, limit)
+
+async def fetch_log_page_async(db: AsyncSession, filters: list, after_id: Optional[int] = None, limit: int = 100) -> tuple[list[dict], Optional[int]]:
+    """
+    fetch_log_page의 비동기 버전입니다.
+    """
+    result = await db.scalars(build_log_page_query(filters, after_id, limit))
+    return to_log_page(result.all(), limit)
+
+def stream_logs(filters: list, after_id: Optional[int] = None, chunk_size: int = 1000) -> Iterator[dict]:
+    """
+    서버 사이드 커서로 로그를 chunk_size씩 가져오면서 한 행씩 반환합니다.
+    전체 결과를 메모리에 올리지 않으므로 테이블 크기와 무관하게 메모리 사용량이 일정합니다.
+    스트리밍 응답이 끝날 때까지 세션을 유지해야 하므로 자체 세션을 사용합니다.
+    """
+    stmt = select(UserLog).where(*filters)
+    if after_id is not None:
+        stmt = stmt.where(UserLog.id > after_id)
+    stmt = stmt.order_by(asc(UserLog.id)).execution_options(yield_per=chunk_size)
+
+    db = get_pg_session()
+    try:
+        for log in db.scalars(stmt):
+            yield log_to_dict(log)
+            # ✅ 이미 내보낸 객체는 identity map에서 제거
+            db.expunge(log)
+    finally:
+        db.close()
 
 def to_relative_screenshot_path(full_path: str) -> str:
     """
@@ -0,0 +1,208 @@
+import asyncio
+import time
+from typing import Callable, Optional
+from PIL import Image
+from app.core.config import MODEL_WARMUP_ENABLED, MODEL_WARMUP_TARGETS, MODEL_KEEP_ALIVE, MODEL_KEEP_ALIVE_INTERVAL_SEC
+from app.models.models import (
+    llm_question, llm_evaluator, diary_llm, emo_llm, sfx_llm, comfy_llm,
+    embedding_model, c_embedding_model
+)
+from app.models.registry import model_registry
+
+WARMUP_TEXT = "warm-up"
+
+def _ping_llm(llm) -> Callable[[], None]:
+    """
+    토큰 1개만 생성하는 호출로 Ollama 모델을 메모리에 올리고 keep_alive 동안 유지합니다.
+    응답 캐시에 걸리지 않도록 cache를 끈 복사본으로 호출합니다.
+    """
+    def ping():
+        llm.model_copy(update={"cache": False, "num_predict": 1, "keep_alive": MODEL_KEEP_ALIVE}).invoke(WARMUP_TEXT)
+    return ping
+
+def _ping_embedding(embeddings) -> Callable[[], None]:
+    def ping():
+        embeddings.embed_query(WARMUP_TEXT)
+    return ping
+
+def _warm_caption_model():
+    # BLIP 첫 forward(GPU 이동 / CUDA 커널 준비)를 빈 이미지로 미리 실행
+    from app.utils.image_helper import caption_image
+    caption_image(Image.new("RGB", (64, 64)))
+
+def _warm_faiss():
+    # MBTI 어투 RAG의 첫 FAISS 검색 (인덱스 로드 + 쿼리 임베딩)
+    from app.api.diary.rag import get_vectorstore
+    get_vectorstore().similarity_search("ISTJ", k=1)
+
+# ✅ (이름, warm-up 함수, keep-alive 대상 여부)
+# Ollama 모델은 일정 시간 요청이 없으면 내려가므로 keep-alive 대상, 프로세스 안의 모델은 warm-up만
+DEFAULT_TARGETS = [
+    ("llm_question", _ping_llm(llm_question), True),
+    ("llm_evaluator", _ping_llm(llm_evaluator), True),
+    ("diary_llm", _ping_llm(diary_llm), True),
+    ("emo_llm", _ping_llm(emo_llm), True),
+    ("sfx_llm", _ping_llm(sfx_llm), True),
+    ("comfy_llm", _ping_llm(comfy_llm), True),
+    ("embedding_model", _ping_embedding(embedding_model), True),
+    ("c_embedding_model", _ping_embedding(c_embedding_model), False),
+    ("caption_model", _warm_caption_model, False),
+    ("faiss_retriever", _warm_faiss, False),
+]
+
+# ✅ 프로세스 안의 warm-up 대상이 로드하는 model_registry 리소스 (유휴 언로드되면 다시 warm-up)
+TARGET_RESOURCES = {
+    "c_embedding_model": (f"sentence_transformer:{c_embedding_model.model_name}",),
+    "caption_model": ("image_processor", "caption_model"),
+    "faiss_retriever": ("mbti_vector_stores",),
+}
+
+def select_targets(selection: list[str]) -> list[tuple[str, Callable[[], None], bool]]:
+    """
+    MODEL_WARMUP_TARGETS 값으로 warm-up 대상을 고릅니다.
+    - "all": 전체
+    - "ollama": keep-alive 대상(Ollama 모델)만 → /log만 처리하는 워커처럼 프로세스 안에 무거운 모델을 올리지 않을 때
+    - 그 외: 대상 이름 목록 (예: ["diary_llm", "emo_llm", "c_embedding_model"])
+    """
+    if "all" in selection:
+        return list(DEFAULT_TARGETS)
+    if "ollama" in selection:
+        return [target for target in DEFAULT_TARGETS if target[2]]
+    names = {name for name, _, _ in DEFAULT_TARGETS}
+    unknown = [name for name in selection if name not in names]
+    if unknown:
+        raise ValueError(f"알 수 없는 warm-up 대상입니다: {unknown} (가능한 값: all, ollama, {', '.join(sorted(names))})")
+    return [target for target in DEFAULT_TARGETS if target[0] in selection]
+
+class ModelWarmup:
+    """
+    앱 시작 시 모든 모델에 작은 호출을 보내 미리 로드하고(warm-up),
+    이후 interval_sec마다 Ollama 모델에 다시 호출을 보내 메모리에서 내려가지 않게 합니다.(keep-alive)
+    모든 대상의 warm-up이 한 번 이상 성공해야 ready가 됩니다. 실패한 대상은 keep-alive 주기마다 다시 시도합니다.
+    MODEL_IDLE_UNLOAD_SEC로 언로드된 BLIP / BGE-m3-ko는 warm-up되지 않은 상태로 보고 keep-alive 주기에 다시 올립니다.
+    (유휴 언로드로 메모리를 아끼려면 해당 모델을 MODEL_WARMUP_TARGETS에서 빼야 함)
+    """
+
+    def __init__(
+        self,
+        targets: Optional[list[tuple[str, Callable[[], None], bool]]] = None,
+        interval_sec: int = MODEL_KEEP_ALIVE_INTERVAL_SEC,
+        enabled: bool = MODEL_WARMUP_ENABLED
+    ):
+        self.targets = select_targets(MODEL_WARMUP_TARGETS) if targets is None else targets
+        self.interval_sec = interval_sec
+        self.enabled = enabled
+
+        self._task: Optional[asyncio.Task] = None
+        self.started_at: Optional[float] = None
+        self.warmup_finished_at: Optional[float] = None
+        self.status = {
+            name: {
+                "keep_alive": keep_alive, "warmed": False, "warmup_ms": None,
+                "last_ping_at": None, "last_ping_ms": None, "pings": 0, "failures": 0, "rewarms": 0, "last_error": None
+            }
+            for name, _, keep_alive in self.targets
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def ready(self) -> bool:
+        if not self.enabled:
+            return True
+        return all(status["warmed"] and not self._unloaded(name) for name, status in self.status.items())
+
+    @staticmethod
+    def _unloaded(name: str) -> bool:
+        # warm-up으로 올린 리소스가 유휴 언로드로 내려갔는지 확인
+        resources = model_registry.resources
+        return any(
+            resource in resources and not resources[resource].loaded
+            for resource in TARGET_RESOURCES.get(name, ())
+        )
+
+    async def start(self):
+        """
+        warm-up / keep-alive 루프를 백그라운드로 시작합니다. (서버는 바로 요청을 받고 /ready만 503)
+        """
+        if not self.enabled:
+            print("⚠️ [INFO] 모델 warm-up 비활성화 (MODEL_WARMUP_ENABLED=false)")
+            return
+        if self.running:
+            return
+        self.started_at = time.time()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self):
+        await self.warm_up()
+        while True:
+            await asyncio.sleep(self.interval_sec)
+            await self.keep_alive()
+
+    async def warm_up(self):
+        # GPU 메모리를 한꺼번에 잡지 않도록 대상은 하나씩 순서대로 로드
+        print(f"🔥 [INFO] 모델 warm-up 시작 ({len(self.targets)}개)")
+        for name, fn, _ in self.targets:
+            await self._call(name, fn)
+        self.warmup_finished_at = time.time()
+        elapsed = self.warmup_finished_at - self.started_at if self.started_at else 0.0
+        failed = [name for name, status in self.status.items() if not status["warmed"]]
+        if failed:
+            print(f"⚠️ [INFO] 모델 warm-up 일부 실패 ({elapsed:.1f}s): {failed} → keep-alive 주기마다 재시도")
+        else:
+            print(f"✅ [INFO] 모델 warm-up 완료 ({elapsed:.1f}s)")
+
+    async def keep_alive(self):
+        # keep-alive 대상 + 아직 warm-up에 성공하지 못한 대상 + 유휴 언로드된 대상
+        for name, fn, keep_alive in self.targets:
+            status = self.status[name]
+            if status["warmed"] and self._unloaded(name):
+                status["warmed"] = False
+                status["rewarms"] += 1
+                print(f"🔥 [INFO] {name} 유휴 언로드됨 → 다시 warm-up")
+            if keep_alive or not status["warmed"]:
+                await self._call(name, fn)
+
+    async def _call(self, name: str, fn: Callable[[], None]):
+        status = self.status[name]
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(fn)
+        except Exception as e:
+            status["failures"] += 1
+            status["last_error"] = str(e)
+            print(f"❌ [ERROR] 모델 warm-up 실패 ({name}): {e}")
+            return
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        if not status["warmed"]:
+            status["warmed"] = True
+            status["warmup_ms"] = elapsed_ms
+        status["pings"] += 1
+        status["last_ping_at"] = time.time()
+        status["last_ping_ms"] = elapsed_ms
+        status["last_error"] = None
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "enabled": self.enabled,
+            "keep_alive": MODEL_KEEP_ALIVE,
+            "interval_sec": self.interval_sec,
+            "started_at": self.started_at,
+            "warmup_finished_at": self.warmup_finished_at,
+            "models": self.status
+        }
+
+model_warmup = ModelWarmup()
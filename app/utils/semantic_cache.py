@@ -0,0 +1,256 @@
+import copy
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Any, Callable, Optional
+import numpy as np
+from app.core.config import (
+    SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_AUDIT_RATE, SEMANTIC_CACHE_AUDIT_MIN_SIMILARITY
+)
+from app.models.models import c_embedding_model
+from app.utils.llm_cache import is_llm_cache_bypassed
+
+MAX_AUDIT_RECORDS = 200
+
+# ✅ false hit 점검(실제 함수 재실행)은 요청 경로 밖의 스레드 하나에서 순서대로 실행
+_audit_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="semantic-cache-audit")
+
+def normalize_prompt(text: str) -> str:
+    # 앞뒤 공백 제거 + 연속 공백 하나로 (완전 일치 조회용)
+    return re.sub(r"\s+", " ", text).strip()
+
+def _to_text(value: Any) -> str:
+    # 결과 비교용 문자열 (format_comfyui_prompt의 dict 결과는 positive/negative를 이어 붙임)
+    if isinstance(value, dict):
+        return " | ".join(", ".join(map(str, v)) if isinstance(v, list) else str(v) for v in value.values())
+    return str(value)
+
+class SemanticCache:
+    """
+    한글 프롬프트를 임베딩해서 의미가 거의 같은 이전 입력의 결과를 재사용하는 메모리 캐시입니다.
+    예: "파도 소리" / "파도소리" / "잔잔한 파도 소리"
+    - 완전히 같은 입력(공백 정규화)은 임베딩 없이 바로 적중
+    - 그 외에는 가장 가까운 항목의 코사인 유사도가 threshold 이상이면 적중
+    - max_entries를 넘으면 마지막 사용 시각이 가장 오래된 항목 삭제
+    - 근사 적중의 audit_rate 비율만큼 백그라운드에서 실제 함수를 다시 실행해
+      결과 유사도가 audit_min_similarity보다 낮으면 false hit로 기록하고,
+      적중했던 항목은 삭제(다른 근사 적중에 다시 쓰이지 않도록)한 뒤 이번 입력의 실제 결과를 저장
+    """
+
+    def __init__(
+        self,
+        name: str,
+        embeddings=c_embedding_model,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        audit_rate: float = SEMANTIC_CACHE_AUDIT_RATE,
+        audit_min_similarity: float = SEMANTIC_CACHE_AUDIT_MIN_SIMILARITY,
+        enabled: bool = SEMANTIC_CACHE_ENABLED
+    ):
+        self.name = name
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.audit_rate = audit_rate
+        self.audit_min_similarity = audit_min_similarity
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._keys: list[str] = []
+        self._values: list[Any] = []
+        self._last_used: list[float] = []
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._index: dict[str, int] = {}
+
+        # ✅ 모니터링용 지표
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evicted = 0
+        self.errors = 0
+        self.audited = 0
+        self.false_hits = 0
+        self.false_hit_evictions = 0
+        self.audit_log: deque = deque(maxlen=MAX_AUDIT_RECORDS)
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, text: str) -> tuple[Optional[Any], Optional[dict]]:
+        """
+        (결과, 적중 정보)를 반환합니다. 적중하지 않으면 (None, None)
+        적중 정보: {"matched": 캐시된 입력, "similarity": 유사도, "exact": 완전 일치 여부}
+        """
+        key = normalize_prompt(text)
+        with self._lock:
+            position = self._index.get(key)
+            if position is not None:
+                self._last_used[position] = time.time()
+                self.exact_hits += 1
+                return copy.deepcopy(self._values[position]), {"matched": key, "similarity": 1.0, "exact": True}
+
+        vector = self._embed(key)
+        with self._lock:
+            if not self._keys:
+                self.misses += 1
+                return None, None
+            similarities = self._vectors @ vector
+            position = int(np.argmax(similarities))
+            similarity = float(similarities[position])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None, None
+            self._last_used[position] = time.time()
+            self.semantic_hits += 1
+            return copy.deepcopy(self._values[position]), {
+                "matched": self._keys[position], "similarity": round(similarity, 4), "exact": False
+            }
+
+    def put(self, text: str, value: Any):
+        key = normalize_prompt(text)
+        vector = self._embed(key)
+        with self._lock:
+            position = self._index.get(key)
+            if position is not None:
+                self._values[position] = copy.deepcopy(value)
+                self._last_used[position] = time.time()
+                return
+            if len(self._keys) >= self.max_entries:
+                self._evict_lru()
+            self._keys.append(key)
+            self._values.append(copy.deepcopy(value))
+            self._last_used.append(time.time())
+            self._vectors = vector[np.newaxis, :] if not self._vectors.size else np.vstack([self._vectors, vector])
+            self._index[key] = len(self._keys) - 1
+
+    def _remove(self, position: int):
+        # 항목 삭제 후 위치 인덱스 재구성 (lock 안에서 호출)
+        for items in (self._keys, self._values, self._last_used):
+            del items[position]
+        self._vectors = np.delete(self._vectors, position, axis=0)
+        self._index = {key: i for i, key in enumerate(self._keys)}
+
+    def _evict_lru(self):
+        # 마지막 사용 시각이 가장 오래된 항목 삭제 (lock 안에서 호출)
+        self._remove(int(np.argmin(self._last_used)))
+        self.evicted += 1
+
+    def invalidate(self, text: str) -> bool:
+        """
+        입력에 해당하는 항목을 삭제합니다. 이미 없으면 False
+        """
+        key = normalize_prompt(text)
+        with self._lock:
+            position = self._index.get(key)
+            if position is None:
+                return False
+            self._remove(position)
+            return True
+
+    def audit(self, text: str, cached: Any, hit: dict, fn: Callable, *args, **kwargs):
+        """
+        근사 적중 결과를 실제 실행 결과와 비교해 false hit 여부를 기록합니다. (백그라운드 스레드에서 실행)
+        """
+        try:
+            actual = fn(*args, **kwargs)
+            similarity = float(self._embed(_to_text(cached)) @ self._embed(_to_text(actual)))
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ [SEMANTIC CACHE] {self.name} 적중 점검 실패: {e}")
+            return
+
+        false_hit = similarity < self.audit_min_similarity
+        self.audited += 1
+        self.audit_log.append({
+            "query": text,
+            "matched": hit["matched"],
+            "prompt_similarity": hit["similarity"],
+            "result_similarity": round(similarity, 4),
+            "false_hit": false_hit,
+            "at": time.time()
+        })
+        if false_hit:
+            self.false_hits += 1
+            print(f"🚨 [SEMANTIC CACHE] {self.name} false hit: '{text}' ≈ '{hit['matched']}' (결과 유사도 {similarity:.3f})")
+            # 잘못 재사용된 항목은 삭제 (그 사이 LRU로 이미 삭제됐을 수 있음)
+            if self.invalidate(hit["matched"]):
+                self.false_hit_evictions += 1
+            # 이번 입력은 실제 결과로 저장해 다음부터는 완전 일치로 적중
+            self.put(text, actual)
+
+    def stats(self, recent_audits: int = 20) -> dict:
+        with self._lock:
+            entries = len(self._keys)
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.exact_hits + self.semantic_hits) / lookups, 4) if lookups else 0.0,
+            "bypassed": self.bypassed,
+            "evicted": self.evicted,
+            "errors": self.errors,
+            "audit_rate": self.audit_rate,
+            "audited": self.audited,
+            "false_hits": self.false_hits,
+            "false_hit_evictions": self.false_hit_evictions,
+            "false_hit_ratio": round(self.false_hits / self.audited, 4) if self.audited else 0.0,
+            "recent_audits": list(self.audit_log)[-recent_audits:]
+        }
+
+# ✅ 이름별 SemanticCache (지표 조회용)
+semantic_caches: dict[str, SemanticCache] = {}
+
+def semantic_cached(name: str):
+    """
+    첫 번째 인자(한글 프롬프트)를 기준으로 의미 기반 캐시를 적용하는 데코레이터입니다.
+    bypass_llm_cache() 블록 안에서는 조회하지 않고 새 결과로 갱신합니다.
+    """
+    cache = semantic_caches.setdefault(name, SemanticCache(name))
+
+    def decorator(fn: Callable):
+        @wraps(fn)
+        def wrapper(text: str, *args, **kwargs):
+            if not cache.enabled:
+                return fn(text, *args, **kwargs)
+
+            if is_llm_cache_bypassed():
+                cache.bypassed += 1
+            else:
+                try:
+                    cached, hit = cache.lookup(text)
+                except Exception as e:
+                    cache.errors += 1
+                    print(f"⚠️ [SEMANTIC CACHE] {name} 조회 실패: {e}")
+                    cached, hit = None, None
+                if hit is not None:
+                    print(f"♻️ [SEMANTIC CACHE] {name}: '{text}' ≈ '{hit['matched']}' ({hit['similarity']})")
+                    if not hit["exact"] and random.random() < cache.audit_rate:
+                        _audit_executor.submit(cache.audit, text, cached, hit, fn, text, *args, **kwargs)
+                    return cached
+
+            result = fn(text, *args, **kwargs)
+            try:
+                cache.put(text, result)
+            except Exception as e:
+                cache.errors += 1
+                print(f"⚠️ [SEMANTIC CACHE] {name} 저장 실패: {e}")
+            return result
+        wrapper.semantic_cache = cache
+        return wrapper
+    return decorator
+
+def get_semantic_cache_stats() -> dict:
+    return {name: cache.stats() for name, cache in semantic_caches.items()}
@@ -0,0 +1,93 @@
+import copy
+import threading
+from functools import wraps
+from typing import Callable, Hashable
+from app.utils.llm_cache import is_llm_cache_bypassed
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 호출을 하나로 합칩니다.
+    먼저 들어온 호출(leader)만 실제로 실행하고, 실행 중에 들어온 같은 키의 호출은
+    기다렸다가 같은 결과(또는 같은 예외)를 받습니다. 끝난 호출의 결과는 보관하지 않으므로 캐시가 아닙니다.
+    호출부는 스레드(asyncio.to_thread, 작업 워커 등)에서 실행되는 동기 함수 기준입니다.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+        # ✅ 모니터링용 지표
+        self.executed = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            # 결과 객체를 호출부끼리 공유하지 않도록 복사해서 반환
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = len(self._calls)
+        total = self.executed + self.coalesced
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+            "in_flight": in_flight,
+            "coalesced_ratio": round(self.coalesced / total, 4) if total else 0.0
+        }
+
+# ✅ 이름별 SingleFlight (지표 조회용)
+single_flight_groups: dict[str, SingleFlight] = {}
+
+def single_flight(name: str):
+    """
+    함수 인자를 키로 동시에 들어온 같은 호출을 합치는 데코레이터입니다.
+    bypass_llm_cache() 블록 안의 호출은 캐시를 쓰는 일반 호출과 합치지 않습니다. (새로 실행한 결과만 공유)
+    예: @single_flight("translate_to_english")
+    """
+    group = single_flight_groups.setdefault(name, SingleFlight(name))
+
+    def decorator(fn: Callable):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (is_llm_cache_bypassed(), args, tuple(sorted(kwargs.items())))
+            return group.do(key, fn, *args, **kwargs)
+        wrapper.single_flight = group
+        return wrapper
+    return decorator
+
+def get_single_flight_stats() -> dict:
+    return {name: group.stats() for name, group in single_flight_groups.items()}
@@ -0,0 +1,207 @@
+from collections import Counter
+from datetime import datetime, date
+from typing import Iterable, Optional
+from sqlalchemy import select, asc
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import UserLog, DailyActivitySummary
+
+def _row_value(row, key: str):
+    # dict(INSERT용 행)와 UserLog 객체를 모두 지원
+    return row.get(key) if isinstance(row, dict) else getattr(row, key)
+
+def _append_unique(items: list, value):
+    if value and value not in items:
+        items.append(value)
+
+def _ingame_date_of(row) -> Optional[date]:
+    ingame_datetime = _row_value(row, "ingame_datetime")
+    return ingame_datetime.date() if isinstance(ingame_datetime, datetime) else None
+
+def empty_delta() -> dict:
+    return {
+        "log_count": 0,
+        "action_type_counts": Counter(),
+        "action_name_counts": Counter(),
+        "locations": [],
+        "companions": [],
+        "screenshots": [],
+        "first_ingame_datetime": None,
+        "last_ingame_datetime": None
+    }
+
+def add_row_to_delta(delta: dict, row):
+    ingame_datetime = _row_value(row, "ingame_datetime")
+    delta["log_count"] += 1
+    delta["action_type_counts"][_row_value(row, "action_type")] += 1
+    delta["action_name_counts"][_row_value(row, "action_name")] += 1
+    _append_unique(delta["locations"], _row_value(row, "location"))
+    _append_unique(delta["companions"], _row_value(row, "with_"))
+    _append_unique(delta["screenshots"], _row_value(row, "screenshot"))
+    if ingame_datetime:
+        if delta["first_ingame_datetime"] is None or ingame_datetime < delta["first_ingame_datetime"]:
+            delta["first_ingame_datetime"] = ingame_datetime
+        if delta["last_ingame_datetime"] is None or ingame_datetime > delta["last_ingame_datetime"]:
+            delta["last_ingame_datetime"] = ingame_datetime
+
+def summarize_rows(rows: Iterable) -> dict:
+    """
+    로그 행들을 (session_id, user_id, ingame_date)별 변경분(delta)으로 집계합니다.
+    """
+    deltas = {}
+    for row in rows:
+        key = (_row_value(row, "session_id"), _row_value(row, "user_id"), _ingame_date_of(row))
+        if key[2] is None:
+            continue
+        add_row_to_delta(deltas.setdefault(key, empty_delta()), row)
+    return deltas
+
+def merge_delta(summary: DailyActivitySummary, delta: dict, replace: bool = False):
+    """
+    요약 행에 delta를 더합니다. replace=True이면 기존 값을 delta로 교체합니다.
+    (JSON 컬럼 변경 감지를 위해 항상 새 객체를 할당)
+    """
+    if replace:
+        base = empty_delta()
+    else:
+        base = {
+            "log_count": summary.log_count or 0,
+            "action_type_counts": Counter(summary.action_type_counts or {}),
+            "action_name_counts": Counter(summary.action_name_counts or {}),
+            "locations": list(summary.locations or []),
+            "companions": list(summary.companions or []),
+            "screenshots": list(summary.screenshots or []),
+            "first_ingame_datetime": summary.first_ingame_datetime,
+            "last_ingame_datetime": summary.last_ingame_datetime
+        }
+
+    base["log_count"] += delta["log_count"]
+    base["action_type_counts"].update(delta["action_type_counts"])
+    base["action_name_counts"].update(delta["action_name_counts"])
+    for field in ("locations", "companions", "screenshots"):
+        for value in delta[field]:
+            _append_unique(base[field], value)
+    firsts = [d for d in (base["first_ingame_datetime"], delta["first_ingame_datetime"]) if d]
+    lasts = [d for d in (base["last_ingame_datetime"], delta["last_ingame_datetime"]) if d]
+
+    summary.log_count = base["log_count"]
+    summary.action_type_counts = dict(base["action_type_counts"])
+    summary.action_name_counts = dict(base["action_name_counts"])
+    summary.locations = base["locations"]
+    summary.companions = base["companions"]
+    summary.screenshots = base["screenshots"]
+    summary.first_ingame_datetime = min(firsts) if firsts else None
+    summary.last_ingame_datetime = max(lasts) if lasts else None
+    summary.updated_at = datetime.now()
+
+def _summary_query(key: tuple):
+    session_id, user_id, ingame_date = key
+    return select(DailyActivitySummary).where(
+        DailyActivitySummary.session_id == session_id,
+        DailyActivitySummary.user_id == user_id,
+        DailyActivitySummary.ingame_date == ingame_date
+    ).with_for_update()
+
+def new_summary_row(key: tuple) -> DailyActivitySummary:
+    session_id, user_id, ingame_date = key
+    return DailyActivitySummary(
+        session_id=session_id,
+        user_id=user_id,
+        ingame_date=ingame_date,
+        log_count=0,
+        action_type_counts={},
+        action_name_counts={},
+        locations=[],
+        companions=[],
+        screenshots=[]
+    )
+
+def _get_or_create_summary(db: Session, key: tuple) -> DailyActivitySummary:
+    summary = db.scalars(_summary_query(key)).first()
+    if summary:
+        return summary
+    try:
+        # 동시에 같은 키를 만드는 경우를 대비해 SAVEPOINT 안에서 생성
+        with db.begin_nested():
+            summary = new_summary_row(key)
+            db.add(summary)
+        return summary
+    except IntegrityError:
+        return db.scalars(_summary_query(key)).one()
+
+async def _get_or_create_summary_async(db: AsyncSession, key: tuple) -> DailyActivitySummary:
+    summary = (await db.scalars(_summary_query(key))).first()
+    if summary:
+        return summary
+    try:
+        async with db.begin_nested():
+            summary = new_summary_row(key)
+            db.add(summary)
+        return summary
+    except IntegrityError:
+        return (await db.scalars(_summary_query(key))).one()
+
+def apply_summary_deltas(db: Session, rows: list, replace: bool = False):
+    """
+    로그 행으로 일일 요약을 갱신합니다. 커밋은 호출한 쪽의 트랜잭션에서 처리합니다.
+    데드락을 피하기 위해 항상 키 순서대로 잠급니다.
+    """
+    deltas = summarize_rows(rows)
+    for key in sorted(deltas, key=str):
+        merge_delta(_get_or_create_summary(db, key), deltas[key], replace=replace)
+
+async def apply_summary_deltas_async(db: AsyncSession, rows: list, replace: bool = False):
+    """
+    apply_summary_deltas의 비동기 버전입니다.
+    """
+    deltas = summarize_rows(rows)
+    for key in sorted(deltas, key=str):
+        merge_delta(await _get_or_create_summary_async(db, key), deltas[key], replace=replace)
+
+async def rebuild_daily_summary_async(db: AsyncSession, session_id: str, user_id: str, ingame_date: date):
+    """
+    로그 수정/삭제 후 해당 날짜의 요약을 원본 로그로부터 다시 계산합니다.
+    남은 로그가 없으면 요약 행을 삭제합니다.
+    """
+    key = (session_id, user_id, ingame_date)
+    logs = (await db.scalars(
+        select(UserLog).where(
+            UserLog.session_id == session_id,
+            UserLog.user_id == user_id,
+            UserLog.ingame_date == ingame_date
+        ).order_by(asc(UserLog.ingame_datetime))
+    )).all()
+
+    if not logs:
+        summary = (await db.scalars(_summary_query(key))).first()
+        if summary:
+            await db.delete(summary)
+        return
+    merge_delta(await _get_or_create_summary_async(db, key), summarize_rows(logs)[key], replace=True)
+
+async def get_daily_summary_async(db: AsyncSession, session_id: str, user_id: str, ingame_date: date) -> Optional[dict]:
+    """
+    일일 활동 요약 한 행을 딕셔너리로 조회합니다. (없으면 None)
+    """
+    summary = (await db.scalars(select(DailyActivitySummary).where(
+        DailyActivitySummary.session_id == session_id,
+        DailyActivitySummary.user_id == user_id,
+        DailyActivitySummary.ingame_date == ingame_date
+    ))).first()
+    if not summary:
+        return None
+    return {
+        "session_id": summary.session_id,
+        "user_id": summary.user_id,
+        "ingame_date": summary.ingame_date,
+        "log_count": summary.log_count,
+        "action_type_counts": summary.action_type_counts,
+        "action_name_counts": summary.action_name_counts,
+        "locations": summary.locations,
+        "companions": summary.companions,
+        "screenshots": summary.screenshots,
+        "first_ingame_datetime": summary.first_ingame_datetime,
+        "last_ingame_datetime": summary.last_ingame_datetime,
+        "updated_at": summary.updated_at
+    }
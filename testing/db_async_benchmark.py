@@ -0,0 +1,73 @@
+"""
+동기 DB 세션 vs 비동기 DB 세션 동시 요청 처리량 비교 벤치마크
+
+async 라우트 안에서 동기 세션을 쓰면 DB 왕복 동안 이벤트 루프 전체가 멈추므로
+동시 요청 수를 늘려도 처리량이 늘지 않습니다. 같은 조회(get_logs_by_user_and_date)를
+동기 / 비동기 helper로 각각 CONCURRENCY개씩 동시에 실행해 req/s를 비교합니다.
+
+사용법 (.env의 PostgreSQL 접속 정보 사용):
+    python testing/db_async_benchmark.py --session-id <세션> --user-id <유저> --date 0001.01.01
+    python testing/db_async_benchmark.py ... --requests 500 --concurrency 1 10 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.database import get_pg_session, get_async_pg_session, pg_async_engine
+from app.utils.log_helper import get_logs_by_user_and_date, get_logs_by_user_and_date_async
+
+
+async def sync_route(session_id: str, user_id: str, date: str):
+    # 기존 방식: async def 안에서 동기 세션 사용 (이벤트 루프 블로킹)
+    db = get_pg_session()
+    try:
+        get_logs_by_user_and_date(db, session_id, user_id, date)
+    finally:
+        db.close()
+
+
+async def async_route(session_id: str, user_id: str, date: str):
+    async with get_async_pg_session() as db:
+        await get_logs_by_user_and_date_async(db, session_id, user_id, date)
+
+
+async def run_benchmark(route, total: int, concurrency: int, args) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await route(args.session_id, args.user_id, args.date)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    return total / elapsed
+
+
+async def main(args):
+    # 커넥션 풀 워밍업
+    await sync_route(args.session_id, args.user_id, args.date)
+    await async_route(args.session_id, args.user_id, args.date)
+
+    print(f"{'concurrency':>12} | {'sync req/s':>12} | {'async req/s':>12} | {'speedup':>8}")
+    print("-" * 54)
+    for concurrency in args.concurrency:
+        sync_rps = await run_benchmark(sync_route, args.requests, concurrency, args)
+        async_rps = await run_benchmark(async_route, args.requests, concurrency, args)
+        print(f"{concurrency:>12} | {sync_rps:>12.1f} | {async_rps:>12.1f} | {async_rps / sync_rps:>7.2f}x")
+
+    await pg_async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="동기/비동기 DB 처리량 비교")
+    parser.add_argument("--session-id", required=True)
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--date", required=True, help="인게임 날짜 (YYYY.MM.DD)")
+    parser.add_argument("--requests", type=int, default=200, help="측정할 총 요청 수")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,108 @@
+"""
+일지 그래프 요청당 오버헤드 벤치마크
+
+기존에는 요청마다 MBTI별 노드 16개 + 기본 노드를 가진 그래프를 새로 만들고 compile 했습니다.
+지금은 MBTI를 state로 받는 노드 하나짜리 그래프를 시작 시 한 번만 compile 하고 공유합니다.
+LLM 호출 시간을 빼고 그래프 자체의 비용만 비교하기 위해 모든 노드를 no-op으로 두고
+  1) 기존: 요청마다 17개 생성 노드 그래프 build + compile + invoke
+  2) 변경: 미리 compile 된 단일 생성 노드 그래프 invoke
+의 요청당 시간을 측정합니다.
+
+사용법:
+    python testing/diary_graph_benchmark.py
+    python testing/diary_graph_benchmark.py --requests 500
+"""
+import argparse
+import time
+from typing import TypedDict
+from langgraph.graph import StateGraph
+from langchain_core.runnables import RunnableLambda
+
+MBTI_LIST = ["INTP", "ENTP", "INFJ", "ESFJ", "INFP", "ISFP", "ISTJ", "ENFP", "ESTJ", "ISTP", "ESTP", "ISFJ", "ENTJ", "ENFJ", "INTJ", "ESFP"]
+
+
+class BenchState(TypedDict, total=False):
+    mbti: str
+    diary: str
+
+
+def noop(state: BenchState) -> BenchState:
+    return state
+
+
+def build_legacy_graph():
+    # 기존 build_diary_graph와 같은 구조 (MBTI별 노드 + 조건 분기)
+    builder = StateGraph(BenchState)
+    builder.add_node("prepare_log", RunnableLambda(noop))
+    builder.add_node("retrieve_mbti", RunnableLambda(noop))
+    builder.add_node("assign_emotion", RunnableLambda(noop))
+    for mbti in MBTI_LIST:
+        builder.add_node(f"generate_diary_{mbti}", RunnableLambda(noop))
+    builder.add_node("generate_diary_default", RunnableLambda(noop))
+    builder.add_node("generate_emotion_info", RunnableLambda(noop))
+    builder.add_node("output", lambda state: state)
+
+    builder.set_entry_point("prepare_log")
+    builder.add_edge("prepare_log", "retrieve_mbti")
+    builder.add_edge("retrieve_mbti", "assign_emotion")
+
+    def route_by_mbti(state: BenchState) -> str:
+        node_key = f"generate_diary_{state.get('mbti', 'INTP')}"
+        return node_key if node_key in builder.nodes else "generate_diary_default"
+
+    route_map = {f"generate_diary_{mbti}": f"generate_diary_{mbti}" for mbti in MBTI_LIST}
+    route_map["generate_diary_default"] = "generate_diary_default"
+    builder.add_conditional_edges("assign_emotion", route_by_mbti, route_map)
+    for node in route_map.values():
+        builder.add_edge(node, "generate_emotion_info")
+    builder.add_edge("generate_emotion_info", "output")
+    builder.set_finish_point("output")
+    return builder.compile()
+
+
+def build_shared_graph():
+    # 현재 build_diary_graph와 같은 구조 (단일 생성 노드)
+    builder = StateGraph(BenchState)
+    for name in ["prepare_log", "retrieve_mbti", "assign_emotion", "generate_diary", "generate_emotion_info"]:
+        builder.add_node(name, RunnableLambda(noop))
+    builder.add_node("output", lambda state: state)
+
+    builder.set_entry_point("prepare_log")
+    builder.add_edge("prepare_log", "retrieve_mbti")
+    builder.add_edge("retrieve_mbti", "assign_emotion")
+    builder.add_edge("assign_emotion", "generate_diary")
+    builder.add_edge("generate_diary", "generate_emotion_info")
+    builder.add_edge("generate_emotion_info", "output")
+    builder.set_finish_point("output")
+    return builder.compile()
+
+
+def measure(fn, total: int) -> float:
+    started = time.perf_counter()
+    for i in range(total):
+        fn({"mbti": MBTI_LIST[i % len(MBTI_LIST)]})
+    return (time.perf_counter() - started) / total * 1000
+
+
+def main(args):
+    # 기존: 요청마다 build + compile + invoke
+    legacy_ms = measure(lambda state: build_legacy_graph().invoke(state), args.requests)
+
+    # 변경: 한 번만 compile 후 invoke
+    started = time.perf_counter()
+    shared_graph = build_shared_graph()
+    compile_once_ms = (time.perf_counter() - started) * 1000
+    shared_ms = measure(shared_graph.invoke, args.requests)
+
+    print(f"{'방식':<28} | {'요청당 ms':>10}")
+    print("-" * 42)
+    print(f"{'legacy (매 요청 compile)':<28} | {legacy_ms:>10.2f}")
+    print(f"{'shared (시작 시 1회 compile)':<28} | {shared_ms:>10.2f}")
+    print(f"\n시작 시 1회 compile 비용: {compile_once_ms:.2f} ms")
+    print(f"요청당 절감: {legacy_ms - shared_ms:.2f} ms ({legacy_ms / shared_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="일지 그래프 요청당 오버헤드 비교")
+    parser.add_argument("--requests", type=int, default=200, help="측정할 요청 수")
+    main(parser.parse_args())
@@ -0,0 +1,98 @@
+"""
+일지 프롬프트용 로그 → 텍스트 변환 벤치마크
+
+기존 prepare_log_node는 timestamp로 다시 정렬한 뒤 iterrows로 행마다 f-string과 pd.notna 검사를 했습니다.
+지금은 이미 ingame_datetime 순으로 조회된 로그를 그대로 쓰고(순서가 어긋난 경우에만 정렬),
+컬럼 배열에 미리 만든 템플릿을 적용합니다. (같은 날짜의 strftime은 한 번만 계산)
+  1) legacy: sort_values("timestamp") + iterrows + f-string
+  2) vectorized: order_by_ingame_time + format_log_lines
+의 처리 시간을 100 / 10,000 / 100,000행에서 측정하고 두 결과가 같은지 확인합니다.
+
+사용법:
+    python testing/log_format_benchmark.py
+    python testing/log_format_benchmark.py --rows 100 10000 100000 --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.api.diary.log_compaction import format_log_lines, order_by_ingame_time
+
+ACTIONS = [
+    ("FARMING", "water_crop", "farm"),
+    ("FARMING", "harvest_crop", "farm"),
+    ("COOKING", "progress_cooking", "kitchen"),
+    ("FISHING", "cast_bait", "lake"),
+    ("TRADE", "sell_item", "store"),
+]
+DETAILS = ["당근", "감자", "토마토", "연어", None]
+COMPANIONS = [None, None, "", "Hana"]
+
+
+def make_logs(rows: int) -> pd.DataFrame:
+    # logs_to_dataframe과 같은 컬럼 구성 (인게임 0001년 → object dtype datetime), 조회 쿼리처럼 인게임 시각 순
+    random.seed(rows)
+    start = datetime(1, 1, 1, 6)
+    records = []
+    for i in range(rows):
+        action_type, action_name, location = random.choice(ACTIONS)
+        records.append({
+            "user_id": "bench",
+            "timestamp": datetime(2025, 1, 1) + timedelta(seconds=i),
+            "ingame_datetime": start + timedelta(seconds=i * 60 * 18 // max(rows, 1)),
+            "location": location,
+            "action_type": action_type,
+            "action_name": action_name,
+            "detail": random.choice(DETAILS),
+            "with": random.choice(COMPANIONS),
+            "screenshot": None
+        })
+    return pd.DataFrame(records)
+
+
+def legacy_format(group: pd.DataFrame) -> str:
+    # 기존 prepare_log_node의 변환 코드
+    sorted_group = group.sort_values(by="timestamp")
+    return "\n".join([
+        f"[{row['ingame_datetime'].strftime('%Y-%m-%d')}] {row['action_type']} - {row['action_name']} @ {row['location']} | detail: {row['detail']}"
+        + (f" (with: {row['with']})" if pd.notna(row['with']) and row['with'] else "")
+        for _, row in sorted_group.iterrows()
+    ])
+
+
+def vectorized_format(group: pd.DataFrame) -> str:
+    return "\n".join(format_log_lines(order_by_ingame_time(group)))
+
+
+def measure(fn, group: pd.DataFrame, repeat: int) -> tuple[float, str]:
+    best = float("inf")
+    result = ""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(group)
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return best, result
+
+
+def main(args):
+    print(f"{'행 수':>8} | {'legacy ms':>10} | {'vectorized ms':>13} | {'배속':>6} | 결과 일치")
+    print("-" * 60)
+    for rows in args.rows:
+        group = make_logs(rows)
+        legacy_ms, legacy_text = measure(legacy_format, group, args.repeat)
+        vectorized_ms, vectorized_text = measure(vectorized_format, group, args.repeat)
+        same = "O" if legacy_text == vectorized_text else "X"
+        print(f"{rows:>8} | {legacy_ms:>10.2f} | {vectorized_ms:>13.2f} | {legacy_ms / vectorized_ms:>5.1f}x | {same}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로그 → 프롬프트 텍스트 변환 속도 비교")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 10_000, 100_000], help="측정할 로그 행 수")
+    parser.add_argument("--repeat", type=int, default=3, help="행 수별 반복 횟수 (최솟값 사용)")
+    main(parser.parse_args())